@@ -11,8 +11,12 @@ pip install -r requirements.txt
 :: Set Flask app and initialize migration
 set FLASK_APP=flask_app.py
 
-:: Initialize Flask-Migrate
-flask db init
+:: Create tables, then apply database migrations
+flask init-db
+flask db upgrade
+
+:: Fingerprint and precompress static files
+flask assets build
 
 :: Create start.bat that activates venv and runs Flask
 echo @echo off > start.bat
@@ -0,0 +1,52 @@
+"""create stock_reservations for time-bounded cart holds
+
+Revision ID: 03c3f1fcbb6f
+Revises: 7b1a7a4ec018
+Create Date: 2026-10-18 22:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '03c3f1fcbb6f'
+down_revision = '7b1a7a4ec018'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_stock_reservations_product_id_expires_at', ['product_id', 'expires_at']),
+    ('ix_stock_reservations_expires_at', ['expires_at']),
+]
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Databases created by db.create_all() after this change already have it
+    if _has_table('stock_reservations'):
+        return
+    op.create_table(
+        'stock_reservations',
+        sa.Column('reservation_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id']),
+        sa.PrimaryKeyConstraint('reservation_id'),
+        sa.UniqueConstraint('user_id', 'product_id',
+                            name='uq_stock_reservations_user_id_product_id'),
+    )
+    for name, columns in INDEXES:
+        op.create_index(name, 'stock_reservations', columns)
+
+
+def downgrade():
+    if _has_table('stock_reservations'):
+        op.drop_table('stock_reservations')
@@ -0,0 +1,44 @@
+"""add indexes for sales, orders, cart and shipping access paths
+
+Revision ID: 3f9c2a1d7b64
+Revises:
+Create Date: 2026-10-18 20:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a1d7b64'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_sales_created_at', 'sales', ['created_at']),
+    ('ix_sales_username', 'sales', ['username']),
+    ('ix_orders_user_id', 'orders', ['user_id']),
+    ('ix_cart_items_user_id_product_id', 'cart_items', ['user_id', 'product_id']),
+    ('ix_user_shipping_info_payment_id', 'user_shipping_info', ['payment_id']),
+    ('ix_payments_order_id', 'payments', ['order_id']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    # Databases created by db.create_all() after this change already have them
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
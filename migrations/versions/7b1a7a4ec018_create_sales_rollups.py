@@ -0,0 +1,63 @@
+"""create the daily sales rollup tables
+
+Revision ID: 7b1a7a4ec018
+Revises: b6621b05dece
+Create Date: 2026-10-18 22:10:00.000000
+
+The tables start empty; run `flask rollups backfill` once after upgrading
+a database that already has sales.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b1a7a4ec018'
+down_revision = 'b6621b05dece'
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    return [
+        ('sales_daily_product', [
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('sale_count', sa.Integer(), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('revenue', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['product_id'], ['products.product_id']),
+            sa.PrimaryKeyConstraint('day', 'product_id'),
+        ]),
+        ('sales_daily_user', [
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('username', sa.String(length=100), nullable=False),
+            sa.Column('sale_count', sa.Integer(), nullable=False),
+            sa.Column('revenue', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('day', 'username'),
+        ]),
+        ('sales_daily_category', [
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('category', sa.String(length=50), nullable=False),
+            sa.Column('sale_count', sa.Integer(), nullable=False),
+            sa.Column('revenue', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('day', 'category'),
+        ]),
+    ]
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Databases created by db.create_all() after this change already have them
+    for name, columns in _tables():
+        if not _has_table(name):
+            op.create_table(name, *columns)
+
+
+def downgrade():
+    for name, _ in reversed(_tables()):
+        if _has_table(name):
+            op.drop_table(name)
@@ -0,0 +1,39 @@
+"""index orders.sale_id for the archival reference checks
+
+Revision ID: 8b41d6e2c9f3
+Revises: 3f9c2a1d7b64
+Create Date: 2026-10-18 21:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41d6e2c9f3'
+down_revision = '3f9c2a1d7b64'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_orders_sale_id', 'orders', ['sale_id']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    # Databases created by db.create_all() after this change already have it
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
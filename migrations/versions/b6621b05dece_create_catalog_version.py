@@ -0,0 +1,46 @@
+"""create and seed catalog_version
+
+Revision ID: b6621b05dece
+Revises: 8b41d6e2c9f3
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6621b05dece'
+down_revision = '8b41d6e2c9f3'
+branch_labels = None
+depends_on = None
+
+
+# catalog_version_id -> what it versions; matches src/services/catalog.py
+VERSION_ROWS = {1: 'catalog', 2: 'showcase'}
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Databases created by db.create_all() after this change already have it
+    if not _has_table('catalog_version'):
+        op.create_table(
+            'catalog_version',
+            sa.Column('catalog_version_id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('catalog_version_id'),
+        )
+    # Seeded here so no request ever has to insert a missing row
+    table = sa.table('catalog_version', sa.column('catalog_version_id'), sa.column('version'))
+    existing = {row[0] for row in op.get_bind().execute(sa.select(table.c.catalog_version_id))}
+    op.bulk_insert(table, [{'catalog_version_id': version_id, 'version': 0}
+                           for version_id in VERSION_ROWS if version_id not in existing])
+
+
+def downgrade():
+    if _has_table('catalog_version'):
+        op.drop_table('catalog_version')
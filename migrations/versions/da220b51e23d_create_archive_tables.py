@@ -0,0 +1,103 @@
+"""create the archive tables for closed sales, orders and payments
+
+Revision ID: da220b51e23d
+Revises: 03c3f1fcbb6f
+Create Date: 2026-10-18 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'da220b51e23d'
+down_revision = '03c3f1fcbb6f'
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    # Same columns as the hot tables, with no foreign keys and ids copied over
+    return [
+        ('sales_archive', [
+            sa.Column('sale_id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=100), nullable=False),
+            sa.Column('product_name', sa.String(length=255), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('total_price', sa.Float(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('sale_id'),
+        ], [
+            ('ix_sales_archive_username', ['username']),
+            ('ix_sales_archive_created_at', ['created_at']),
+        ]),
+        ('orders_archive', [
+            sa.Column('order_id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('sale_id', sa.Integer(), nullable=False),
+            sa.Column('product_name', sa.String(length=255), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('category', sa.String(length=50), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('order_id'),
+        ], [
+            ('ix_orders_archive_created_at', ['created_at']),
+            ('ix_orders_archive_user_id_order_id', ['user_id', 'order_id']),
+        ]),
+        ('payments_archive', [
+            sa.Column('payment_id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('payment_method', sa.Enum('Cash on Delivery', 'E-Wallet', 'Card'), nullable=False),
+            sa.Column('e_wallet_provider', sa.Enum('GCASH', 'MAYA'), nullable=True),
+            sa.Column('card_provider', sa.Enum('BDO', 'BPI', 'MetroBank'), nullable=True),
+            sa.Column('transaction_id', sa.String(length=100), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('payment_id'),
+            sa.UniqueConstraint('transaction_id'),
+        ], [
+            ('ix_payments_archive_user_id', ['user_id']),
+            ('ix_payments_archive_order_id', ['order_id']),
+            ('ix_payments_archive_created_at', ['created_at']),
+        ]),
+        ('user_shipping_info_archive', [
+            sa.Column('shipping_id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('payment_id', sa.Integer(), nullable=False),
+            sa.Column('full_name', sa.String(length=100), nullable=False),
+            sa.Column('address_line1', sa.String(length=255), nullable=False),
+            sa.Column('address_line2', sa.String(length=255), nullable=True),
+            sa.Column('city', sa.String(length=100), nullable=False),
+            sa.Column('province', sa.String(length=100), nullable=True),
+            sa.Column('postal_code', sa.String(length=20), nullable=False),
+            sa.Column('phone_number', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('shipping_id'),
+        ], [
+            ('ix_user_shipping_info_archive_user_id', ['user_id']),
+            ('ix_user_shipping_info_archive_payment_id', ['payment_id']),
+        ]),
+    ]
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Databases created by db.create_all() after this change already have them
+    for name, columns, indexes in _tables():
+        if _has_table(name):
+            continue
+        op.create_table(name, *columns)
+        for index_name, index_columns in indexes:
+            op.create_index(index_name, name, index_columns)
+
+
+def downgrade():
+    for name, _, _ in reversed(_tables()):
+        if _has_table(name):
+            op.drop_table(name)
@@ -2,16 +2,27 @@ from flask import Flask
 
 from .routes import main_bp, user_bp, admin_bp
 from .config import load_config, load_mail_config
-from .utils import register_error_handlers, inject_role
+from .utils import register_error_handlers, inject_role, register_sql_instrumentation, init_server_session, init_static_assets, init_json_backend, init_rate_limit, init_proxy_fix, init_id_generator
 from .models import db
+from .commands import register_commands
+from .services import mail_dispatcher, payment_gateway
 
 
-def create_app():
+def create_app(test_config=None):
     # Initialization
     app = Flask(__name__, static_folder="../static",
                 template_folder="../templates")
-    load_config(app)
+    load_config(app, test_config)
     load_mail_config(app)
+    mail_dispatcher.init_app(app)
+    payment_gateway.init_app(app)
+    register_sql_instrumentation(app)
+    init_server_session(app)
+    init_static_assets(app)
+    init_json_backend(app)
+    init_proxy_fix(app)
+    init_rate_limit(app)
+    init_id_generator(app)
 
     # Register blueprints
     app.register_blueprint(main_bp)
@@ -23,4 +34,7 @@ def create_app():
 
     # Register error handlers
     register_error_handlers(app)
+
+    # Register CLI commands
+    register_commands(app)
     return app
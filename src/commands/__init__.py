@@ -0,0 +1,29 @@
+from .database import init_db, db_cli
+from .rollups import rollups_cli
+from .assets import assets_cli
+from .imports import import_cli
+from .reservations import reservations_cli
+from .payments import payments_cli
+from .archive import archive_cli
+from .seed import seed
+from .bench import (bench, bench_search, bench_login, bench_serialization, bench_login_flood,
+                    bench_startup)
+
+
+def register_commands(app):
+    """Register the project's flask CLI commands."""
+    app.cli.add_command(init_db)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(import_cli)
+    app.cli.add_command(reservations_cli)
+    app.cli.add_command(payments_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(seed)
+    app.cli.add_command(bench)
+    app.cli.add_command(bench_search)
+    app.cli.add_command(bench_login)
+    app.cli.add_command(bench_serialization)
+    app.cli.add_command(bench_login_flood)
+    app.cli.add_command(bench_startup)
@@ -0,0 +1,31 @@
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from ..services import archive_closed_rows
+
+archive_cli = AppGroup('archive', help='Move old sales, orders and payments to the archive tables.')
+
+
+@archive_cli.command('run')
+@click.option('--older-than-days', type=int, default=None,
+              help='Archive closed rows older than this; defaults to ARCHIVE_AFTER_DAYS.')
+@click.option('--batch-size', type=int, default=None, help='Rows moved per transaction.')
+@click.option('--pause', type=float, default=None,
+              help='Seconds to wait between batches; defaults to ARCHIVE_BATCH_PAUSE.')
+@click.option('--every', type=int, default=0,
+              help='Keep running and archive every N seconds (for a process manager or scheduled task).')
+def run(older_than_days, batch_size, pause, every):
+    """Archive closed rows past the horizon in batches."""
+    if pause is None:
+        pause = current_app.config['ARCHIVE_BATCH_PAUSE']
+    while True:
+        started = time.perf_counter()
+        moved = archive_closed_rows(older_than_days, batch_size, pause)
+        summary = ', '.join(f'{count} {table}' for table, count in moved.items())
+        click.echo(f'Archived {summary} in {time.perf_counter() - started:.1f}s.')
+        if not every:
+            break
+        time.sleep(every)
@@ -0,0 +1,17 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from ..utils import build_static_assets
+
+assets_cli = AppGroup('assets', help='Build fingerprinted static assets.')
+
+
+@assets_cli.command('build')
+def build():
+    """Fingerprint and precompress static/ into static/dist (brotli needs the brotli package)."""
+    manifest = build_static_assets(current_app.static_folder)
+    for logical, entry in sorted(manifest.items()):
+        encodings = ', '.join(entry['encodings']) or 'uncompressed'
+        click.echo(f"{logical} -> {entry['file']} ({encodings})")
+    click.echo(f'{len(manifest)} assets written. Restart the app to serve them.')
@@ -0,0 +1,460 @@
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import click
+from flask import current_app
+from sqlalchemy.sql import func
+
+from ..models import db, User, Product, Order, Sale, Payment, CartItem
+from ..services import (get_catalog, search_catalog, get_period_range, sales_report_query,
+                        serialize_sale_report, sales_summary_query, serialize_sale_summary)
+from .seed import SEED_PASSWORD
+
+# name -> (role to log in as, path); None means anonymous
+BENCH_ENDPOINTS = {
+    'menu': ('user', '/menu'),
+    'products': ('user', '/products'),
+    'getproducts': (None, '/getproducts'),
+    'getproducts_page': (None, '/getproducts?limit=50'),
+    'getproduct': (None, '/getproduct/{product_id}'),
+    'search': (None, '/search?q=product'),
+    'cart': ('user', '/cart'),
+    'orders': ('user', '/orders'),
+    'admin_users': ('admin', '/admin/users'),
+    'getsales_page': ('admin', '/getsales?period=monthly&limit=50'),
+    'sales': ('admin', '/sales'),
+    'analytics_data': ('admin', '/analytics/data'),
+    'user_info': ('admin', '/user_info'),
+}
+_QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+# Short and long terms, several words, and one that matches nothing
+BENCH_SEARCH_QUERIES = ('seed', 'product 1', 'seed product 42', 'drinks', 'pr', 'no such thing')
+# TEST-NET-1 (RFC 5737): never routed, so a connect attempt hangs until it times out
+UNREACHABLE_DB_HOST = '192.0.2.1'
+# Run in a fresh interpreter so nothing is imported yet; prints one JSON line.
+# SQLAlchemy is imported first to hook pool connects; src imports it anyway, so it is timed
+_STARTUP_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+connections = []
+event.listen(Pool, 'connect', lambda *args: connections.append(1))
+import src
+imported = time.perf_counter()
+app = src.create_app()
+created = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000,
+                  'create_app_ms': (created - imported) * 1000,
+                  'connections': len(connections)}))
+'''
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(math.ceil(pct / 100 * len(ordered)) - 1, 0))]
+
+
+def _bench_accounts():
+    """Pick the busiest customer and any admin, so pages have data to render."""
+    user_id = db.session.query(Order.user_id).group_by(Order.user_id).order_by(
+        func.count(Order.order_id).desc()).limit(1).scalar()
+    if user_id is None:
+        user_id = db.session.query(User.user_id).filter(User.role == 'user').limit(1).scalar()
+    admin_id = db.session.query(User.user_id).filter(User.role == 'admin').limit(1).scalar()
+    product_id = db.session.query(Product.product_id).limit(1).scalar()
+    return {'user': user_id, 'admin': admin_id}, product_id
+
+
+def run_endpoint(app, path, role, account_id, requests, concurrency):
+    """Fire requests at one path from concurrency threads and summarize the timings."""
+    latencies, queries, statuses = [], [], {}
+    lock = threading.Lock()
+    per_thread = [requests // concurrency + (1 if i < requests % concurrency else 0)
+                  for i in range(concurrency)]
+
+    def worker(count):
+        client = app.test_client()
+        if role is not None:
+            with client.session_transaction() as sess:
+                sess['user_id'] = account_id
+                sess['role'] = role
+        local = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.get(path)
+            response.get_data()
+            elapsed = (time.perf_counter() - started) * 1000
+            match = _QUERY_COUNT.search(response.headers.get('Server-Timing', ''))
+            local.append((elapsed, int(match.group(1)) if match else None, response.status_code))
+        with lock:
+            for elapsed, query_count, status in local:
+                latencies.append(elapsed)
+                if query_count is not None:
+                    queries.append(query_count)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(count,)) for count in per_thread if count]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'path': path,
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        'errors': sum(count for code, count in statuses.items() if code >= 400),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2),
+        'throughput_rps': round(len(latencies) / wall, 1),
+        # Streamed responses finish after the header is sent and report no queries
+        'queries_per_request': round(sum(queries) / len(queries), 1) if queries else None,
+    }
+
+
+def _print_results(results, baseline=None):
+    click.echo(f"{'endpoint':<18}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'queries':>9}{'errors':>8}")
+    for name, result in results.items():
+        line = (f"{name:<18}{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}"
+                f"{result['throughput_rps']:>9}{str(result['queries_per_request']):>9}{result['errors']:>8}")
+        before = (baseline or {}).get(name)
+        if before:
+            change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+            line += f"   p95 {change:+.0f}% vs baseline"
+        click.echo(line)
+
+
+@click.command('bench')
+@click.option('--requests', 'requests_per_endpoint', default=200, show_default=True,
+              help='Requests per endpoint.')
+@click.option('--concurrency', default=4, show_default=True, help='Client threads per endpoint.')
+@click.option('--warmup', default=5, show_default=True, help='Untimed requests per endpoint first.')
+@click.option('--only', multiple=True, type=click.Choice(sorted(BENCH_ENDPOINTS)),
+              help='Benchmark just these endpoints (repeatable).')
+@click.option('--output', type=click.Path(dir_okay=False),
+              help='Where to save the JSON results; defaults to instance/bench/.')
+@click.option('--compare', type=click.Path(exists=True, dir_okay=False),
+              help='Earlier results file to compare p95 latency against.')
+def bench(requests_per_endpoint, concurrency, warmup, only, output, compare):
+    """Benchmark the main pages through the test client under threaded load."""
+    app = current_app._get_current_object()
+    accounts, product_id = _bench_accounts()
+    if product_id is None:
+        raise click.ClickException('No products found; run `flask seed` first.')
+
+    results = {}
+    for name in (only or BENCH_ENDPOINTS):
+        role, path = BENCH_ENDPOINTS[name]
+        if role is not None and accounts[role] is None:
+            click.echo(f'Skipping {name}: no {role} account.')
+            continue
+        path = path.format(product_id=product_id)
+        if warmup:
+            run_endpoint(app, path, role, accounts.get(role), warmup, 1)
+        results[name] = run_endpoint(
+            app, path, role, accounts.get(role), requests_per_endpoint, concurrency)
+
+    baseline = None
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)['endpoints']
+    _print_results(results, baseline)
+
+    report = {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'database': db.engine.dialect.name,
+        'requests_per_endpoint': requests_per_endpoint,
+        'concurrency': concurrency,
+        'row_counts': {model.__tablename__: db.session.query(func.count()).select_from(model).scalar()
+                       for model in (User, Product, CartItem, Sale, Order, Payment)},
+        'endpoints': results,
+    }
+    if output is None:
+        os.makedirs(os.path.join(app.instance_path, 'bench'), exist_ok=True)
+        output = os.path.join(app.instance_path, 'bench',
+                              f"bench-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    click.echo(f'Results saved to {output}')
+
+
+def _mean_ms(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+@click.command('bench-search')
+@click.option('--query', 'queries', multiple=True,
+              help='Search terms to time (repeatable); defaults to a mixed set.')
+@click.option('--repeat', default=20, show_default=True, help='Timed runs per term.')
+def bench_search(queries, repeat):
+    """Time catalog search against loading and filtering every product per request."""
+    products = get_catalog()['products']
+    if not products:
+        raise click.ClickException('No products found; run `flask seed` first.')
+    queries = queries or BENCH_SEARCH_QUERIES
+
+    # The first search after a catalog change builds the index
+    started = time.perf_counter()
+    search_catalog(queries[0])
+    click.echo(f'{len(products)} products, index built in '
+               f'{(time.perf_counter() - started) * 1000:.0f} ms')
+
+    def scan(needle):
+        # What /search did before the index: load every product, filter in Python
+        matches = [p for p in Product.query.all() if needle in p.product_name.lower()]
+        db.session.remove()
+        return matches
+
+    click.echo(f"{'query':<20}{'matches':>9}{'search ms':>11}{'scan ms':>9}{'speedup':>9}")
+    for query in queries:
+        matches = search_catalog(query)['total']
+        search_ms = _mean_ms(lambda: search_catalog(query, page=2), repeat)
+        scan_ms = _mean_ms(lambda: scan(query.lower()), max(repeat // 4, 1))
+        click.echo(f'{query[:19]:<20}{matches:>9}{search_ms:>11.2f}{scan_ms:>9.2f}'
+                   f'{scan_ms / search_ms if search_ms else 0:>8.1f}x')
+
+
+@contextmanager
+def flooding(app, threads, send):
+    """Run send(client, thread_index) in a loop on threads for the length of the block.
+
+    Yields the status code counts, which are final once the block exits.
+    """
+    stop = threading.Event()
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(index):
+        client = app.test_client()
+        while not stop.is_set():
+            status = send(client, index)
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    try:
+        yield statuses
+    finally:
+        stop.set()
+        for thread in workers:
+            thread.join()
+
+
+def _print_flood(quiet, busy, statuses, elapsed, label):
+    click.echo(f"{'/getproducts':<18}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}")
+    for name, result in (('quiet', quiet), ('under flood', busy)):
+        click.echo(f"{name:<18}{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}"
+                   f"{result['throughput_rps']:>9}")
+    codes = ', '.join(f'{code}: {count}' for code, count in sorted(statuses.items()))
+    click.echo(f'{label}: {sum(statuses.values()) / elapsed:.1f}/s ({codes})')
+
+
+@click.command('bench-login')
+@click.option('--username', help='Account to sign in as; defaults to the first seeded user.')
+@click.option('--password', default=SEED_PASSWORD, show_default=True)
+@click.option('--threads', default=16, show_default=True, help='Threads posting logins.')
+@click.option('--requests', 'catalog_requests', default=500, show_default=True,
+              help='Catalog requests timed, quiet and under the flood.')
+@click.option('--concurrency', default=2, show_default=True, help='Catalog client threads.')
+def bench_login(username, password, threads, catalog_requests, concurrency):
+    """Time the catalog while threads sign in as fast as they can.
+
+    Shows how much of the CPU password hashing leaves to other requests;
+    compare runs with different PASSWORD_HASH_WORKERS.
+    """
+    app = current_app._get_current_object()
+    if username is None:
+        username = db.session.query(User.username).filter(
+            User.username.like('seed_user%')).order_by(User.user_id).limit(1).scalar()
+    if username is None:
+        raise click.ClickException('No seeded user found; run `flask seed` or pass --username.')
+    # Every login here comes from one client; keep the limiter from turning it away
+    app.extensions.pop('rate_limit', None)
+
+    def login(client, index):
+        return client.post('/login', data={'username': username, 'password': password}).status_code
+
+    quiet = run_endpoint(app, '/getproducts', None, None, catalog_requests, concurrency)
+    with flooding(app, threads, login) as statuses:
+        started = time.perf_counter()
+        busy = run_endpoint(app, '/getproducts', None, None, catalog_requests, concurrency)
+        elapsed = time.perf_counter() - started
+    click.echo(f"Hashing with {app.config['PASSWORD_HASH_WORKERS']} workers, "
+               f"{app.config['PASSWORD_HASH_METHOD']}")
+    _print_flood(quiet, busy, statuses, elapsed, 'logins')
+
+
+def _legacy_sale_report(row):
+    # How report rows were built before the compiled serializers
+    data = row._asdict()
+    for key, value in data.items():
+        if key == 'created_at':
+            data[key] = value.strftime('%Y-%m-%d %H:%M:%S')
+        elif key == 'card_number':
+            data[key] = value[-4:] if value else 'N/A'
+        elif key not in ('sale_id', 'username', 'product_id', 'product_name',
+                         'quantity', 'total_price'):
+            data[key] = value or 'N/A'
+    return data
+
+
+@click.command('bench-serialization')
+@click.option('--period', type=click.Choice(['daily', 'weekly', 'monthly', 'quarterly', 'yearly']),
+              help='Limit the sales to one report period; all time by default.')
+@click.option('--repeat', default=3, show_default=True, help='Timed runs per path; the best is kept.')
+def bench_serialization(period, repeat):
+    """Time building the sales report and summary bodies, old way and new.
+
+    Each path runs the query, turns every row into a dict and encodes the
+    list, as the JSON endpoints do. Peak memory is traced on a separate run.
+    """
+    app = current_app._get_current_object()
+    start, end = get_period_range(period) if period else (None, None)
+
+    def rows(build_query):
+        query, sale_id = build_query(start, end)
+        return query.order_by(sale_id).all()
+
+    def report_compiled():
+        return app.json.dumps([serialize_sale_report(row) for row in rows(sales_report_query)])
+
+    def report_per_row():
+        return json.dumps([_legacy_sale_report(row) for row in rows(sales_report_query)],
+                          sort_keys=True)
+
+    def summary_tuples():
+        return app.json.dumps([serialize_sale_summary(row) for row in rows(sales_summary_query)])
+
+    def summary_entities():
+        # The admin sales page before it selected row tuples
+        query = Sale.query
+        if start:
+            query = query.filter(Sale.created_at >= start)
+        if end:
+            query = query.filter(Sale.created_at < end)
+        return json.dumps([{
+            'sale_id': sale.sale_id, 'username': sale.username, 'product_id': sale.product_id,
+            'product_name': sale.product_name, 'quantity': sale.quantity,
+            'total_price': sale.total_price,
+            'created_at': sale.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        } for sale in query.order_by(Sale.sale_id)], sort_keys=True)
+
+    paths = (
+        ('report, compiled', report_compiled),
+        ('report, per-row dict', report_per_row),
+        ('summary, row tuples', summary_tuples),
+        ('summary, ORM entities', summary_entities),
+    )
+
+    click.echo(f"JSON backend: {type(app.json).__name__}")
+    click.echo(f"{'path':<24}{'best ms':>10}{'peak MiB':>10}{'body MiB':>10}")
+    for name, build in paths:
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = build()
+            times.append(time.perf_counter() - started)
+            db.session.remove()
+        tracemalloc.start()
+        build()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        db.session.remove()
+        click.echo(f'{name:<24}{min(times) * 1000:>10.0f}{peak / 2 ** 20:>10.1f}'
+                   f'{len(body) / 2 ** 20:>10.1f}')
+
+
+@click.command('bench-login-flood')
+@click.option('--username', help='Account to target; defaults to the first seeded user.')
+@click.option('--threads', default=8, show_default=True, help='Threads posting wrong passwords.')
+@click.option('--requests', 'catalog_requests', default=1000, show_default=True,
+              help='Catalog requests timed, quiet and under the flood.')
+@click.option('--concurrency', default=2, show_default=True, help='Catalog client threads.')
+def bench_login_flood(username, threads, catalog_requests, concurrency):
+    """Time the catalog while threads guess passwords against the rate limiter.
+
+    Half the threads post from one address; the rest rotate through many
+    addresses aimed at the same account, so both the per-IP and the
+    per-account buckets are exercised.
+    """
+    app = current_app._get_current_object()
+    if 'rate_limit' not in app.extensions:
+        raise click.ClickException('Rate limiting is off; set RATE_LIMIT_BACKEND to sqlite or redis.')
+    if username is None:
+        username = db.session.query(User.username).filter(
+            User.username.like('seed_user%')).order_by(User.user_id).limit(1).scalar() or 'nobody'
+    counters = [0] * threads
+
+    def guess(client, index):
+        counters[index] += 1
+        address = '10.0.0.1' if index % 2 else f'10.1.{index}.{counters[index] % 250}'
+        return client.post('/login', data={'username': username, 'password': 'wrong-password'},
+                           environ_base={'REMOTE_ADDR': address}).status_code
+
+    quiet = run_endpoint(app, '/getproducts', None, None, catalog_requests, concurrency)
+    with flooding(app, threads, guess) as statuses:
+        started = time.perf_counter()
+        busy = run_endpoint(app, '/getproducts', None, None, catalog_requests, concurrency)
+        elapsed = time.perf_counter() - started
+    click.echo(f"Rate limit backend {app.config.get('RATE_LIMIT_BACKEND', 'sqlite')}, "
+               f"login limits {app.config['RATE_LIMIT_LOGIN_IP']} per IP, "
+               f"{app.config['RATE_LIMIT_LOGIN_ACCOUNT']} per account")
+    _print_flood(quiet, busy, statuses, elapsed, 'login attempts')
+
+
+def measure_startup(env=None, timeout=60):
+    """Time `import src` and create_app() in a fresh interpreter, counting DB connections."""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT], cwd=root,
+                            env={**os.environ, **(env or {})}, capture_output=True, text=True,
+                            timeout=timeout)
+    if result.returncode != 0:
+        raise click.ClickException(f'Startup failed:\n{result.stderr.strip()}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@click.command('bench-startup')
+@click.option('--runs', default=5, show_default=True,
+              help='Fresh interpreters per configuration; the best is kept.')
+def bench_startup(runs):
+    """Time importing the app and create_app(), with the configured database and an unreachable one."""
+    configs = {
+        'configured': {},
+        # create_app() must not connect: against this host any connect would stall for seconds
+        'unreachable db': {'DB_HOST': UNREACHABLE_DB_HOST, 'DB_DIALECT': 'mysql+pymysql',
+                           'DB_REPLICA_HOST': ''},
+    }
+    click.echo(f"{'database':<18}{'import ms':>11}{'create ms':>11}{'connections':>13}")
+    touched = []
+    for name, env in configs.items():
+        samples = [measure_startup(env) for _ in range(runs)]
+        connections = max(sample['connections'] for sample in samples)
+        click.echo(f"{name:<18}{min(s['import_ms'] for s in samples):>11.0f}"
+                   f"{min(s['create_app_ms'] for s in samples):>11.0f}{connections:>13}")
+        if connections:
+            touched.append(name)
+    if touched:
+        raise click.ClickException(f"create_app() opened a database connection ({', '.join(touched)}).")
@@ -0,0 +1,47 @@
+import click
+from flask import g
+from flask.cli import ScriptInfo, with_appcontext
+
+from ..models import db
+from ..services import ensure_catalog_versions
+
+
+@click.command('init-db')
+def init_db():
+    """Create any missing tables."""
+    db.create_all()
+    # Seeded here rather than on first write, where two workers could race to insert it
+    ensure_catalog_versions()
+    db.session.commit()
+    click.echo('Database tables created.')
+
+
+class MigrateGroup(click.Group):
+    """Loads Flask-Migrate's subcommands, and Alembic with them, on first use."""
+
+    def _load(self, ctx):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as migrate_cli
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        if 'migrate' not in app.extensions:
+            Migrate(app, db)
+        return migrate_cli
+
+    def list_commands(self, ctx):
+        return self._load(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._load(ctx).get_command(ctx, name)
+
+
+@click.group('db', cls=MigrateGroup)
+@click.option('-d', '--directory', default=None,
+              help=('Migration script directory (default is "migrations")'))
+@click.option('-x', '--x-arg', multiple=True,
+              help='Additional arguments consumed by custom env.py scripts')
+@with_appcontext
+def db_cli(directory, x_arg):
+    """Perform database migrations."""
+    # Same group options as flask_migrate.cli.db, read back by Migrate.get_config()
+    g.directory = directory
+    g.x_arg = x_arg
@@ -0,0 +1,42 @@
+import json
+
+import click
+from flask.cli import AppGroup
+
+from ..services import import_products, import_showcase_images, iter_import_rows, detect_import_format, IMPORT_FORMATS
+
+import_cli = AppGroup('import', help='Bulk import products and showcase images.')
+
+
+def _run(importer, path, fmt, report_path):
+    fmt = fmt or detect_import_format(path)
+    if fmt is None:
+        raise click.ClickException('Cannot tell the file format; pass --format.')
+    with open(path, 'rb') as f:
+        report = importer(iter_import_rows(f, fmt))
+    for entry in report['rows']:
+        if entry.get('errors'):
+            click.echo(f"row {entry['row']}: {entry['status']}: {'; '.join(entry['errors'])}")
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    click.echo(', '.join(f'{count} {status}' for status, count in sorted(report['counts'].items()))
+               or 'Nothing to import.')
+
+
+@import_cli.command('products')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), help='Defaults to the file extension.')
+@click.option('--report', 'report_path', type=click.Path(dir_okay=False), help='Write the per-row report as JSON.')
+def products(path, fmt, report_path):
+    """Upsert products by name from a CSV, JSON or NDJSON file."""
+    _run(import_products, path, fmt, report_path)
+
+
+@import_cli.command('showcase')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), help='Defaults to the file extension.')
+@click.option('--report', 'report_path', type=click.Path(dir_okay=False), help='Write the per-row report as JSON.')
+def showcase(path, fmt, report_path):
+    """Add showcase images by URL from a CSV, JSON or NDJSON file."""
+    _run(import_showcase_images, path, fmt, report_path)
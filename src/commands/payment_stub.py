@@ -0,0 +1,121 @@
+import asyncio
+import json
+import random
+
+from ..services import new_gateway_session, sign_webhook, WEBHOOK_SIGNATURE_HEADER
+
+
+async def _read_request_head(reader):
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, path, _ = line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return method, path, headers
+
+
+class StubGateway:
+    """Local stand-in for a provider, speaking the API JSONGatewayProvider expects.
+
+    Charges are answered after `latency` seconds. They settle straight
+    away, or after `settle_after` seconds when that is set. A `fail_rate`
+    share of them is declined. Settled charges are reported to
+    `webhook_url` when one is given.
+    """
+
+    def __init__(self, latency=0.05, settle_after=0.0, fail_rate=0.0,
+                 webhook_url=None, webhook_secret=None, random_seed=None):
+        self.latency = latency
+        self.settle_after = settle_after
+        self.fail_rate = fail_rate
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret or ''
+        self.charges = {}
+        self.requests = 0
+        self.connections = 0
+        self._rng = random.Random(random_seed)
+        self._webhook_session = None
+        self._server = None
+        self.port = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        self._server = await asyncio.start_server(self._serve, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.webhook_url:
+            self._webhook_session = new_gateway_session(size=4, timeout=5)
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        if self._webhook_session:
+            await self._webhook_session.close()
+
+    async def _serve(self, reader, writer):
+        # One keep-alive connection: answer requests until the client hangs up
+        self.connections += 1
+        try:
+            while True:
+                head = await _read_request_head(reader)
+                if head is None:
+                    break
+                method, path, headers = head
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                self.requests += 1
+                status, payload = await self._route(method, path, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f'HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n'
+                    f'Content-Length: {len(data)}\r\n\r\n'.encode() + data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == 'POST' and path.endswith('/charges'):
+            try:
+                charge = json.loads(body)
+                transaction_id = charge['transaction_id']
+            except (ValueError, KeyError, TypeError):
+                return 400, {'error': 'transaction_id is required'}
+            await asyncio.sleep(self.latency)
+            if transaction_id not in self.charges:  # Idempotent by transaction_id
+                self.charges[transaction_id] = {**charge, 'status': 'pending'}
+                outcome = 'failed' if self._rng.random() < self.fail_rate else 'completed'
+                if self.settle_after:
+                    asyncio.get_running_loop().call_later(
+                        self.settle_after, lambda: asyncio.ensure_future(
+                            self._settle(transaction_id, outcome)))
+                else:
+                    await self._settle(transaction_id, outcome)
+            return 200, self.charges[transaction_id]
+        if method == 'GET' and '/charges/' in path:
+            charge = self.charges.get(path.rsplit('/', 1)[1])
+            return (200, charge) if charge else (404, {'error': 'Unknown charge'})
+        return 404, {'error': 'Not found'}
+
+    async def _settle(self, transaction_id, outcome):
+        self.charges[transaction_id]['status'] = outcome
+        if not self._webhook_session:
+            return
+        body = json.dumps({'transaction_id': transaction_id, 'status': outcome}).encode()
+        try:
+            async with self._webhook_session.post(
+                    self.webhook_url, data=body,
+                    headers={'Content-Type': 'application/json',
+                             WEBHOOK_SIGNATURE_HEADER: sign_webhook(self.webhook_secret, body)}) as response:
+                await response.read()
+        except Exception as e:
+            print(f"Stub gateway could not deliver webhook for {transaction_id}: {e!r}")
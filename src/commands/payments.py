@@ -0,0 +1,116 @@
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from ..services import new_gateway_session, JSONGatewayProvider, poll_pending_payments
+from .bench import percentile
+from .payment_stub import StubGateway
+
+payments_cli = AppGroup('payments', help='Talk to the payment gateways.')
+
+
+@payments_cli.command('stub-gateway')
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=8099, show_default=True)
+@click.option('--latency', default=0.05, show_default=True, help='Seconds before a charge is answered.')
+@click.option('--settle-after', default=0.0, show_default=True,
+              help='Answer charges as pending and settle them this many seconds later.')
+@click.option('--fail-rate', default=0.0, show_default=True, help='Share of charges to decline.')
+@click.option('--webhook-url', help='Where to report settled charges, e.g. http://127.0.0.1:5000/payments/webhook')
+def stub_gateway(host, port, latency, settle_after, fail_rate, webhook_url):
+    """Run a local fake payment gateway for development and tests."""
+    stub = StubGateway(latency=latency, settle_after=settle_after, fail_rate=fail_rate,
+                       webhook_url=webhook_url,
+                       webhook_secret=current_app.config.get('PAYMENT_WEBHOOK_SECRET'))
+
+    async def serve():
+        await stub.start(host, port)
+        click.echo(f'Stub gateway listening on http://{host}:{stub.port}')
+        await stub.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+@payments_cli.command('poll')
+@click.option('--older-than', default=60, show_default=True,
+              help='Only ask about payments pending for at least this many seconds.')
+@click.option('--limit', default=500, show_default=True, help='Payments checked per round.')
+@click.option('--every', type=int, default=0,
+              help='Keep running and poll every N seconds (for a process manager or scheduled task).')
+def poll(older_than, limit, every):
+    """Settle pending gateway payments whose webhook never arrived."""
+    if not current_app.config.get('PAYMENT_GATEWAY_URL'):
+        raise click.ClickException('PAYMENT_GATEWAY_URL is not set.')
+    while True:
+        counts = poll_pending_payments(older_than, limit)
+        click.echo(', '.join(f'{count} {status}' for status, count in counts.items())
+                   or 'No pending payments.')
+        if not every:
+            break
+        time.sleep(every)
+
+
+@payments_cli.command('bench')
+@click.option('--charges', default=2000, show_default=True)
+@click.option('--concurrency', default=50, show_default=True, help='Charges in flight at once.')
+@click.option('--pool-size', default=10, show_default=True, help='Keep-alive connections to the gateway.')
+@click.option('--latency', default=0.05, show_default=True, help='Stub gateway response time in seconds.')
+@click.option('--blocking-sample', default=50, show_default=True,
+              help='Charges to also send one by one with urllib, as a blocking baseline.')
+def bench(charges, concurrency, pool_size, latency, blocking_sample):
+    """Measure charge throughput through the async adapter against the stub gateway."""
+    loop = asyncio.new_event_loop()
+    stub = StubGateway(latency=latency, random_seed=1)
+    threading.Thread(target=loop.run_forever, name='stub-gateway', daemon=True).start()
+    asyncio.run_coroutine_threadsafe(stub.start(), loop).result()
+    base_url = f'http://127.0.0.1:{stub.port}'
+
+    async def run():
+        session = new_gateway_session(size=pool_size, timeout=10)
+        provider = JSONGatewayProvider('GCASH', base_url)
+        slots = asyncio.Semaphore(concurrency)
+        latencies, failures = [], 0
+
+        async def one(i):
+            nonlocal failures
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    await provider.charge(session, {'transaction_id': f'BENCH_{i}', 'amount': 100.0,
+                                                    'currency': 'PHP', 'method': 'E-Wallet'})
+                    latencies.append((time.perf_counter() - started) * 1000)
+                except Exception:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(charges)))
+        wall = time.perf_counter() - started
+        await session.close()
+        return sorted(latencies), failures, wall
+
+    latencies, failures, wall = asyncio.run(run())
+    click.echo(f'async adapter: {len(latencies)} charges in {wall:.2f}s = {len(latencies) / wall:.0f}/s, '
+               f'p50 {percentile(latencies, 50):.1f} ms, p95 {percentile(latencies, 95):.1f} ms, '
+               f'{failures} failed, {stub.connections} connections opened')
+
+    if blocking_sample:
+        started = time.perf_counter()
+        for i in range(blocking_sample):
+            request = urllib.request.Request(
+                f'{base_url}/charges', method='POST', headers={'Content-Type': 'application/json'},
+                data=json.dumps({'transaction_id': f'BLOCKING_{i}', 'amount': 100.0}).encode())
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+        wall = time.perf_counter() - started
+        click.echo(f'blocking urllib, one at a time: {blocking_sample / wall:.0f}/s '
+                   f'({wall / blocking_sample * 1000:.1f} ms per charge held in the request)')
+    loop.call_soon_threadsafe(loop.stop)
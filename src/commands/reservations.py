@@ -0,0 +1,22 @@
+import time
+
+import click
+from flask.cli import AppGroup
+
+from ..services import expire_reservations
+
+reservations_cli = AppGroup('reservations', help='Maintain cart stock holds.')
+
+
+@reservations_cli.command('sweep')
+@click.option('--every', type=int, default=0,
+              help='Keep running and sweep every N seconds (for a process manager or scheduled task).')
+@click.option('--batch-size', type=int, default=None, help='Holds deleted per transaction.')
+def sweep(every, batch_size):
+    """Delete expired stock holds in batches."""
+    while True:
+        removed = expire_reservations(batch_size)
+        click.echo(f'{removed} expired holds removed.')
+        if not every:
+            break
+        time.sleep(every)
@@ -0,0 +1,24 @@
+import click
+from flask.cli import AppGroup
+
+from ..services import backfill_rollups, verify_rollups
+
+rollups_cli = AppGroup('rollups', help='Maintain the sales rollup tables.')
+
+
+@rollups_cli.command('backfill')
+def backfill():
+    """Rebuild the rollup tables from raw sales."""
+    backfill_rollups()
+    click.echo('Sales rollups rebuilt.')
+
+
+@rollups_cli.command('verify')
+def verify():
+    """Check the rollup tables against raw sales."""
+    mismatches = verify_rollups()
+    for mismatch in mismatches:
+        click.echo(mismatch)
+    if mismatches:
+        raise click.ClickException(f'{len(mismatches)} rollup rows out of step with sales.')
+    click.echo('Sales rollups match raw sales.')
@@ -0,0 +1,160 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import insert
+from sqlalchemy.sql import func
+
+from ..models import db, User, Product, CartItem, Sale, Order, Payment, UserShippingInfo
+from ..services import backfill_rollups, bump_catalog_version
+from ..utils import hash_password
+
+SEED_CHUNK_SIZE = 5000
+SEED_PASSWORD = 'password123'
+SEED_CATEGORIES = ('Noodles', 'Rice Meals', 'Drinks', 'Desserts', 'Sides')
+SEED_CITIES = ('Manila', 'Quezon City', 'Cebu', 'Davao', 'Makati')
+
+
+def _next_id(column):
+    return (db.session.query(func.max(column)).scalar() or 0) + 1
+
+
+class _ChunkedInserter:
+    """Buffers rows per table and writes them as multi-row INSERTs, parents first."""
+
+    def __init__(self, models, chunk_size=SEED_CHUNK_SIZE):
+        self.models = models
+        self.chunk_size = chunk_size
+        self.buffers = {model: [] for model in models}
+        self.counts = {model.__tablename__: 0 for model in models}
+
+    def add(self, model, row):
+        self.buffers[model].append(row)
+        if len(self.buffers[model]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        # Flush every table so child rows never land before their parents
+        for model in self.models:
+            rows = self.buffers[model]
+            if rows:
+                db.session.execute(insert(model), rows)
+                self.counts[model.__tablename__] += len(rows)
+                rows.clear()
+        db.session.commit()
+
+
+@click.command('seed')
+@click.option('--users', default=1000, show_default=True)
+@click.option('--products', default=500, show_default=True)
+@click.option('--carts', default=2000, show_default=True, help='Cart lines spread over the new users.')
+@click.option('--sales', default=50000, show_default=True, help='Sales, each with its order row.')
+@click.option('--payments', default=5000, show_default=True, help='Orders that also get a payment and shipping row.')
+@click.option('--days', default=365, show_default=True, help='Spread sales over this many past days.')
+@click.option('--random-seed', default=42, show_default=True)
+def seed(users, products, carts, sales, payments, days, random_seed):
+    """Bulk-generate synthetic data for load testing.
+
+    Rows are appended after the existing ones, so the command can be run
+    repeatedly. Every seeded account, including one admin, uses the
+    password 'password123'.
+    """
+    rng = random.Random(random_seed)
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    password_hash = hash_password(SEED_PASSWORD)  # One slow hash shared by every account
+
+    user_start = _next_id(User.user_id)
+    product_start = _next_id(Product.product_id)
+    sale_start = _next_id(Sale.sale_id)
+    order_start = _next_id(Order.order_id)
+    payment_start = _next_id(Payment.payment_id)
+    writer = _ChunkedInserter([User, Product, CartItem, Sale, Order, Payment, UserShippingInfo])
+
+    user_ids = list(range(user_start, user_start + users))
+    for user_id in user_ids:
+        writer.add(User, {
+            'user_id': user_id,
+            'first_name': 'Seed',
+            'last_name': f'User {user_id}',
+            'gender': rng.choice(('Male', 'Female', 'LGBT+')),
+            'email': f'seed{user_id}@example.com',
+            'username': f'seed_user{user_id}',
+            'password_hash': password_hash,
+            'role': 'user',
+        })
+    admin_id = user_start + users
+    writer.add(User, {
+        'user_id': admin_id, 'first_name': 'Seed', 'last_name': 'Admin',
+        'email': f'seed_admin{admin_id}@example.com', 'username': f'seed_admin{admin_id}',
+        'password_hash': password_hash, 'role': 'admin',
+    })
+
+    catalog = []
+    for product_id in range(product_start, product_start + products):
+        product = {
+            'product_id': product_id,
+            'product_name': f'Seed Product {product_id}',
+            'price': round(rng.uniform(20, 500), 2),
+            'stock': rng.randint(0, 500),
+            'category': rng.choice(SEED_CATEGORIES),
+            'image_url': None,
+        }
+        catalog.append(product)
+        writer.add(Product, product)
+    if not user_ids or not catalog:
+        writer.flush()
+        click.echo('Nothing to link: need at least one user and one product.')
+        return
+
+    cart_lines = set()
+    for _ in range(min(carts, len(user_ids) * len(catalog))):
+        while True:
+            line = (rng.choice(user_ids), rng.choice(catalog)['product_id'])
+            if line not in cart_lines:
+                break
+        cart_lines.add(line)
+        writer.add(CartItem, {'user_id': line[0], 'product_id': line[1],
+                              'quantity': rng.randint(1, 5)})
+
+    for i in range(sales):
+        user_id = rng.choice(user_ids)
+        product = rng.choice(catalog)
+        quantity = rng.randint(1, 5)
+        total = round(product['price'] * quantity, 2)
+        created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+        sale_id, order_id = sale_start + i, order_start + i
+        writer.add(Sale, {
+            'sale_id': sale_id, 'product_id': product['product_id'],
+            'username': f'seed_user{user_id}', 'product_name': product['product_name'],
+            'quantity': quantity, 'total_price': total, 'created_at': created_at,
+        })
+        writer.add(Order, {
+            'order_id': order_id, 'user_id': user_id, 'sale_id': sale_id,
+            'product_name': product['product_name'], 'price': total,
+            'category': product['category'], 'created_at': created_at,
+        })
+        if i < payments:
+            payment_id = payment_start + i
+            writer.add(Payment, {
+                'payment_id': payment_id, 'user_id': user_id, 'order_id': order_id,
+                'amount': total, 'payment_method': 'Cash on Delivery', 'status': 'completed',
+                'transaction_id': f'SEED_{payment_id}', 'created_at': created_at,
+            })
+            writer.add(UserShippingInfo, {
+                'user_id': user_id, 'payment_id': payment_id,
+                'full_name': f'Seed User {user_id}', 'address_line1': f'{i} Seed Street',
+                'city': rng.choice(SEED_CITIES), 'postal_code': f'{1000 + i % 9000}',
+                'created_at': created_at,
+            })
+    writer.flush()
+
+    # Keep the derived tables in step with the raw rows just written
+    backfill_rollups()
+    bump_catalog_version()
+    db.session.commit()
+
+    summary = ', '.join(f'{count} {table}' for table, count in writer.counts.items())
+    click.echo(f'Seeded {summary} in {time.perf_counter() - started:.1f}s.')
+    click.echo(f"Seeded accounts use the password '{SEED_PASSWORD}'; admin is seed_admin{admin_id}.")
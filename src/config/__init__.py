@@ -1,3 +1,3 @@
-from .environment import ENV, SECRET_KEY, PORT, SQLALCHEMY_DATABASE_URI, FRONTEND_URL, MAIL_SERVER, MAIL_PASSWORD, MAIL_USERNAME
+from .environment import ENV, SECRET_KEY, PORT, SQLALCHEMY_DATABASE_URI, FRONTEND_URL, MAIL_SERVER, MAIL_PASSWORD, MAIL_USERNAME, SLOW_QUERY_MS, SLOW_QUERY_LOG, SQLALCHEMY_REPLICA_URI, build_engine_options, PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE, PASSWORD_HASH_TIMEOUT, SESSION_BACKEND, SESSION_SQLITE_PATH, SESSION_REDIS_URL, RESERVATION_TTL_SECONDS, RESERVATION_SWEEP_BATCH, RATE_LIMIT_BACKEND, RATE_LIMIT_SQLITE_PATH, RATE_LIMIT_REDIS_URL, RATE_LIMIT_LOGIN_IP, RATE_LIMIT_LOGIN_ACCOUNT, RATE_LIMIT_RESET_IP, RATE_LIMIT_RESET_ACCOUNT, TRUSTED_PROXY_HOPS, PAYMENT_GATEWAY_URL, PAYMENT_PROVIDER_URLS, PAYMENT_GATEWAY_KEY, PAYMENT_WEBHOOK_SECRET, PAYMENT_POOL_SIZE, PAYMENT_TIMEOUT, PAYMENT_MAX_IN_FLIGHT, ID_WORKER_ID, ID_WORKER_RANGE, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE, JSON_BACKEND
 from .settings import load_config
-from .mail_config import mail, load_mail_config
+from .mail_config import get_mail, load_mail_config
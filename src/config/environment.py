@@ -15,6 +15,97 @@ DB_NAME = os.getenv('DB_NAME')
 DB_DIALECT = os.getenv('DB_DIALECT', "mysql+pymysql")
 SQLALCHEMY_DATABASE_URI = f"{DB_DIALECT}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
 
+# Optional read replica for reporting queries; shares the primary's credentials
+DB_REPLICA_HOST = os.getenv('DB_REPLICA_HOST')
+SQLALCHEMY_REPLICA_URI = (
+    f"{DB_DIALECT}://{DB_USER}:{DB_PASSWORD}@{DB_REPLICA_HOST}/{DB_NAME}"
+    if DB_REPLICA_HOST else None)
+
+# Connection pool tuning
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 5))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))
+# Recycle below MySQL's wait_timeout so idle connections are never stale
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+
+
+def build_engine_options(dialect):
+    """SQLAlchemy engine options for the configured pool profile."""
+    if dialect.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+    if DB_STATEMENT_TIMEOUT_MS and dialect.startswith('mysql'):
+        # Caps SELECT run time per statement on the server side
+        options['connect_args'] = {
+            'init_command': f'SET SESSION max_execution_time={DB_STATEMENT_TIMEOUT_MS}'}
+    return options
+
+# Password hashing: Werkzeug method string and the size of the hashing pool
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 16))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))
+
+# Server-side sessions: 'sqlite' (file shared by local workers), 'redis' or 'cookie'
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'sqlite')
+SESSION_SQLITE_PATH = os.getenv('SESSION_SQLITE_PATH')  # Defaults to instance/sessions.db
+SESSION_REDIS_URL = os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/0')
+
+# Cart stock holds: lifetime, and how many expired holds one sweep deletes per batch
+RESERVATION_TTL_SECONDS = int(os.getenv('RESERVATION_TTL_SECONDS', 900))
+RESERVATION_SWEEP_BATCH = int(os.getenv('RESERVATION_SWEEP_BATCH', 500))
+
+# Login and password-reset throttling: token buckets as 'burst/seconds', per client IP
+# and per username or email, kept in 'sqlite' (file shared by local workers), 'redis' or 'off'
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'sqlite')
+RATE_LIMIT_SQLITE_PATH = os.getenv('RATE_LIMIT_SQLITE_PATH')  # Defaults to instance/ratelimit.db
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', SESSION_REDIS_URL)
+RATE_LIMIT_LOGIN_IP = os.getenv('RATE_LIMIT_LOGIN_IP', '20/60')
+RATE_LIMIT_LOGIN_ACCOUNT = os.getenv('RATE_LIMIT_LOGIN_ACCOUNT', '5/60')
+RATE_LIMIT_RESET_IP = os.getenv('RATE_LIMIT_RESET_IP', '5/300')
+RATE_LIMIT_RESET_ACCOUNT = os.getenv('RATE_LIMIT_RESET_ACCOUNT', '3/900')
+
+# Reverse proxies in front of the app whose X-Forwarded-For/-Proto headers are trusted, so
+# the client address rate limits key on is the real one; 0 when clients connect directly
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 1))
+
+# Payment gateways: charges are sent to PAYMENT_GATEWAY_URL (unset keeps payments pending
+# for manual handling); PAYMENT_<PROVIDER>_URL, e.g. PAYMENT_GCASH_URL, overrides it per provider
+PAYMENT_GATEWAY_URL = os.getenv('PAYMENT_GATEWAY_URL')
+PAYMENT_PROVIDER_URLS = {key[len('PAYMENT_'):-len('_URL')]: value for key, value in os.environ.items()
+                         if key.startswith('PAYMENT_') and key.endswith('_URL') and key != 'PAYMENT_GATEWAY_URL'}
+PAYMENT_GATEWAY_KEY = os.getenv('PAYMENT_GATEWAY_KEY')
+PAYMENT_WEBHOOK_SECRET = os.getenv('PAYMENT_WEBHOOK_SECRET')
+PAYMENT_POOL_SIZE = int(os.getenv('PAYMENT_POOL_SIZE', 10))  # Connections per provider
+PAYMENT_TIMEOUT = float(os.getenv('PAYMENT_TIMEOUT', 10))
+PAYMENT_MAX_IN_FLIGHT = int(os.getenv('PAYMENT_MAX_IN_FLIGHT', 100))
+
+# Archival: closed sales, orders and payments older than ARCHIVE_AFTER_DAYS move to the
+# *_archive tables in batches of ARCHIVE_BATCH_SIZE, pausing ARCHIVE_BATCH_PAUSE seconds between them
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 1000))
+ARCHIVE_BATCH_PAUSE = float(os.getenv('ARCHIVE_BATCH_PAUSE', 0.05))
+
+# Transaction ids: each process leases a free worker id from ID_WORKER_RANGE unless
+# ID_WORKER_ID pins one; hosts sharing a database need non-overlapping ranges
+ID_WORKER_ID = os.getenv('ID_WORKER_ID')
+ID_WORKER_RANGE = os.getenv('ID_WORKER_RANGE', '0-1023')
+
+# JSON encoding: 'auto' uses orjson when installed, 'orjson' requires it, 'std' never uses it
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
+# SQL instrumentation: statements slower than this go to the slow-query log
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG')  # File path; logs to stderr when unset
+
 
 MAIL_SERVER = os.getenv('MAIL_SERVER')
 MAIL_USERNAME = os.getenv('MAIL_USERNAME')
@@ -1,6 +1,5 @@
-from flask_mail import Mail, Message
+from flask import current_app
 from . import MAIL_PASSWORD, MAIL_SERVER, MAIL_USERNAME
-mail = Mail()
 
 
 def load_mail_config(app):
@@ -12,4 +11,12 @@ def load_mail_config(app):
     app.config['MAIL_USERNAME'] = MAIL_USERNAME  # Your Gmail address
     app.config['MAIL_PASSWORD'] = MAIL_PASSWORD     # Your App Password
 
-    mail.init_app(app)
+
+def get_mail():
+    """Return the app's Flask-Mail state, importing Flask-Mail on first use."""
+    state = current_app.extensions.get('mail')
+    if state is None:
+        from flask_mail import Mail
+        Mail(current_app)
+        state = current_app.extensions['mail']
+    return state
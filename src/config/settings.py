@@ -1,25 +1,54 @@
-from . import ENV, SECRET_KEY, PORT, SQLALCHEMY_DATABASE_URI, FRONTEND_URL
+from . import ENV, SECRET_KEY, PORT, SQLALCHEMY_DATABASE_URI, FRONTEND_URL, SLOW_QUERY_MS, SLOW_QUERY_LOG, SQLALCHEMY_REPLICA_URI, build_engine_options, PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE, PASSWORD_HASH_TIMEOUT, SESSION_BACKEND, SESSION_SQLITE_PATH, SESSION_REDIS_URL, RESERVATION_TTL_SECONDS, RESERVATION_SWEEP_BATCH, RATE_LIMIT_BACKEND, RATE_LIMIT_SQLITE_PATH, RATE_LIMIT_REDIS_URL, RATE_LIMIT_LOGIN_IP, RATE_LIMIT_LOGIN_ACCOUNT, RATE_LIMIT_RESET_IP, RATE_LIMIT_RESET_ACCOUNT, TRUSTED_PROXY_HOPS, PAYMENT_GATEWAY_URL, PAYMENT_PROVIDER_URLS, PAYMENT_GATEWAY_KEY, PAYMENT_WEBHOOK_SECRET, PAYMENT_POOL_SIZE, PAYMENT_TIMEOUT, PAYMENT_MAX_IN_FLIGHT, ID_WORKER_ID, ID_WORKER_RANGE, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE, JSON_BACKEND
 from ..models import db
 
-from sqlalchemy.exc import OperationalError
-from flask_migrate import Migrate
 
-
-def load_config(app):
+def load_config(app, overrides=None):
     # GENERAL CONFIG
     app.config["ENV"] = ENV
     app.config["SECRET_KEY"] = SECRET_KEY
     app.config["PORT"] = PORT
     app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(
+        SQLALCHEMY_DATABASE_URI.split(':', 1)[0])
+    if SQLALCHEMY_REPLICA_URI:
+        app.config['SQLALCHEMY_BINDS'] = {'replica': SQLALCHEMY_REPLICA_URI}
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['FRONTEND_URL'] = FRONTEND_URL
+    app.config['SLOW_QUERY_MS'] = SLOW_QUERY_MS
+    app.config['SLOW_QUERY_LOG'] = SLOW_QUERY_LOG
+    app.config['PASSWORD_HASH_METHOD'] = PASSWORD_HASH_METHOD
+    app.config['PASSWORD_HASH_WORKERS'] = PASSWORD_HASH_WORKERS
+    app.config['PASSWORD_HASH_QUEUE'] = PASSWORD_HASH_QUEUE
+    app.config['PASSWORD_HASH_TIMEOUT'] = PASSWORD_HASH_TIMEOUT
+    app.config['SESSION_BACKEND'] = SESSION_BACKEND
+    app.config['SESSION_SQLITE_PATH'] = SESSION_SQLITE_PATH
+    app.config['SESSION_REDIS_URL'] = SESSION_REDIS_URL
+    app.config['RESERVATION_TTL_SECONDS'] = RESERVATION_TTL_SECONDS
+    app.config['RESERVATION_SWEEP_BATCH'] = RESERVATION_SWEEP_BATCH
+    app.config['RATE_LIMIT_BACKEND'] = RATE_LIMIT_BACKEND
+    app.config['RATE_LIMIT_SQLITE_PATH'] = RATE_LIMIT_SQLITE_PATH
+    app.config['RATE_LIMIT_REDIS_URL'] = RATE_LIMIT_REDIS_URL
+    app.config['RATE_LIMIT_LOGIN_IP'] = RATE_LIMIT_LOGIN_IP
+    app.config['RATE_LIMIT_LOGIN_ACCOUNT'] = RATE_LIMIT_LOGIN_ACCOUNT
+    app.config['RATE_LIMIT_RESET_IP'] = RATE_LIMIT_RESET_IP
+    app.config['RATE_LIMIT_RESET_ACCOUNT'] = RATE_LIMIT_RESET_ACCOUNT
+    app.config['TRUSTED_PROXY_HOPS'] = TRUSTED_PROXY_HOPS
+    app.config['PAYMENT_GATEWAY_URL'] = PAYMENT_GATEWAY_URL
+    app.config['PAYMENT_PROVIDER_URLS'] = PAYMENT_PROVIDER_URLS
+    app.config['PAYMENT_GATEWAY_KEY'] = PAYMENT_GATEWAY_KEY
+    app.config['PAYMENT_WEBHOOK_SECRET'] = PAYMENT_WEBHOOK_SECRET
+    app.config['PAYMENT_POOL_SIZE'] = PAYMENT_POOL_SIZE
+    app.config['PAYMENT_TIMEOUT'] = PAYMENT_TIMEOUT
+    app.config['PAYMENT_MAX_IN_FLIGHT'] = PAYMENT_MAX_IN_FLIGHT
+    app.config['ID_WORKER_ID'] = ID_WORKER_ID
+    app.config['ID_WORKER_RANGE'] = ID_WORKER_RANGE
+    app.config['ARCHIVE_AFTER_DAYS'] = ARCHIVE_AFTER_DAYS
+    app.config['ARCHIVE_BATCH_SIZE'] = ARCHIVE_BATCH_SIZE
+    app.config['ARCHIVE_BATCH_PAUSE'] = ARCHIVE_BATCH_PAUSE
+    app.config['JSON_BACKEND'] = JSON_BACKEND
+    # Tests point the app at their own database and stores
+    app.config.update(overrides or {})
 
-    migrate = Migrate(app, db)
-
-    # Initialize database
+    # Initialize database. Nothing connects here: schema work lives in
+    # `flask init-db` and `flask db upgrade`, so workers boot without MySQL.
     db.init_app(app)
-    with app.app_context():
-        try:
-            db.create_all()
-        except OperationalError as e:
-            print(f"Error creating tables: {e}")
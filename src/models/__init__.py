@@ -1,14 +1,24 @@
 from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
+from .routing_session import RoutingSession
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Import models after db definition
 # fmt: off  # disable formatting temporarily (Black)
 from .card_details import CardDetails
 from .cart_item import CartItem
+from .catalog_version import CatalogVersion
 from .order import Order
+from .order_archive import OrderArchive
 from .payment import Payment
+from .payment_archive import PaymentArchive
 from .product import Product
 from .sale import Sale
+from .sale_archive import SaleArchive
+from .sales_daily_category import SalesDailyCategory
+from .sales_daily_product import SalesDailyProduct
+from .sales_daily_user import SalesDailyUser
 from .showcase_image import ShowcaseImage
+from .stock_reservation import StockReservation
 from .user_shipping_info import UserShippingInfo
+from .user_shipping_info_archive import UserShippingInfoArchive
 from .user import User
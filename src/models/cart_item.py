@@ -3,6 +3,9 @@ from . import db
 
 class CartItem(db.Model):
     __tablename__ = 'cart_items'
+    __table_args__ = (
+        db.Index('ix_cart_items_user_id_product_id', 'user_id', 'product_id'),
+    )
     cart_item_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey(
         'users.user_id'), nullable=False)
@@ -0,0 +1,11 @@
+from . import db
+from datetime import datetime
+
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_version'
+    # One row per cached state (products, showcase); bumped on every change
+    catalog_version_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           onupdate=datetime.utcnow)
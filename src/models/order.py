@@ -6,9 +6,9 @@ class Order(db.Model):
     __tablename__ = 'orders'
     order_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey(
-        'users.user_id'), nullable=False)
+        'users.user_id'), nullable=False, index=True)
     sale_id = db.Column(db.Integer, db.ForeignKey(
-        'sales.sale_id'), nullable=False)
+        'sales.sale_id'), nullable=False, index=True)
     product_name = db.Column(db.String(255), nullable=False)
     price = db.Column(db.Float, nullable=False)
     category = db.Column(db.String(50), nullable=False)
@@ -0,0 +1,18 @@
+from . import db
+
+
+class OrderArchive(db.Model):
+    __tablename__ = 'orders_archive'
+    # Closed orders moved out of `orders` by `flask archive run`; same columns, no foreign keys
+    order_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    sale_id = db.Column(db.Integer, nullable=False)
+    product_name = db.Column(db.String(255), nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, index=True)
+
+    __table_args__ = (
+        # Order history pages walk a user's orders by id
+        db.Index('ix_orders_archive_user_id_order_id', 'user_id', 'order_id'),
+    )
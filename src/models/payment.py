@@ -8,7 +8,7 @@ class Payment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey(
         'users.user_id'), nullable=False)
     order_id = db.Column(db.Integer, db.ForeignKey(
-        'orders.order_id'), nullable=True)
+        'orders.order_id'), nullable=True, index=True)
     amount = db.Column(db.Float, nullable=False)
     payment_method = db.Column(
         db.Enum('Cash on Delivery', 'E-Wallet', 'Card'), nullable=False)
@@ -0,0 +1,18 @@
+from . import db
+
+
+class PaymentArchive(db.Model):
+    __tablename__ = 'payments_archive'
+    # Settled payments moved out of `payments` by `flask archive run`; same columns, no foreign keys
+    payment_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    order_id = db.Column(db.Integer, nullable=True, index=True)
+    amount = db.Column(db.Float, nullable=False)
+    payment_method = db.Column(
+        db.Enum('Cash on Delivery', 'E-Wallet', 'Card'), nullable=False)
+    e_wallet_provider = db.Column(db.Enum('GCASH', 'MAYA'), nullable=True)
+    card_provider = db.Column(
+        db.Enum('BDO', 'BPI', 'MetroBank'), nullable=True)
+    transaction_id = db.Column(db.String(100), unique=True)
+    status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime, index=True)
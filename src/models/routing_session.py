@@ -0,0 +1,18 @@
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the 'replica' bind for opted-in requests.
+
+    Routes opt in with the use_read_replica decorator. Without a configured
+    replica, or for any write, the primary is used as usual.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context()
+                and g.get('use_read_replica') and getattr(clause, 'is_select', False)):
+            replica = self._db.engines.get('replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
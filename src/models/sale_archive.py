@@ -0,0 +1,13 @@
+from . import db
+
+
+class SaleArchive(db.Model):
+    __tablename__ = 'sales_archive'
+    # Closed sales moved out of `sales` by `flask archive run`; same columns, no foreign keys
+    sale_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    product_id = db.Column(db.Integer, nullable=False)
+    username = db.Column(db.String(100), nullable=False, index=True)
+    product_name = db.Column(db.String(255), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    total_price = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, index=True)
@@ -0,0 +1,10 @@
+from . import db
+
+
+class SalesDailyCategory(db.Model):
+    __tablename__ = 'sales_daily_category'
+    # Rollup of sales per day and product category, maintained with every checkout
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
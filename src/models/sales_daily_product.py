@@ -0,0 +1,12 @@
+from . import db
+
+
+class SalesDailyProduct(db.Model):
+    __tablename__ = 'sales_daily_product'
+    # Rollup of sales per day and product, maintained with every checkout
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey(
+        'products.product_id'), primary_key=True)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
@@ -0,0 +1,10 @@
+from . import db
+
+
+class SalesDailyUser(db.Model):
+    __tablename__ = 'sales_daily_user'
+    # Rollup of sales per day and buyer, maintained with every checkout
+    day = db.Column(db.Date, primary_key=True)
+    username = db.Column(db.String(100), primary_key=True)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
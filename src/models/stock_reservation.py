@@ -0,0 +1,20 @@
+from . import db
+
+
+class StockReservation(db.Model):
+    __tablename__ = 'stock_reservations'
+    __table_args__ = (
+        # One hold per cart line
+        db.UniqueConstraint('user_id', 'product_id',
+                            name='uq_stock_reservations_user_id_product_id'),
+        db.Index('ix_stock_reservations_product_id_expires_at',
+                 'product_id', 'expires_at'),
+    )
+    reservation_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        'users.user_id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey(
+        'products.product_id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    # Holds past this time no longer count against stock
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -1,6 +1,6 @@
 from . import db
 from sqlalchemy.orm import validates
-from werkzeug.security import generate_password_hash, check_password_hash
+from ..utils.passwords import hash_password, verify_password, needs_rehash
 
 
 class User(db.Model):
@@ -39,10 +39,17 @@ class User(db.Model):
     def set_password(self, password):
         if not password or len(password) < 6:
             raise ValueError("Password must be at least 6 characters long")
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def rehash_password_if_needed(self, password):
+        """Upgrade an outdated hash after a successful check; returns True if changed."""
+        if not needs_rehash(self.password_hash):
+            return False
+        self.password_hash = hash_password(password)
+        return True
 
     def __repr__(self):
         return f"<User(user_id={self.user_id}, username='{self.username}', role='{self.role}')>"
@@ -8,7 +8,7 @@ class UserShippingInfo(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey(
         'users.user_id'), nullable=False)
     payment_id = db.Column(db.Integer, db.ForeignKey(
-        'payments.payment_id'), nullable=False)
+        'payments.payment_id'), nullable=False, index=True)
     full_name = db.Column(db.String(100), nullable=False)
     address_line1 = db.Column(db.String(255), nullable=False)
     address_line2 = db.Column(db.String(255), nullable=True)
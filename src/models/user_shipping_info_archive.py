@@ -0,0 +1,17 @@
+from . import db
+
+
+class UserShippingInfoArchive(db.Model):
+    __tablename__ = 'user_shipping_info_archive'
+    # Shipping rows of archived payments; same columns, no foreign keys
+    shipping_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    payment_id = db.Column(db.Integer, nullable=False, index=True)
+    full_name = db.Column(db.String(100), nullable=False)
+    address_line1 = db.Column(db.String(255), nullable=False)
+    address_line2 = db.Column(db.String(255), nullable=True)
+    city = db.Column(db.String(100), nullable=False)
+    province = db.Column(db.String(100), nullable=True)
+    postal_code = db.Column(db.String(20), nullable=False)
+    phone_number = db.Column(db.String(20), nullable=True)
+    created_at = db.Column(db.DateTime)
@@ -1,10 +1,10 @@
 from flask import Blueprint, flash, render_template, redirect, url_for, request, jsonify
 from datetime import datetime, timedelta
-from sqlalchemy import extract, and_
 from sqlalchemy.sql import func
 
-from ..utils import admin_required, set_last_visited_page
-from ..models import db, User, Sale, UserShippingInfo, CardDetails, Payment, Product, ShowcaseImage
+from ..utils import admin_required, use_read_replica, set_last_visited_page, get_page_args, wants_page, keyset_page, stream_json, stream_csv, STREAM_BATCH_SIZE, render_cached_fragment
+from ..models import db, User, Product, ShowcaseImage, SalesDailyProduct, SalesDailyUser, SalesDailyCategory
+from ..services import import_products, import_showcase_images, iter_import_rows, detect_import_format, IMPORT_FORMATS, bump_catalog_version, get_showcase_version, bump_showcase_version, load_user_info, top_rollup_totals, get_period_range, sales_report_query, serialize_sale_report, SALE_REPORT_COLUMNS, sales_summary_query, serialize_sale_summary
 
 
 admin_bp = Blueprint('admin', __name__)
@@ -21,11 +21,12 @@ def admin_dashboard():
 @admin_required
 def admin_users():
     try:
-        users = User.query.all()
+        cursor, limit = get_page_args()
+        users, next_cursor = keyset_page(User.query, User.user_id, cursor, limit)
         if not users:
             flash("No users found.", 'bg-blue-300 text-blue-700')
             return render_template('users.html', users=[])
-        return render_template('users.html', users=users)
+        return render_template('users.html', users=users, next_cursor=next_cursor)
     except Exception as e:
         print(f"Error fetching users: {str(e)}")
         flash('An error occurred while fetching users.',
@@ -42,93 +43,68 @@ def admin_products():
 
 @admin_bp.route('/getsales', methods=['GET'])
 @admin_required
+@use_read_replica
 def get_sales():
     try:
         period = request.args.get('period', 'daily').lower()
         now = datetime.utcnow()
 
-        # Base query with necessary joins
-        sales_query = db.session.query(
-            Sale.sale_id,
-            Sale.username,
-            Sale.product_id,
-            Sale.product_name,
-            Sale.quantity,
-            Sale.total_price,
-            Sale.created_at,
-            Payment.payment_method,
-            Payment.transaction_id,
-            CardDetails.card_number,
-            CardDetails.card_holder_name,
-            CardDetails.expiration_date,
-            UserShippingInfo.full_name.label('shipping_full_name'),
-            UserShippingInfo.address_line1,
-            UserShippingInfo.address_line2,
-            UserShippingInfo.city,
-            UserShippingInfo.province,
-            UserShippingInfo.postal_code,
-            UserShippingInfo.phone_number,
-        ).join(
-            Payment, Sale.sale_id == Payment.order_id, isouter=True
-        ).join(
-            CardDetails, CardDetails.user_id == Sale.username, isouter=True
-        ).join(
-            UserShippingInfo, Payment.payment_id == UserShippingInfo.payment_id, isouter=True
-        )
-
-        # Filter sales based on the period
-        if period == 'daily':
-            sales_query = sales_query.filter(
-                func.date(Sale.created_at) == func.date(now))
-        elif period == 'weekly':
-            start_of_week = now - timedelta(days=now.weekday())
-            sales_query = sales_query.filter(Sale.created_at >= start_of_week,
-                                             Sale.created_at < start_of_week + timedelta(days=7))
-        elif period == 'monthly':
-            sales_query = sales_query.filter(
-                and_(extract('year', Sale.created_at) == now.year,
-                     extract('month', Sale.created_at) == now.month))
-        elif period == 'quarterly':
-            quarter_start_month = (now.month - 1) // 3 * 3 + 1
-            start_of_quarter = datetime(now.year, quarter_start_month, 1)
-            sales_query = sales_query.filter(Sale.created_at >= start_of_quarter,
-                                             Sale.created_at < start_of_quarter + timedelta(days=90))
-        elif period == 'yearly':
-            sales_query = sales_query.filter(
-                extract('year', Sale.created_at) == now.year)
-
-        # Fetch the results
-        sales = sales_query.all()
-
-        # Prepare response data
-        sales_data = [{
-            'sale_id': sale.sale_id,
-            'username': sale.username,
-            'product_id': sale.product_id,
-            'product_name': sale.product_name,
-            'quantity': sale.quantity,
-            'total_price': sale.total_price,
-            'created_at': sale.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'payment_method': sale.payment_method or 'N/A',
-            # Masked card number
-            'card_number': sale.card_number[-4:] if sale.card_number else 'N/A',
-            'card_holder_name': sale.card_holder_name or 'N/A',
-            'expiration_date': sale.expiration_date or 'N/A',
-            'shipping_full_name': sale.shipping_full_name or 'N/A',
-            'address_line1': sale.address_line1 or 'N/A',
-            'address_line2': sale.address_line2 or 'N/A',
-            'city': sale.city or 'N/A',
-            'province': sale.province or 'N/A',
-            'postal_code': sale.postal_code or 'N/A',
-            'phone_number': sale.phone_number or 'N/A'
-        } for sale in sales]
-
-        return jsonify(sales_data), 200
+        # Filter sales based on the period; archived sales join in only when it needs them
+        start, end = get_period_range(period, now) or (None, None)
+        sales_query, sale_id = sales_report_query(start, end)
+
+        if wants_page():
+            cursor, limit = get_page_args()
+            sales, next_cursor = keyset_page(
+                sales_query, sale_id, cursor, limit)
+            return jsonify({'items': [serialize_sale_report(sale) for sale in sales],
+                            'next_cursor': next_cursor}), 200
+
+        # Full dump: stream in batches instead of materializing every row
+        sales = sales_query.order_by(sale_id).yield_per(STREAM_BATCH_SIZE)
+        return stream_json(sales, serialize_sale_report,
+                           ndjson=request.args.get('format') == 'ndjson')
     except Exception as e:
         print(f"Error fetching sales: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@admin_bp.route('/admin/sales/export', methods=['GET'])
+@admin_required
+@use_read_replica
+def export_sales():
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    try:
+        start = _parse_export_bound(request.args.get('from'))
+        end = _parse_export_bound(request.args.get('to'), inclusive_day=True)
+    except ValueError:
+        return jsonify({'error': 'from/to must be ISO dates, e.g. 2025-01-31'}), 400
+
+    sales_query, sale_id = sales_report_query(start, end)
+    # yield_per streams through a server-side cursor, one batch at a time
+    sales = sales_query.order_by(sale_id).yield_per(STREAM_BATCH_SIZE)
+
+    if export_format == 'csv':
+        response = stream_csv(sales, serialize_sale_report, SALE_REPORT_COLUMNS)
+    else:
+        response = stream_json(sales, serialize_sale_report, ndjson=True)
+    filename = f"sales_{request.args.get('from', 'start')}_{request.args.get('to', 'now')}.{export_format}"
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _parse_export_bound(value, inclusive_day=False):
+    """Parse an ISO date or datetime; a bare 'to' date covers that whole day."""
+    if not value:
+        return None
+    bound = datetime.fromisoformat(value)
+    if inclusive_day and len(value) == 10:
+        bound += timedelta(days=1)
+    return bound
+
+
 @admin_bp.route('/inventory')
 @admin_required
 def inventory():
@@ -138,24 +114,17 @@ def inventory():
 
 @admin_bp.route('/sales')
 @admin_required
+@use_read_replica
 def sales_page():
     set_last_visited_page(request.path)  # Track last visited page
     try:
         now = datetime.utcnow()
-        daily_sales = Sale.query.filter(
-            func.date(Sale.created_at) == func.date(now)
-        ).all()
-        sales_list = [{
-            'sale_id': s.sale_id,
-            'username': s.username,
-            'product_id': s.product_id,
-            'product_name': s.product_name,
-            'quantity': s.quantity,
-            'total_price': s.total_price,
-            # Format date for the template
-            'created_at': s.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        } for s in daily_sales]
-        return render_template('sales.html', sales=sales_list)
+        cursor, limit = get_page_args()
+        start, end = get_period_range('daily', now)
+        sales_query, sale_id = sales_summary_query(start, end)
+        daily_sales, next_cursor = keyset_page(sales_query, sale_id, cursor, limit)
+        sales_list = [serialize_sale_summary(sale) for sale in daily_sales]
+        return render_template('sales.html', sales=sales_list, next_cursor=next_cursor)
     except Exception as e:
         print(f'Error fetching daily sales data: {str(e)}')
         flash('Unable to load sales data. Please try again.',
@@ -176,6 +145,7 @@ def add_product():
     )
     try:
         db.session.add(new_product)
+        bump_catalog_version()
         db.session.commit()
         return jsonify({'message': 'Product added successfully'}), 200
     except Exception as e:
@@ -197,6 +167,7 @@ def update_product():
                         ) if data.get('stock') else product.stock
     product.image_url = data.get('image_url', product.image_url)
     try:
+        bump_catalog_version()
         db.session.commit()
         return jsonify({'message': 'Product updated successfully'}), 200
     except Exception as e:
@@ -213,6 +184,7 @@ def analytics():
 
 @admin_bp.route('/analytics/data', methods=['GET'])
 @admin_required
+@use_read_replica
 def analytics_data():
     try:
         # Total Users
@@ -221,33 +193,29 @@ def analytics_data():
         # Gender Distribution
         gender_stats = (
             db.session.query(User.gender, func.count(
-                User.gender).label('count'))
+                User.user_id).label('count'))
             .group_by(User.gender)
             .all()
         )
+        # Gender is optional; a None key would also break JSON key sorting
         gender_percentage = {
-            gender: (count / total_users) * 100 for gender, count in gender_stats
+            (gender or 'Unspecified'): (count / total_users) * 100 for gender, count in gender_stats
         }
+        # Sales figures come from the daily rollups, never from raw sales
         # Frequent Buyers
-        frequent_buyers = (
-            db.session.query(Sale.username, func.count(
-                Sale.sale_id).label('purchase_count'))
-            .group_by(Sale.username)
-            .order_by(func.count(Sale.sale_id).desc())
-            .limit(10)  # Optional: Limit to top 10 buyers
-            .all()
-        )
+        frequent_buyers = top_rollup_totals(
+            SalesDailyUser, 'username', 'sale_count', limit=10)
         frequent_buyers_data = [
-            {'username': buyer.username, 'count': buyer.purchase_count}
-            for buyer in frequent_buyers
+            {'username': username, 'count': count}
+            for username, count in frequent_buyers
         ]
         # Frequently Bought Items
+        item_count = func.sum(SalesDailyProduct.sale_count)
         frequent_items = (
-            db.session.query(Product.product_name, func.count(
-                Sale.product_id).label('purchase_count'))
-            .join(Sale, Product.product_id == Sale.product_id)
+            db.session.query(Product.product_name, item_count.label('purchase_count'))
+            .join(SalesDailyProduct, Product.product_id == SalesDailyProduct.product_id)
             .group_by(Product.product_name)
-            .order_by(func.count(Sale.product_id).desc())
+            .order_by(item_count.desc())
             .limit(10)  # Optional: Limit to top 10 items
             .all()
         )
@@ -256,28 +224,17 @@ def analytics_data():
             for item in frequent_items
         ]
         # Most Spent by Users
-        spending_stats = (
-            db.session.query(Sale.username, func.sum(
-                Sale.total_price).label('total_spent'))
-            .group_by(Sale.username)
-            .order_by(func.sum(Sale.total_price).desc())
-            .limit(10)  # Optional: Limit to top 10 spenders
-            .all()
-        )
+        spending_stats = top_rollup_totals(
+            SalesDailyUser, 'username', 'revenue', limit=10)
         spending_stats_data = [
-            {'username': stat.username,
-                'total_spent': round(stat.total_spent, 2)}
-            for stat in spending_stats
+            {'username': username,
+                'total_spent': round(total_spent, 2)}
+            for username, total_spent in spending_stats
         ]
 
         # Frequently Bought Items by Category
-        category_stats = (
-            db.session.query(Product.category, func.count(
-                Sale.product_id).label('purchase_count'))
-            .join(Sale, Product.product_id == Sale.product_id)
-            .group_by(Product.category)
-            .all()
-        )
+        category_stats = top_rollup_totals(
+            SalesDailyCategory, 'category', 'sale_count')
         category_data = {
             category: count for category, count in category_stats
         }
@@ -289,10 +246,9 @@ def analytics_data():
             'spending_stats': spending_stats_data,
             'category_data': category_data,
         }
-        print(f"Analytics data generated: {response_data}")
         return jsonify(response_data), 200
     except Exception as e:
-        print(f"Error in analytics_data: {str(e)}", exc_info=True)
+        print(f"Error in analytics_data: {str(e)}")
         return jsonify({'error': 'Failed to fetch analytics data', 'details': str(e)}), 500
 
 
@@ -303,24 +259,49 @@ def showcase():
         try:
             data = request.get_json()
             image_links = data.get('imageLinks', [])
-            # Add new images to the database
-            for link in image_links:
-                if not ShowcaseImage.query.filter_by(image_url=link).first():
-                    new_image = ShowcaseImage(image_url=link)
-                    db.session.add(new_image)
-            db.session.commit()
-            return jsonify({"message": "Images added successfully"}), 200
+            # Add new images with one lookup for the whole list
+            report = import_showcase_images({'image_url': link} for link in image_links)
+            return jsonify({"message": "Images added successfully", "counts": report['counts']}), 200
         except Exception as e:
             db.session.rollback()
             return jsonify({"message": f"Error adding images: {str(e)}"}), 500
     # For GET requests, render the showcase page with all images
     try:
-        images = ShowcaseImage.query.all()
-        return render_template('showcase.html', images=images)
+        image_grid = render_cached_fragment(
+            'showcase_grid', get_showcase_version(), 'fragments/showcase_grid.html',
+            lambda: {'images': ShowcaseImage.query.all()})
+        return render_template('showcase.html', image_grid=image_grid)
     except Exception as e:
         return jsonify({"message": f"Error loading showcase images: {str(e)}"}), 500
 
 
+@admin_bp.route('/admin/import/<kind>', methods=['POST'])
+@admin_required
+def bulk_import(kind):
+    importers = {'products': import_products, 'showcase': import_showcase_images}
+    if kind not in importers:
+        return jsonify({'message': f'Unknown import type: {kind}'}), 404
+    # Either a multipart upload named "file" or the raw request body
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, filename, mimetype = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, mimetype = request.stream, None, request.mimetype
+    fmt = request.args.get('format') or detect_import_format(filename, mimetype)
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'message': 'Send CSV, JSON or NDJSON, or pass ?format='}), 400
+    try:
+        report = importers[kind](iter_import_rows(stream, fmt))
+        return jsonify(report), 200
+    except (ValueError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({'message': 'Could not parse the import file', 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error importing {kind}: {e}")
+        return jsonify({'message': 'Import failed', 'error': str(e)}), 500
+
+
 @admin_bp.route('/remove_image', methods=['POST'])
 @admin_required
 def remove_image():
@@ -334,6 +315,7 @@ def remove_image():
         if not image:
             return jsonify({"message": "Image not found"}), 404
         image.removed = True
+        bump_showcase_version()
         db.session.commit()
         return jsonify({"message": "Image removed from menu successfully"}), 200
     except Exception as e:
@@ -343,53 +325,16 @@ def remove_image():
 
 @admin_bp.route('/user_info', methods=['GET'])
 @admin_required
+@use_read_replica
 def admin_user_info():
     try:
-        print("Fetching all users...")
-        users = User.query.all()  # Get all users
-
-        users_info = []  # Initialize an empty list to hold user info
-        for user in users:
-            print(f"Processing user: {user.username}")
-
-            # Fetch the user's payments
-            payments = Payment.query.filter_by(user_id=user.user_id).all()
-            print(
-                f"Payments fetched for {user.username}: {len(payments)}")
-
-            # Calculate total spent by the user through sales
-            total_spent = db.session.query(func.sum(Sale.total_price)).filter_by(
-                username=user.username).scalar() or 0.0
-            print(f"Total spent for {user.username}: {total_spent}")
-
-            # Fetch the user's shipping info
-            shipping_info = UserShippingInfo.query.filter_by(
-                user_id=user.user_id).all()
-            print(
-                f"Shipping info fetched for {user.username}: {len(shipping_info)}")
-
-            # Capture sales information, if needed
-            sales_info = Sale.query.filter_by(username=user.username).all()
-            print(f"Sales info fetched for {user.username}: {len(sales_info)}")
-
-            # Create user data structure
-            user_data = {
-                'user': user,
-                'payments': payments,
-                # Round to 2 decimal places
-                'total_spent': round(total_spent, 2),
-                'shipping_info': shipping_info,
-                'sales_info': sales_info
-            }
-
-            users_info.append(user_data)  # Append structured info to the list
-
-        # Now passing make sure that users_info is structured as expected in the template
-        return render_template('user_info.html', users_info=users_info)
+        cursor, limit = get_page_args()
+        users_info, next_cursor = load_user_info(cursor, limit)
+        return render_template('user_info.html', users_info=users_info, next_cursor=next_cursor)
 
     except Exception as e:
         # Log the error
-        print(f"Error loading user info: {e}", exc_info=True)
+        print(f"Error loading user info: {e}")
         flash("Failed to load user information.",
               'bg-red-300 text-red-700')  # Flash error message
         # Redirect if there's an error
@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, redirect, url_for, request, jsonify, flash, session
-from markupsafe import Markup
+from flask import Blueprint, render_template, redirect, url_for, request, jsonify, flash, session, g, current_app
+from sqlalchemy import or_
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime
-from ..utils import user_required, set_last_visited_page
-from ..models import db, ShowcaseImage, Product, CartItem, Order, User, Sale, CardDetails, Payment, UserShippingInfo
+from bisect import bisect_right
+from ..utils import user_required, set_last_visited_page, cached_fragment, render_cached_fragment, conditional_jsonify, get_page_args, wants_page, keyset_page, new_transaction_id
+from ..models import db, ShowcaseImage, Product, CartItem, CardDetails, Payment, UserShippingInfo
+from ..services import get_cart_summary, finalize_order, order_history_query, serialize_order, CheckoutError, reserve_stock, ReservationError, get_catalog, available_to_sell, with_stock, stock_etag, get_catalog_version, get_showcase_version, catalog_etag, search_catalog, payment_gateway, record_payment_status, normalize_status, verify_webhook, WEBHOOK_SIGNATURE_HEADER
 
 # Create the blueprint
 main_bp = Blueprint('main', __name__)
@@ -17,9 +18,12 @@ def root():
 @main_bp.route('/menu', methods=['GET'])
 def menu():
     try:
-        # Retrieve all images from the database
-        images = ShowcaseImage.query.all()
-        return render_template('menu.html', images=images)
+        # Slides are re-rendered only after the showcase changes
+        slides = render_cached_fragment(
+            'menu_slides', get_showcase_version(), 'fragments/menu_slides.html',
+            lambda: {'images': ShowcaseImage.query.filter(
+                or_(ShowcaseImage.removed.is_(False), ShowcaseImage.removed.is_(None))).all()})
+        return render_template('menu.html', slides=slides)
     except Exception as e:
         flash(f"Error loading menu: {str(e)}", 'bg-red-300 text-red-700')
         return redirect(url_for("user.login"))
@@ -30,8 +34,11 @@ def menu():
 def products():
     set_last_visited_page(request.path)  # Track last visited page
     try:
-        products = Product.query.all()
-        return render_template('products.html', products=products)
+        # The page holds no per-user markup and fills itself from /getproducts,
+        # so the whole render is shared and needs no catalog data
+        return cached_fragment(
+            'products_page', get_catalog_version(),
+            lambda: render_template('products.html'))
     except Exception as e:
         print(f'Error loading products: {str(e)}')
         flash('An error occurred while trying to fetch products.',
@@ -58,18 +65,12 @@ def contact():
 def orders():
     set_last_visited_page(request.path)  # Track last visited page
     try:
-        orders = Order.query.filter_by(user_id=session['user_id']).all()
-
-        orders_list = [{
-            'order_id': o.order_id,
-            'sale_id': o.sale_id,
-            'product_name': o.product_name,
-            'price': o.price,
-            'category': o.category,
-            'created_at': o.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-        } for o in orders]
-
-        return render_template('orders.html', orders=orders_list)
+        cursor, limit = get_page_args()
+        orders_query, order_id = order_history_query(session['user_id'], cursor)
+        orders, next_cursor = keyset_page(orders_query, order_id, cursor, limit)
+        orders_list = [serialize_order(order) for order in orders]
+
+        return render_template('orders.html', orders=orders_list, next_cursor=next_cursor)
     except Exception as e:
         print(
             f'An error occurred while fetching orders: {str(e)}')
@@ -83,23 +84,15 @@ def orders():
 def get_cart():
     set_last_visited_page(request.path)  # Track last visited page
     try:
-        cart_items = db.session.query(CartItem).filter(
-            CartItem.user_id == session['user_id']).all()
-        subtotal = 0
-        cart_list = []
-        for item in cart_items:
-            product = Product.query.get(item.product_id)
-            if product:
-                item_total = item.quantity * product.price
-                subtotal += item_total  # Calculate subtotal
-                cart_list.append({
-                    'product_id': product.product_id,
-                    'product_name': product.product_name,
-                    'price': product.price,
-                    'quantity': item.quantity,
-                    'image_url': product.image_url or '/static/default_image.png'  # Use default if no image
-                })
-        return render_template('cart.html', cart_items=cart_list, subtotal=subtotal)
+        cart = get_cart_summary(session['user_id'])
+        cart_list = [{
+            'product_id': item['product_id'],
+            'product_name': item['product_name'],
+            'price': item['price'],
+            'quantity': item['quantity'],
+            'image_url': item['image_url'] or '/static/default_image.png'  # Use default if no image
+        } for item in cart['items']]
+        return render_template('cart.html', cart_items=cart_list, subtotal=cart['subtotal'])
     except Exception as e:
         print(f"Failed to load cart: {str(e)}")
         flash("Failed to load cart. Please try again later.",
@@ -119,15 +112,18 @@ def update_cart():
             user_id=session['user_id'], product_id=product_id).first()
         if not cart_item:
             return jsonify({'message': 'Item not found in cart'}), 404
+        # Move the stock hold to the new quantity (0 releases it)
+        reserve_stock(session['user_id'], product_id, quantity)
         if quantity <= 0:
             db.session.delete(cart_item)
         else:
             cart_item.quantity = quantity
         db.session.commit()
-        cart_items = CartItem.query.filter_by(user_id=session['user_id']).all()
-        subtotal = sum(Product.query.get(item.product_id).price *
-                       item.quantity for item in cart_items)
+        subtotal = get_cart_summary(session['user_id'])['subtotal']
         return jsonify({'message': 'Cart updated successfully', 'new_subtotal': subtotal}), 200
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Failed to update cart', 'error': str(e)}), 400
@@ -142,18 +138,15 @@ def add_to_cart():
     product_id = data['product_id']
     quantity = data['quantity']
     try:
-        product = Product.query.get(product_id)
-        if not product:
+        if db.session.get(Product, product_id) is None:
             return jsonify({'message': 'Product not found'}), 404
 
-        if product.stock < quantity:
-            return jsonify({'message': f'Insufficient stock for {product.product_name}'}), 400
-
         existing_item = CartItem.query.filter_by(
             user_id=session['user_id'], product_id=product_id).first()
+        # Hold the whole line; raises when other carts have the stock
+        reserve_stock(session['user_id'], product_id,
+                      (existing_item.quantity if existing_item else 0) + quantity)
         if existing_item:
-            if product.stock < existing_item.quantity + quantity:
-                return jsonify({'message': f'Insufficient stock for {product.product_name}'}), 400
             existing_item.quantity += quantity
         else:
             new_cart_item = CartItem(
@@ -161,6 +154,9 @@ def add_to_cart():
             db.session.add(new_cart_item)
         db.session.commit()
         return jsonify({'message': 'Item added to cart'}), 200
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Failed to add item to cart', 'error': str(e)}), 400
@@ -173,8 +169,8 @@ def checkout():
         # Clear any previous card session details
         session.pop('payment_info', None)
 
-        cart_items = CartItem.query.filter_by(user_id=session['user_id']).all()
-        if not cart_items:
+        cart = get_cart_summary(session['user_id'])
+        if not cart['items']:
             return jsonify({'message': 'Cart is empty'}), 400
 
         # Prompt user to provide card details and validate
@@ -182,13 +178,13 @@ def checkout():
         order_summary = {
             'cart_items': [
                 {
-                    'product_id': item.product_id,
-                    'product_name': Product.query.get(item.product_id).product_name,
-                    'quantity': item.quantity,
-                    'price': Product.query.get(item.product_id).price
-                } for item in cart_items
+                    'product_id': item['product_id'],
+                    'product_name': item['product_name'],
+                    'quantity': item['quantity'],
+                    'price': item['price']
+                } for item in cart['items']
             ],
-            'subtotal': sum(Product.query.get(item.product_id).price * item.quantity for item in cart_items)
+            'subtotal': cart['subtotal']
         }
         return jsonify({'message': 'Checkout initialized. Please provide card details.', 'order_summary': order_summary}), 200
     except Exception as e:
@@ -206,46 +202,15 @@ def complete_order():
         # Ensure required pieces of information are present
         if not payment_id:
             return jsonify({'message': 'Missing required information to complete the order'}), 400
-        cart_items = CartItem.query.filter_by(user_id=session['user_id']).all()
-        if not cart_items:
-            return jsonify({'message': 'Cart is empty'}), 400
-        # Loop through each item in the cart
-        for item in cart_items:
-            product = Product.query.get(item.product_id)
-            if product.stock < item.quantity:
-                return jsonify({'message': f'Insufficient stock for {product.product_name}'}), 400
-
-            # Update stock in products
-            product.stock -= item.quantity
-            total_price = product.price * item.quantity
-
-            # Create a new sale record
-            new_sale = Sale(
-                product_id=product.product_id,
-                username=User.query.get(session['user_id']).username,
-                product_name=product.product_name,
-                quantity=item.quantity,
-                total_price=total_price
-            )
-            db.session.add(new_sale)
-            db.session.flush()  # Get sale_id for linking to the order
-
-            # Create a new order record
-            new_order = Order(
-                user_id=session['user_id'],
-                sale_id=new_sale.sale_id,
-                product_name=product.product_name,
-                price=total_price,
-                category=product.category
-            )
-            db.session.add(new_order)
-
-        # Clear the cart after processing
-        CartItem.query.filter_by(user_id=session['user_id']).delete()
+        # Decrement stock, record sales and orders, and clear the cart
+        finalize_order(g.current_user)
         # Commit the transaction
         db.session.commit()
 
         return jsonify({'message': 'Order completed successfully!'}), 200
+    except CheckoutError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         print(f"Error completing order: {str(e)}")
@@ -255,53 +220,42 @@ def complete_order():
 @main_bp.route('/search', methods=['GET'])
 def search_products():
     query = request.args.get('q', '').strip()
-    products = Product.query.all()
-    if query:
-        filtered_products = [
-            p for p in products if query.lower() in p.product_name.lower()]
-        highlighted_products = []
-        for product in filtered_products:
-            highlighted_name = Markup(
-                product.product_name.replace(query, f'<mark>{query}</mark>'))
-            highlighted_products.append({
-                'product_id': product.product_id,
-                'product_name': highlighted_name,
-                'price': product.price
-            })
-    else:
-        highlighted_products = [{
-            'product_id': p.product_id,
-            'product_name': p.product_name,
-            'price': p.price
-        } for p in products]
-    return render_template('search_results.html', products=highlighted_products, query=query)
+    page = request.args.get('page', 1, type=int)
+    results = search_catalog(query, page=page)
+    return render_template('search_results.html', query=query, **results)
 
 
 @main_bp.route('/getproducts', methods=['GET'])
 def get_products():
-    products = Product.query.all()
-    return jsonify([{
-        'product_id': p.product_id,
-        'product_name': p.product_name,
-        'price': p.price,
-        'stock': p.stock,
-        'category': p.category,
-        'image_url': p.image_url
-    } for p in products])
+    catalog = get_catalog()
+    if not wants_page():
+        # Live stock next to stock minus other carts' holds, for every product
+        levels = available_to_sell()
+        return conditional_jsonify(with_stock(catalog['products'], levels),
+                                   catalog_etag(catalog['version'], stock_etag(levels)))
+
+    # Keyset page over the snapshot, which is already sorted by product_id
+    cursor, limit = get_page_args()
+    products = catalog['products']
+    start = 0
+    if cursor is not None:
+        start = bisect_right(products, cursor, key=lambda p: p['product_id'])
+    page = products[start:start + limit]
+    next_cursor = page[-1]['product_id'] if start + limit < len(products) else None
+    levels = available_to_sell([p['product_id'] for p in page])
+    return conditional_jsonify({'items': with_stock(page, levels), 'next_cursor': next_cursor},
+                               catalog_etag(catalog['version'], 'page', cursor, limit,
+                                            stock_etag(levels)))
 
 
 @main_bp.route('/getproduct/<int:product_id>', methods=['GET'])
 def get_product(product_id):
-    product = Product.query.get(product_id)
+    catalog = get_catalog()
+    product = catalog['by_id'].get(product_id)
     if product:
-        return jsonify({
-            'product_id': product.product_id,
-            'product_name': product.product_name,
-            'price': product.price,
-            'stock': product.stock,
-            'category': product.category,
-            'image_url': product.image_url
-        })
+        levels = available_to_sell([product_id])
+        return conditional_jsonify(with_stock([product], levels)[0],
+                                   catalog_etag(catalog['version'], product_id, stock_etag(levels)))
     else:
         return jsonify({'message': 'Product not found'}), 404
 
@@ -330,14 +284,12 @@ def process_payment():
                 return jsonify({'message': 'Invalid Card provider'}), 400
 
         # Calculate the total amount
-        cart_items = CartItem.query.filter_by(user_id=session['user_id']).all()
-        if not cart_items:
+        cart = get_cart_summary(session['user_id'])
+        if not cart['items']:
             return jsonify({'message': 'Cart is empty'}), 400
 
-        total_amount = sum(
-            Product.query.get(item.product_id).price * item.quantity
-            for item in cart_items
-        )
+        total_amount = cart['subtotal']
+        transaction_id = new_transaction_id('TXN')
 
         # Create payment record
         payment = Payment(
@@ -346,7 +298,7 @@ def process_payment():
             payment_method=payment_method,
             e_wallet_provider=e_wallet_provider,
             card_provider=card_provider,
-            transaction_id=f"TXN_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{session['user_id']}",
+            transaction_id=transaction_id,
             status='pending'
         )
         db.session.add(payment)
@@ -358,16 +310,45 @@ def process_payment():
             'amount': total_amount
         }
 
+        payment_id = payment.payment_id
         db.session.commit()
+
+        # The charge runs in the background; its result arrives by webhook or poll.
+        # Cash on delivery has no provider and nothing to send
+        provider = e_wallet_provider or card_provider
+        if provider:
+            payment_gateway.submit(provider, transaction_id, total_amount, payment_method)
         return jsonify({
             'message': 'Payment recorded successfully.',
-            'payment_id': payment.payment_id
+            'payment_id': payment_id,
+            'status': 'pending'
         }), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Failed to record payment', 'error': str(e)}), 500
 
 
+@main_bp.route('/payments/webhook', methods=['POST'])
+def payment_webhook():
+    """Status callback from a payment gateway, signed with PAYMENT_WEBHOOK_SECRET."""
+    body = request.get_data()
+    if not verify_webhook(current_app.config.get('PAYMENT_WEBHOOK_SECRET'), body,
+                          request.headers.get(WEBHOOK_SIGNATURE_HEADER)):
+        return jsonify({'message': 'Invalid signature'}), 403
+    data = request.get_json(silent=True) or {}
+    transaction_id = data.get('transaction_id')
+    if not transaction_id:
+        return jsonify({'message': 'transaction_id is required'}), 400
+    try:
+        updated = record_payment_status(transaction_id, normalize_status(data.get('status')))
+        db.session.commit()
+        return jsonify({'message': 'Payment updated' if updated else 'No change'}), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error recording webhook for {transaction_id}: {str(e)}")
+        return jsonify({'message': 'Failed to record payment status'}), 500
+
+
 @main_bp.route('/add_card_details', methods=['POST'])
 @user_required
 def add_card_details():
@@ -438,7 +419,7 @@ def add_shipping_info():
                 amount=0.0,  # No upfront payment
                 payment_method=payment_method,
                 status='pending',
-                transaction_id=f"COD_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{session['user_id']}",
+                transaction_id=new_transaction_id('COD'),
             )
             db.session.add(payment)
             db.session.flush()  # Get payment ID
@@ -458,43 +439,8 @@ def add_shipping_info():
         )
         db.session.add(new_shipping_info)
 
-        # Fetch the user's cart items
-        cart_items = CartItem.query.filter_by(user_id=session['user_id']).all()
-        if not cart_items:
-            return jsonify({'message': 'Cart is empty'}), 400
-
-        # Process each cart item for sales and orders
-        for item in cart_items:
-            product = Product.query.get(item.product_id)
-            if product.stock < item.quantity:
-                return jsonify({'message': f'Insufficient stock for {product.product_name}'}), 400
-
-            # Update product stock
-            product.stock -= item.quantity
-
-            # Create a Sale record
-            new_sale = Sale(
-                product_id=product.product_id,
-                username=User.query.get(session['user_id']).username,
-                product_name=product.product_name,
-                quantity=item.quantity,
-                total_price=product.price * item.quantity
-            )
-            db.session.add(new_sale)
-            db.session.flush()  # Get the sale ID
-
-            # Create an Order record
-            new_order = Order(
-                user_id=session['user_id'],
-                sale_id=new_sale.sale_id,
-                product_name=product.product_name,
-                price=new_sale.total_price,  # Connecting to sale total price
-                category=product.category
-            )
-            db.session.add(new_order)
-
-        # Clear the cart after processing
-        CartItem.query.filter_by(user_id=session['user_id']).delete()
+        # Decrement stock, record sales and orders, and clear the cart
+        finalize_order(g.current_user)
 
         # Commit the transaction
         db.session.commit()
@@ -502,6 +448,10 @@ def add_shipping_info():
         # Return success response
         return jsonify({'message': 'Order completed successfully!'}), 200
 
+    except CheckoutError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
+
     except IntegrityError as e:
         db.session.rollback()
         print(f"Integrity error: {str(e)}")
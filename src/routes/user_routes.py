@@ -1,15 +1,28 @@
+import math
+
 from sqlalchemy.exc import IntegrityError
-from flask import Blueprint, request, flash, session, render_template, redirect, url_for, jsonify
+from flask import Blueprint, current_app, request, flash, session, render_template, redirect, url_for, jsonify
 from datetime import datetime
 
 
 from ..models import User, db
 from ..services import generate_token, send_reset_email
+from ..utils import PasswordHasherBusy, regenerate_session, load_current_user, rate_limited
 
 user_bp = Blueprint('user', __name__)
 
 
+def _hasher_busy(template, **context):
+    """Answer a request whose password hash could not get a worker with a 503 to retry."""
+    db.session.rollback()
+    flash('We are handling a lot of requests right now. Please try again in a moment.',
+          'bg-red-300 text-red-700')
+    retry_after = max(math.ceil(current_app.config.get('PASSWORD_HASH_TIMEOUT', 5)), 1)
+    return render_template(template, **context), 503, {'Retry-After': str(retry_after)}
+
+
 @user_bp.route('/login', methods=['GET', 'POST'])
+@rate_limited('login', 'username', 'login.html')
 def login():
     if request.method == 'POST':
         username = request.form['username']
@@ -19,6 +32,10 @@ def login():
             # Use the snake_case column name 'username'
             user = User.query.filter_by(username=username).first()
             if user and user.check_password(password):
+                # Move old hashes onto the configured work factor
+                if user.rehash_password_if_needed(password):
+                    db.session.commit()
+                regenerate_session()
                 session['user_id'] = user.user_id
                 session['role'] = user.role.lower()
                 print(
@@ -29,6 +46,8 @@ def login():
                       'bg-red-300 text-red-700')
                 print(
                     f'Invalid username or password for user: {username}')
+        except PasswordHasherBusy:
+            return _hasher_busy('login.html')
         except Exception as e:
             flash(
                 f'An error occurred during login: {str(e)}', 'bg-red-300 text-red-700')
@@ -92,6 +111,8 @@ def register():
                   'bg-green-300 text-green-700')
             return redirect(url_for('user.login'))
 
+        except PasswordHasherBusy:
+            return _hasher_busy('register.html')
         except IntegrityError as e:
             db.session.rollback()
             print(
@@ -121,7 +142,7 @@ def profile():
         flash('You need to log in first.', 'bg-red-300 text-red-700')
         return redirect(url_for('user.login'))
     # Retrieve the logged-in user's data
-    user = User.query.get(session['user_id'])
+    user = load_current_user()
     if not user:
         flash('User not found.', 'bg-red-300 text-red-700')
         return redirect(url_for('user.login'))
@@ -175,6 +196,8 @@ def profile():
             db.session.commit()
             flash('Profile updated successfully!',
                   'bg-green-300 text-green-700')
+        except PasswordHasherBusy:
+            return _hasher_busy('profile.html', user=user)
         except IntegrityError as e:
             db.session.rollback()
             if 'unique constraint' in str(e.orig).lower():
@@ -199,15 +222,19 @@ def logout():
 
 
 @user_bp.route('/forgot-password', methods=['GET', 'POST'])
+@rate_limited('reset', 'email', 'forgot_password.html')
 def forgot_password():
     if request.method == 'POST':
         email = request.form.get('email')
         user = User.query.filter_by(email=email).first()
         if user:
             token = generate_token(email)
-            send_reset_email(email, token)
-            flash('Reset link sent to your email.',
-                  'bg-green-300 text-green-700')
+            if send_reset_email(email, token):
+                flash('Reset link sent to your email.',
+                      'bg-green-300 text-green-700')
+            else:
+                flash('We could not send the reset link right now. Please try again shortly.',
+                      'bg-red-300 text-red-700')
         else:
             flash('No account found with that email.',
                   'bg-red-300 text-red-700')
@@ -227,7 +254,11 @@ def reset_password(token):
 
     if request.method == 'POST':
         password = request.form['password']
-        user.set_password(password)
+        try:
+            user.set_password(password)
+        except PasswordHasherBusy:
+            # The token is left in place, so the same link can be used again
+            return _hasher_busy('reset_password.html')
         # Invalidate the token after use
         user.reset_token = None
         user.reset_token_expires = None
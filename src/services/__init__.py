@@ -1 +1,12 @@
-from .mail import generate_token, send_reset_email
+from .mail_dispatcher import mail_dispatcher
+from .mail import generate_token, send_reset_email, queue_mail
+from .cart import get_cart_summary
+from .orders import CheckoutError, finalize_order, order_history_query, serialize_order
+from .archive import archive_closed_rows, archived_through, needs_archive, union_with_archive, sales_with_archive, orders_with_archive
+from .reservations import ReservationError, available_to_sell, reserve_stock, release_reservation, expire_reservations
+from .catalog import get_catalog, with_stock, stock_etag, get_catalog_version, bump_catalog_version, ensure_catalog_versions, get_showcase_version, bump_showcase_version, catalog_etag
+from .search import search_catalog
+from .reports import load_user_info, get_period_range, sales_report_query, serialize_sale_report, SALE_REPORT_COLUMNS, sales_summary_query, serialize_sale_summary
+from .rollups import record_sales_rollups, backfill_rollups, verify_rollups, top_rollup_totals
+from .imports import import_products, import_showcase_images, iter_import_rows, detect_import_format, IMPORT_FORMATS
+from .payment_gateway import payment_gateway, PaymentGateway, PaymentProvider, JSONGatewayProvider, PROVIDER_ADAPTERS, new_gateway_session, GatewayError, record_payment_status, normalize_status, poll_pending_payments, sign_webhook, verify_webhook, WEBHOOK_SIGNATURE_HEADER
@@ -0,0 +1,110 @@
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, union_all
+from sqlalchemy.sql import func
+
+from ..models import db, Sale, Order, Payment, UserShippingInfo, SaleArchive, OrderArchive, PaymentArchive, UserShippingInfoArchive
+
+
+def archived_through(archive):
+    """Newest created_at in an archive table, or None while it is empty. One index lookup."""
+    return db.session.query(func.max(archive.created_at)).scalar()
+
+
+def needs_archive(archive, start=None):
+    """Whether rows created at or after start can be in the archive; None means all time."""
+    newest = archived_through(archive)
+    return newest is not None and (start is None or start <= newest)
+
+
+def union_with_archive(hot, archived, key):
+    """Combine a hot and an archive query selecting the same columns.
+
+    Returns (query, key column) so callers can page and order the union
+    the same way they would the hot query alone.
+    """
+    combined = union_all(hot.statement, archived.statement).subquery()
+    return db.session.query(*combined.c), combined.c[key]
+
+
+def _with_archive(model, archive, name):
+    if not needs_archive(archive):
+        return model.__table__
+    names = [column.name for column in model.__table__.columns]
+    return union_all(
+        select(*[model.__table__.c[column] for column in names]),
+        select(*[archive.__table__.c[column] for column in names]),
+    ).subquery(name)
+
+
+def sales_with_archive():
+    """Every sale, hot or archived, as a selectable with the sales table's columns."""
+    return _with_archive(Sale, SaleArchive, 'all_sales')
+
+
+def orders_with_archive():
+    """Every order, hot or archived, as a selectable with the orders table's columns."""
+    return _with_archive(Order, OrderArchive, 'all_orders')
+
+
+def _copy_and_delete(model, archive, condition):
+    names = [column.name for column in model.__table__.columns]
+    db.session.execute(archive.__table__.insert().from_select(
+        names, select(*[model.__table__.c[name] for name in names]).where(condition)))
+    db.session.execute(model.__table__.delete().where(condition))
+
+
+def _archive_steps(cutoff):
+    # Rows referenced from a hot table stay until the referencing row has
+    # gone, so payments leave first, then orders, then sales
+    return (
+        (Payment, PaymentArchive, Payment.payment_id,
+         (Payment.created_at < cutoff, Payment.status != 'pending')),
+        (Order, OrderArchive, Order.order_id,
+         (Order.created_at < cutoff,
+          ~select(Payment.payment_id).where(Payment.order_id == Order.order_id).exists())),
+        (Sale, SaleArchive, Sale.sale_id,
+         (Sale.created_at < cutoff,
+          ~select(Order.order_id).where(Order.sale_id == Sale.sale_id).exists())),
+    )
+
+
+def archive_closed_rows(older_than_days=None, batch_size=None, pause=0.0):
+    """Move closed sales, orders and payments past the horizon into the archive tables.
+
+    Each batch is copied and deleted in its own short transaction, so
+    checkouts are never blocked for long and readers see a row in exactly
+    one of the two tables. Pending payments, and orders or sales still
+    referenced from the hot tables, are left in place. Returns the number
+    of rows moved per archive table.
+    """
+    config = current_app.config
+    if older_than_days is None:
+        older_than_days = config['ARCHIVE_AFTER_DAYS']
+    batch_size = batch_size or config['ARCHIVE_BATCH_SIZE']
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    moved = {}
+    for model, archive, key, conditions in _archive_steps(cutoff):
+        moved[archive.__tablename__] = 0
+        last_id = 0
+        while True:
+            # Walk the primary key so rows that have to stay are not read twice
+            ids = [row_id for (row_id,) in db.session.query(key).filter(
+                key > last_id, *conditions).order_by(key).limit(batch_size)]
+            if not ids:
+                break
+            if model is Payment:
+                _copy_and_delete(UserShippingInfo, UserShippingInfoArchive,
+                                 UserShippingInfo.payment_id.in_(ids))
+            _copy_and_delete(model, archive, key.in_(ids))
+            db.session.commit()
+            moved[archive.__tablename__] += len(ids)
+            last_id = ids[-1]
+            if len(ids) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    return moved
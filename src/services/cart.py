@@ -0,0 +1,35 @@
+from ..models import db, CartItem, Product
+
+
+def get_cart_summary(user_id):
+    """Load a user's cart joined to its products and price every line."""
+    rows = db.session.query(
+        CartItem.product_id,
+        CartItem.quantity,
+        Product.product_name,
+        Product.price,
+        Product.stock,
+        Product.category,
+        Product.image_url,
+    ).join(
+        Product, CartItem.product_id == Product.product_id
+    ).filter(
+        CartItem.user_id == user_id
+    ).order_by(CartItem.cart_item_id).all()
+
+    items = []
+    subtotal = 0
+    for row in rows:
+        line_total = row.price * row.quantity
+        subtotal += line_total
+        items.append({
+            'product_id': row.product_id,
+            'product_name': row.product_name,
+            'price': row.price,
+            'quantity': row.quantity,
+            'stock': row.stock,
+            'category': row.category,
+            'image_url': row.image_url,
+            'line_total': line_total
+        })
+    return {'items': items, 'subtotal': subtotal}
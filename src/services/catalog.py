@@ -0,0 +1,111 @@
+import threading
+import zlib
+
+from sqlalchemy import update
+
+from ..models import db, CatalogVersion, Product
+
+CATALOG_VERSION_ID = 1
+SHOWCASE_VERSION_ID = 2
+
+# Per-worker copy of the product list, replaced whenever the version moves.
+# Stock is not part of it: checkouts change stock constantly, so it is read live
+_snapshot = {'version': None, 'products': [], 'by_id': {}}
+_snapshot_lock = threading.Lock()
+
+
+def get_catalog_version(version_id=CATALOG_VERSION_ID):
+    return db.session.query(CatalogVersion.version).filter(
+        CatalogVersion.catalog_version_id == version_id).scalar() or 0
+
+
+def bump_catalog_version(version_id=CATALOG_VERSION_ID):
+    """Mark the catalog as changed. Call inside the transaction that writes products.
+
+    Only admin edits to product data need this; stock is read live.
+    """
+    result = db.session.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.catalog_version_id == version_id)
+        .values(version=CatalogVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        raise RuntimeError(
+            'catalog_version is not seeded; run `flask init-db` or `flask db upgrade`')
+
+
+def ensure_catalog_versions():
+    """Create the version rows that are missing. Run once from `flask init-db`."""
+    existing = {version_id for (version_id,) in db.session.query(
+        CatalogVersion.catalog_version_id)}
+    for version_id in (CATALOG_VERSION_ID, SHOWCASE_VERSION_ID):
+        if version_id not in existing:
+            db.session.add(CatalogVersion(catalog_version_id=version_id, version=0))
+
+
+def get_showcase_version():
+    return get_catalog_version(SHOWCASE_VERSION_ID)
+
+
+def bump_showcase_version():
+    """Mark the showcase images as changed, inside the writing transaction."""
+    bump_catalog_version(SHOWCASE_VERSION_ID)
+
+
+def get_catalog():
+    """Return the product snapshot for the current catalog version.
+
+    Costs one primary-key lookup per call; the product table is only read
+    again after an admin write has bumped the version. Pair the products
+    with available_to_sell() for anything that shows stock.
+    """
+    # Read the version before the products so a concurrent write can only
+    # make the snapshot newer than its label, never older
+    global _snapshot
+    version = get_catalog_version()
+    snapshot = _snapshot
+    if snapshot['version'] == version:
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot['version'] == version:
+            return _snapshot
+        rows = db.session.query(
+            Product.product_id,
+            Product.product_name,
+            Product.price,
+            Product.category,
+            Product.image_url,
+        ).order_by(Product.product_id).all()
+        products = [{
+            'product_id': row.product_id,
+            'product_name': row.product_name,
+            'price': row.price,
+            'category': row.category,
+            'image_url': row.image_url
+        } for row in rows]
+        # Swap in a new dict so lock-free readers never see a half-built snapshot
+        _snapshot = {
+            'version': version,
+            'products': products,
+            'by_id': {p['product_id']: p for p in products},
+        }
+        return _snapshot
+
+
+def with_stock(products, levels):
+    """Copies of snapshot products carrying their live stock and available-to-sell.
+
+    levels is an available_to_sell() result.
+    """
+    missing = {'stock': 0, 'available': 0}
+    return [{**product, **levels.get(product['product_id'], missing)} for product in products]
+
+
+def stock_etag(levels):
+    """Short digest of an available_to_sell() result, so ETags move with stock and holds."""
+    return format(zlib.crc32(repr(sorted(levels.items())).encode()), 'x')
+
+
+def catalog_etag(version, *parts):
+    return '-'.join(['catalog', str(version)] + [str(p) for p in parts])
@@ -0,0 +1,223 @@
+import csv
+import io
+import json
+import math
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..models import db, Product, ShowcaseImage
+from .catalog import bump_catalog_version, bump_showcase_version
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_FORMATS = ('csv', 'json', 'ndjson')
+
+
+def detect_import_format(filename=None, mimetype=None):
+    """Guess csv, json or ndjson from a file name or content type."""
+    name = (filename or '').lower()
+    mimetype = (mimetype or '').lower()
+    if name.endswith('.csv') or 'csv' in mimetype:
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in mimetype:
+        return 'ndjson'
+    if name.endswith('.json') or 'json' in mimetype:
+        return 'json'
+    return None
+
+
+def iter_import_rows(stream, fmt):
+    """Yield raw rows from a binary stream.
+
+    CSV and NDJSON are read incrementally. A JSON document must be an array
+    (or an object with an "items" array) and is parsed in one go.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    elif fmt == 'ndjson':
+        for line in io.TextIOWrapper(stream, encoding='utf-8'):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield line  # Reported as an invalid row
+    elif fmt == 'json':
+        data = json.load(stream)
+        if isinstance(data, dict):
+            data = data.get('items', [])
+        yield from data
+    else:
+        raise ValueError(f'Unsupported import format: {fmt}')
+
+
+def _text(raw, column, errors, required=True):
+    field = column.key
+    value = raw.get(field)
+    value = str(value).strip() if value is not None else ''
+    max_length = column.type.length
+    if not value:
+        if required:
+            errors.append(f'{field} is required')
+        return None
+    if max_length and len(value) > max_length:
+        errors.append(f'{field} is longer than {max_length} characters')
+    return value
+
+
+def _number(raw, field, cast, errors):
+    # Parsed as a float first, so '3.0' is a valid stock and 3.5 is not silently truncated
+    try:
+        number = float(raw.get(field))
+    except (TypeError, ValueError):
+        errors.append(f'{field} must be a number')
+        return None
+    if not math.isfinite(number):
+        errors.append(f'{field} must be a finite number')
+        return None
+    if cast is int and not number.is_integer():
+        errors.append(f'{field} must be a whole number')
+        return None
+    value = cast(number)
+    if value < 0:
+        errors.append(f'{field} cannot be negative')
+    return value
+
+
+def _clean_product(raw):
+    errors = []
+    row = {
+        'product_name': _text(raw, Product.product_name, errors),
+        'price': _number(raw, 'price', float, errors),
+        'stock': _number(raw, 'stock', int, errors),
+        'category': _text(raw, Product.category, errors),
+    }
+    # Only overwrite an existing image when the file provides the column
+    if 'image_url' in raw:
+        row['image_url'] = _text(raw, Product.image_url, errors, required=False)
+    return row, errors
+
+
+def _clean_showcase_image(raw):
+    errors = []
+    return {'image_url': _text(raw, ShowcaseImage.image_url, errors)}, errors
+
+
+def _flush_products(batch):
+    names = [row['product_name'] for _, row in batch]
+    existing = {
+        current.product_name: current for current in db.session.query(
+            Product.product_id, Product.product_name, Product.price,
+            Product.stock, Product.category, Product.image_url
+        ).filter(Product.product_name.in_(names))
+    }
+    inserts, updates, statuses = [], [], []
+    for _, row in batch:
+        current = existing.get(row['product_name'])
+        if current is None:
+            inserts.append({'image_url': None, **row})
+            statuses.append('created')
+        elif any(getattr(current, field) != value for field, value in row.items()):
+            updates.append({'product_id': current.product_id, **row})
+            statuses.append('updated')
+        else:
+            statuses.append('unchanged')
+
+    if inserts:
+        db.session.execute(insert(Product), inserts)
+    if updates:
+        db.session.execute(update(Product), updates)
+    if inserts or updates:
+        bump_catalog_version()
+    return statuses
+
+
+def _flush_showcase_images(batch):
+    urls = [row['image_url'] for _, row in batch]
+    existing = {
+        current.image_url: current for current in db.session.query(
+            ShowcaseImage.showcase_image_id, ShowcaseImage.image_url, ShowcaseImage.removed
+        ).filter(ShowcaseImage.image_url.in_(urls))
+    }
+    inserts, restores, statuses = [], [], []
+    for _, row in batch:
+        current = existing.get(row['image_url'])
+        if current is None:
+            inserts.append({'image_url': row['image_url'], 'removed': False})
+            statuses.append('created')
+        elif current.removed:
+            restores.append({'showcase_image_id': current.showcase_image_id, 'removed': False})
+            statuses.append('restored')
+        else:
+            statuses.append('unchanged')
+
+    if inserts:
+        db.session.execute(insert(ShowcaseImage), inserts)
+    if restores:
+        db.session.execute(update(ShowcaseImage), restores)
+    if inserts or restores:
+        bump_showcase_version()
+    return statuses
+
+
+def _run_import(rows, key, clean, flush, batch_size):
+    """Validate rows, drop repeats of a key, and upsert in committed batches."""
+    report = {'counts': {}, 'rows': []}
+    seen = set()
+    batch = []
+
+    def record(line, key_value, status, errors=None):
+        report['counts'][status] = report['counts'].get(status, 0) + 1
+        entry = {'row': line, key: key_value, 'status': status}
+        if errors:
+            entry['errors'] = errors
+        report['rows'].append(entry)
+
+    def flush_batch():
+        try:
+            statuses = flush(batch)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"Import batch failed: {e}")
+            statuses = ['failed'] * len(batch)
+        for (line, row), status in zip(batch, statuses):
+            record(line, row[key], status,
+                   ['Batch could not be saved'] if status == 'failed' else None)
+        batch.clear()
+
+    for line, raw in enumerate(rows, start=1):
+        if not isinstance(raw, dict):
+            record(line, None, 'invalid', ['Row is not an object'])
+            continue
+        row, errors = clean(raw)
+        if errors:
+            record(line, row.get(key), 'invalid', errors)
+            continue
+        if row[key] in seen:
+            record(line, row[key], 'duplicate', [f'{key} already appeared earlier in the file'])
+            continue
+        seen.add(row[key])
+        batch.append((line, row))
+        if len(batch) >= batch_size:
+            flush_batch()
+    if batch:
+        flush_batch()
+    report['rows'].sort(key=lambda entry: entry['row'])
+    return report
+
+
+def import_products(rows, batch_size=IMPORT_BATCH_SIZE):
+    """Upsert products by product_name and return a per-row report.
+
+    Each batch costs one lookup, one multi-row INSERT and one executemany
+    UPDATE, and is committed on its own; a failed batch is rolled back and
+    its rows reported as failed.
+    """
+    return _run_import(rows, 'product_name', _clean_product,
+                       _flush_products, batch_size)
+
+
+def import_showcase_images(rows, batch_size=IMPORT_BATCH_SIZE):
+    """Add showcase images by image_url, restoring removed ones, and return a per-row report."""
+    return _run_import(rows, 'image_url', _clean_showcase_image,
+                       _flush_showcase_images, batch_size)
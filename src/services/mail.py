@@ -1,9 +1,9 @@
-from flask_mail import Message
 import uuid
 from datetime import datetime, timedelta
 
-from ..config import mail, SECRET_KEY
+from ..config import SECRET_KEY, get_mail
 from ..models import User, db
+from .mail_dispatcher import mail_dispatcher
 
 from flask import current_app
 
@@ -20,10 +20,21 @@ def generate_token(email):
     return token
 
 
+def queue_mail(subject, recipients, body, html=None):
+    """Hand a message to the background dispatcher; False if the queue is full."""
+    from flask_mail import Message  # Imported lazily to keep app start-up light
+    # Message falls back to the Mail state's default sender, which only
+    # exists once Flask-Mail is set up on this app
+    get_mail()
+    msg = Message(subject,
+                  sender=current_app.config['MAIL_USERNAME'],
+                  recipients=recipients)
+    msg.body = body
+    msg.html = html
+    return mail_dispatcher.enqueue(msg)
+
+
 def send_reset_email(to_email, token):
     link = f"{current_app.config.get('FRONTEND_URL')}/reset-password/{token}"
-    msg = Message("Password Reset Request",
-                  sender=current_app.config['MAIL_USERNAME'],
-                  recipients=[to_email])
-    msg.body = f"Click the link to reset your password: {link}"
-    mail.send(msg)
+    return queue_mail("Password Reset Request", [to_email],
+                      f"Click the link to reset your password: {link}")
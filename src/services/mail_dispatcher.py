@@ -0,0 +1,144 @@
+import atexit
+import os
+import queue
+import smtplib
+import threading
+import time
+
+from ..config import get_mail
+
+
+def is_transient_mail_error(error):
+    """Whether a failed send may succeed later: a dropped or refused connection, or a 4xx reply."""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # smtplib's other errors subclass OSError but are protocol or usage errors
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class MailDispatcher:
+    """Sends queued Flask-Mail messages from a background thread.
+
+    Requests only pay for a queue put. The worker drains bursts into
+    batches, sends each batch over one SMTP connection and keeps that
+    connection open until the queue has been idle for MAIL_IDLE_TIMEOUT
+    seconds. Transient failures reconnect and retry with exponential
+    backoff; refused recipients and other 5xx replies are not retried.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MAIL_QUEUE_SIZE', 1000)
+        app.config.setdefault('MAIL_BATCH_SIZE', 50)
+        app.config.setdefault('MAIL_SEND_RETRIES', 3)
+        app.config.setdefault('MAIL_RETRY_BACKOFF', 1.0)
+        app.config.setdefault('MAIL_IDLE_TIMEOUT', 30)
+        self.app = app
+        self._queue = queue.Queue(maxsize=app.config['MAIL_QUEUE_SIZE'])
+        app.extensions['mail_dispatcher'] = self
+        # flush() reads the current queue, so one hook serves every app set up later
+        if not self._atexit_registered:
+            atexit.register(self.flush)
+            self._atexit_registered = True
+
+    def enqueue(self, message):
+        """Queue a message for delivery. Returns False when the queue is full."""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            print(f"Mail queue full, dropping message: {message.subject}")
+            return False
+
+    def flush(self, timeout=10):
+        """Wait until every queued message has been handled, or timeout passes."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return self._queue.unfinished_tasks == 0
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so gunicorn workers start their own
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='mail-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        config = self.app.config
+        with self.app.app_context():
+            connection = None
+            while True:
+                try:
+                    message = self._queue.get(timeout=config['MAIL_IDLE_TIMEOUT'])
+                except queue.Empty:
+                    connection = self._close(connection)
+                    continue
+                batch = [message]
+                while len(batch) < config['MAIL_BATCH_SIZE']:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                connection = self._send_batch(connection, batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _send_batch(self, connection, batch):
+        """Send a batch over one connection and return it, or None once it is closed.
+
+        Transient failures reconnect and retry the message with exponential
+        backoff; permanent ones drop the message and keep the connection.
+        """
+        config = self.app.config
+        for index, message in enumerate(batch):
+            for attempt in range(config['MAIL_SEND_RETRIES'] + 1):
+                try:
+                    if connection is None:
+                        connection = get_mail().connect().__enter__()
+                    connection.send(message)
+                    break
+                except Exception as e:
+                    if not is_transient_mail_error(e):
+                        print(f"Failed to send mail '{message.subject}' to {message.recipients}: {e}")
+                        break
+                    connection = self._close(connection)
+                    if attempt == config['MAIL_SEND_RETRIES']:
+                        print(f"Giving up on mail '{message.subject}' to {message.recipients}: {e}")
+                        break
+                    time.sleep(config['MAIL_RETRY_BACKOFF'] * 2 ** attempt)
+            if connection is None and index + 1 < len(batch):
+                # The server stayed unreachable through every retry; do not
+                # wait out the backoff again for each message behind this one
+                print(f"Mail server unavailable, dropping {len(batch) - index - 1} queued messages")
+                return None
+        return connection
+
+    def _close(self, connection):
+        if connection is not None:
+            try:
+                connection.__exit__(None, None, None)
+            except (smtplib.SMTPException, OSError):
+                pass
+        return None
+
+
+mail_dispatcher = MailDispatcher()
@@ -0,0 +1,150 @@
+from datetime import datetime
+
+from sqlalchemy import update, case, func
+
+from ..models import db, Product, Order, OrderArchive, Sale, CartItem, StockReservation
+from .cart import get_cart_summary
+from .rollups import record_sales_rollups
+from .reservations import held_by_others
+from .archive import union_with_archive
+from ..utils import format_datetime, select_columns, row_serializer
+
+
+class CheckoutError(Exception):
+    """Raised when a cart cannot be turned into an order."""
+
+
+ORDER_HISTORY_FIELDS = (
+    ('order_id', Order.order_id, None),
+    ('sale_id', Order.sale_id, None),
+    ('product_name', Order.product_name, None),
+    ('price', Order.price, None),
+    ('category', Order.category, None),
+    ('created_at', Order.created_at, format_datetime),
+)
+serialize_order = row_serializer(ORDER_HISTORY_FIELDS)
+
+
+ARCHIVED_ORDER_HISTORY_FIELDS = tuple(
+    (key, getattr(OrderArchive, key), transform) for key, _, transform in ORDER_HISTORY_FIELDS)
+
+
+def order_history_query(user_id, after=None):
+    """A user's orders as row tuples, ready for keyset_page and serialize_order.
+
+    Returns (query, order_id column). Archived orders are only unioned in
+    while the user has some with an id past the after cursor, which one
+    index probe answers.
+    """
+    query = db.session.query(*select_columns(ORDER_HISTORY_FIELDS)).filter(
+        Order.user_id == user_id)
+    has_archived = db.session.query(OrderArchive.order_id).filter(
+        OrderArchive.user_id == user_id, OrderArchive.order_id > (after or 0)
+    ).limit(1).scalar() is not None
+    if not has_archived:
+        return query, Order.order_id
+    archived = db.session.query(*select_columns(ARCHIVED_ORDER_HISTORY_FIELDS)).filter(
+        OrderArchive.user_id == user_id)
+    return union_with_archive(query, archived, 'order_id')
+
+
+def _insert_sales(rows):
+    """Insert sale rows in one multi-row INSERT and return their new ids, in the order of rows.
+
+    Where the database has INSERT ... RETURNING (SQLite, MariaDB,
+    PostgreSQL) the ids come back with the statement. MySQL has no
+    RETURNING, so the rows are read back in the same transaction: this
+    user's sales above the highest id seen before the insert. Either way
+    the row order is not promised, so ids are matched back by product and
+    quantity; rows sharing both are identical, so any pairing between
+    them is right.
+    """
+    table = Sale.__table__
+    if db.session.get_bind().dialect.insert_returning:
+        inserted_rows = db.session.execute(table.insert().values(rows).returning(
+            table.c.sale_id, table.c.product_id, table.c.quantity))
+    else:
+        # Auto-increment ids only grow, so everything this insert writes is above last_id
+        last_id = db.session.query(func.coalesce(func.max(Sale.sale_id), 0)).scalar()
+        db.session.execute(table.insert().values(rows))
+        inserted_rows = db.session.query(Sale.sale_id, Sale.product_id, Sale.quantity).filter(
+            Sale.sale_id > last_id, Sale.username == rows[0]['username']
+        ).order_by(Sale.sale_id).limit(len(rows))
+    inserted = {}
+    for sale_id, product_id, quantity in inserted_rows:
+        inserted.setdefault((product_id, quantity), []).append(sale_id)
+    return [inserted[(row['product_id'], row['quantity'])].pop() for row in rows]
+
+
+def finalize_order(user):
+    """Convert a user's cart into sales and orders inside the current transaction.
+
+    Stock is decremented with a single conditional UPDATE over the cart's
+    products, so two concurrent checkouts cannot both take the last unit.
+    Units held by other carts are off limits; the user's own holds are
+    converted into the sale and released.
+    The caller owns the transaction: commit on success, roll back on
+    CheckoutError or any other exception.
+    """
+    user_id = user.user_id
+    username = user.username
+    cart = get_cart_summary(user_id)
+    if not cart['items']:
+        raise CheckoutError('Cart is empty')
+
+    # Merge duplicate lines and sort so every checkout locks rows in the same order
+    quantities = {}
+    for item in cart['items']:
+        quantities[item['product_id']] = quantities.get(
+            item['product_id'], 0) + item['quantity']
+    product_ids = sorted(quantities)
+    requested = case(quantities, value=Product.product_id)
+    now = datetime.utcnow()
+    available = Product.stock - held_by_others(user_id, now)
+
+    result = db.session.execute(
+        update(Product)
+        .where(Product.product_id.in_(product_ids), available >= requested)
+        .values(stock=Product.stock - requested)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(product_ids):
+        short = db.session.query(Product.product_name).filter(
+            Product.product_id.in_(product_ids),
+            available < requested
+        ).order_by(Product.product_id).first()
+        name = short.product_name if short else 'one or more items'
+        raise CheckoutError(f'Insufficient stock for {name}')
+
+    sale_ids = _insert_sales([{
+        'product_id': item['product_id'],
+        'username': username,
+        'product_name': item['product_name'],
+        'quantity': item['quantity'],
+        'total_price': item['line_total'],
+        'created_at': now
+    } for item in cart['items']])
+    # Every order row goes out in one multi-row INSERT
+    db.session.execute(Order.__table__.insert().values([{
+        'user_id': user_id,
+        'sale_id': sale_id,
+        'product_name': item['product_name'],
+        'price': item['line_total'],
+        'category': item['category'],
+        'created_at': now
+    } for item, sale_id in zip(cart['items'], sale_ids)]))
+
+    # Keep the analytics rollups in step with the sales just written
+    record_sales_rollups(now.date(), [{
+        'product_id': item['product_id'],
+        'username': username,
+        'category': item['category'],
+        'quantity': item['quantity'],
+        'total_price': item['line_total']
+    } for item in cart['items']])
+
+    # Clear the cart and the holds it has just used up
+    CartItem.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    StockReservation.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    db.session.flush()
+    return cart
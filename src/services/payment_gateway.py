@@ -0,0 +1,275 @@
+import abc
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from ..models import db, Payment
+
+PAYMENT_PROVIDERS = ('GCASH', 'MAYA', 'BDO', 'BPI', 'MetroBank')
+WEBHOOK_SIGNATURE_HEADER = 'X-Payment-Signature'
+
+# Gateway wording -> Payment.status
+_STATUS_MAP = {
+    'completed': 'completed', 'succeeded': 'completed', 'paid': 'completed',
+    'failed': 'failed', 'declined': 'failed', 'cancelled': 'failed', 'expired': 'failed',
+}
+
+
+class GatewayError(Exception):
+    """Raised when a gateway answers with something other than a usable charge."""
+
+
+def normalize_status(status):
+    return _STATUS_MAP.get(str(status).lower(), 'pending')
+
+
+def sign_webhook(secret, body):
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_webhook(secret, body, signature):
+    return bool(secret and signature) and hmac.compare_digest(sign_webhook(secret, body), signature)
+
+
+def new_gateway_session(size=10, timeout=10):
+    """An aiohttp.ClientSession keeping up to size keep-alive connections open.
+
+    Every request is bounded by timeout seconds, waiting for a free
+    connection included. Must be used and closed on a single event loop.
+    """
+    import aiohttp  # Imported lazily; only processes that talk to a gateway need it
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=size),
+        timeout=aiohttp.ClientTimeout(total=timeout))
+
+
+class PaymentProvider(abc.ABC):
+    """Adapter between a Payment and one provider's API.
+
+    Subclass and list the class in PROVIDER_ADAPTERS to speak a provider's
+    own protocol. Both methods are given the provider's aiohttp session
+    and return a Payment.status value.
+    """
+
+    def __init__(self, name, base_url, api_key=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+
+    @abc.abstractmethod
+    async def charge(self, session, charge):
+        """Submit a charge dict (transaction_id, amount, currency, method)."""
+
+    @abc.abstractmethod
+    async def fetch_status(self, session, transaction_id):
+        """Look up the current status of an earlier charge."""
+
+
+class JSONGatewayProvider(PaymentProvider):
+    """Generic JSON API: POST /charges and GET /charges/<transaction_id>.
+
+    The transaction_id doubles as the idempotency key, so a charge retried
+    after a dropped connection is not taken twice.
+    """
+
+    def _headers(self, transaction_id=None):
+        headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+        if transaction_id:
+            headers['Idempotency-Key'] = transaction_id
+        return headers
+
+    async def _body(self, response, action):
+        try:
+            body = await response.json(content_type=None)
+        except ValueError:
+            body = None
+        if response.status >= 400 or not isinstance(body, dict):
+            raise GatewayError(f'{self.name} {action} returned HTTP {response.status}')
+        return body
+
+    async def charge(self, session, charge):
+        async with session.post(
+                f'{self.base_url}/charges', json={**charge, 'provider': self.name},
+                headers=self._headers(charge['transaction_id'])) as response:
+            body = await self._body(response, 'charge')
+        return normalize_status(body.get('status'))
+
+    async def fetch_status(self, session, transaction_id):
+        async with session.get(f'{self.base_url}/charges/{transaction_id}',
+                               headers=self._headers()) as response:
+            if response.status == 404:
+                return 'pending'
+            body = await self._body(response, 'status')
+        return normalize_status(body.get('status'))
+
+
+# Provider name -> adapter class; every provider speaks the generic API until replaced
+PROVIDER_ADAPTERS = {name: JSONGatewayProvider for name in PAYMENT_PROVIDERS}
+
+
+def record_payment_status(transaction_id, status):
+    """Move a pending payment to a final status; returns whether a row changed.
+
+    Only pending rows are touched, so a webhook and a poll reporting the
+    same result are harmless. Runs in the caller's transaction.
+    """
+    if status == 'pending':
+        return False
+    result = db.session.execute(
+        update(Payment)
+        .where(Payment.transaction_id == transaction_id, Payment.status == 'pending')
+        .values(status=status)
+        .execution_options(synchronize_session=False))
+    return result.rowcount > 0
+
+
+class PaymentGateway:
+    """Submits charges from a background event loop so requests never wait on a provider.
+
+    Each provider gets its own aiohttp session and connection pool. At most
+    PAYMENT_MAX_IN_FLIGHT charges run at once per worker; past that,
+    submit() declines and the payment stays pending for `flask payments
+    poll`. Final statuses arrive by webhook, or by polling.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._sessions = {}
+        self._adapters = {}
+        self._in_flight = None
+        self._db_executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['payment_gateway'] = self
+
+    @property
+    def enabled(self):
+        return bool(self.app and self.app.config.get('PAYMENT_GATEWAY_URL'))
+
+    def provider_url(self, provider):
+        config = self.app.config
+        return config['PAYMENT_PROVIDER_URLS'].get(provider.upper()) or config['PAYMENT_GATEWAY_URL']
+
+    def submit(self, provider, transaction_id, amount, method):
+        """Start charging a committed pending payment. Returns False when it was not sent."""
+        if not self.enabled or not provider:
+            return False
+        self._ensure_loop()
+        if not self._in_flight.acquire(blocking=False):
+            print(f"Payment gateway busy, leaving {transaction_id} for the poller")
+            return False
+        charge = {
+            'transaction_id': transaction_id,
+            'amount': round(amount, 2),
+            'currency': 'PHP',
+            'method': method,
+        }
+        asyncio.run_coroutine_threadsafe(self._charge(provider, charge), self._loop)
+        return True
+
+    def run(self, coroutine, timeout=None):
+        """Run a coroutine on the gateway loop from a normal thread and wait for it."""
+        self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def _ensure_loop(self):
+        # Threads do not survive a fork, so gunicorn workers start their own
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._sessions = {}
+                self._adapters = {}
+                self._in_flight = threading.BoundedSemaphore(
+                    self.app.config['PAYMENT_MAX_IN_FLIGHT'])
+                self._db_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix='payment-status')
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name='payment-gateway', daemon=True)
+                self._thread.start()
+
+    def _provider(self, provider):
+        # Only touched from the loop thread, so no locking is needed
+        if provider not in self._sessions:
+            config = self.app.config
+            self._adapters[provider] = PROVIDER_ADAPTERS[provider](
+                provider, self.provider_url(provider), config.get('PAYMENT_GATEWAY_KEY'))
+            self._sessions[provider] = new_gateway_session(
+                size=config['PAYMENT_POOL_SIZE'], timeout=config['PAYMENT_TIMEOUT'])
+        return self._adapters[provider], self._sessions[provider]
+
+    async def _charge(self, provider, charge):
+        try:
+            adapter, session = self._provider(provider)
+            status = await adapter.charge(session, charge)
+        except Exception as e:
+            # Nothing awaits this task, so every error is reported here. The
+            # payment is left pending; the webhook or the poller settles it
+            print(f"Charge {charge['transaction_id']} via {provider} failed to send: {e!r}")
+            return None
+        finally:
+            self._in_flight.release()
+        if status != 'pending':
+            await self._loop.run_in_executor(
+                self._db_executor, self._save_status, charge['transaction_id'], status)
+        return status
+
+    def _save_status(self, transaction_id, status):
+        with self.app.app_context():
+            try:
+                record_payment_status(transaction_id, status)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Could not record status for {transaction_id}: {e}")
+
+    async def fetch_statuses(self, payments):
+        """Ask each provider about (transaction_id, provider) pairs; returns {transaction_id: status}."""
+        async def fetch(transaction_id, provider):
+            try:
+                adapter, session = self._provider(provider)
+                return transaction_id, await adapter.fetch_status(session, transaction_id)
+            except Exception as e:
+                print(f"Status check for {transaction_id} via {provider} failed: {e!r}")
+                return transaction_id, 'pending'
+        return dict(await asyncio.gather(*(fetch(*payment) for payment in payments)))
+
+
+payment_gateway = PaymentGateway()
+
+
+def poll_pending_payments(older_than=60, limit=500):
+    """Settle pending gateway payments older than older_than seconds; returns status counts."""
+    rows = db.session.query(
+        Payment.transaction_id, Payment.e_wallet_provider, Payment.card_provider
+    ).filter(
+        Payment.status == 'pending',
+        Payment.payment_method != 'Cash on Delivery',
+        Payment.created_at <= datetime.utcnow() - timedelta(seconds=older_than)
+    ).order_by(Payment.created_at).limit(limit).all()
+    pending = [(transaction_id, e_wallet or card) for transaction_id, e_wallet, card in rows
+               if e_wallet or card]
+    if not pending:
+        return {}
+    statuses = payment_gateway.run(payment_gateway.fetch_statuses(pending))
+    counts = {}
+    for transaction_id, status in statuses.items():
+        record_payment_status(transaction_id, status)
+        counts[status] = counts.get(status, 0) + 1
+    db.session.commit()
+    return counts
@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.sql import func
+
+from ..models import db, User, Payment, Sale, UserShippingInfo, CardDetails, SaleArchive, PaymentArchive, UserShippingInfoArchive
+from ..utils import keyset_page, format_datetime, or_na, mask_card, select_columns, row_serializer
+from .archive import needs_archive, union_with_archive
+
+
+def load_user_info(cursor, limit):
+    """Load one page of users with their payments, shipping info and total spend.
+
+    A fixed number of queries, however many users are on the page:
+    six, or nine once anything has been archived.
+    """
+    users, next_cursor = keyset_page(User.query, User.user_id, cursor, limit)
+    if not users:
+        return [], None
+    user_ids = [user.user_id for user in users]
+    usernames = [user.username for user in users]
+
+    payment_models = [Payment]
+    shipping_models = [UserShippingInfo]
+    if needs_archive(PaymentArchive):
+        payment_models.append(PaymentArchive)
+        shipping_models.append(UserShippingInfoArchive)
+    sale_models = [Sale, SaleArchive] if needs_archive(SaleArchive) else [Sale]
+
+    payments = {}
+    for model in payment_models:
+        for payment in model.query.filter(model.user_id.in_(user_ids)):
+            payments.setdefault(payment.user_id, []).append(payment)
+    for user_payments in payments.values():
+        user_payments.sort(key=lambda payment: payment.payment_id)
+
+    shipping_info = {}
+    for model in shipping_models:
+        for info in model.query.filter(model.user_id.in_(user_ids)):
+            shipping_info.setdefault(info.user_id, []).append(info)
+    for user_shipping_info in shipping_info.values():
+        user_shipping_info.sort(key=lambda info: info.shipping_id)
+
+    total_spent = {}
+    for model in sale_models:
+        for username, spent in (db.session.query(model.username, func.sum(model.total_price))
+                                .filter(model.username.in_(usernames))
+                                .group_by(model.username)):
+            total_spent[username] = total_spent.get(username, 0.0) + (spent or 0.0)
+
+    users_info = [{
+        'user': user,
+        'payments': payments.get(user.user_id, []),
+        # Round to 2 decimal places
+        'total_spent': round(total_spent.get(user.username) or 0.0, 2),
+        'shipping_info': shipping_info.get(user.user_id, [])
+    } for user in users]
+    return users_info, next_cursor
+
+
+def get_period_range(period, now=None):
+    """Return the half-open [start, end) datetime range for a report period.
+
+    Comparing the raw column against plain bounds keeps the filter sargable,
+    so MySQL can range-scan ix_sales_created_at. Unknown periods (such as
+    'all-time') return None.
+    """
+    now = now or datetime.utcnow()
+    today = datetime(now.year, now.month, now.day)
+    if period == 'daily':
+        return today, today + timedelta(days=1)
+    if period == 'weekly':
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=7)
+    if period == 'monthly':
+        start = datetime(now.year, now.month, 1)
+        return start, _add_months(start, 1)
+    if period == 'quarterly':
+        start = datetime(now.year, (now.month - 1) // 3 * 3 + 1, 1)
+        return start, _add_months(start, 3)
+    if period == 'yearly':
+        start = datetime(now.year, 1, 1)
+        return start, datetime(now.year + 1, 1, 1)
+    return None
+
+
+def _add_months(start, months):
+    month_index = start.month - 1 + months
+    return datetime(start.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def _sale_report_fields(sale, payment, shipping):
+    # (key, column, transform) for each field of a sales report row
+    return (
+        ('sale_id', sale.sale_id, None),
+        ('username', sale.username, None),
+        ('product_id', sale.product_id, None),
+        ('product_name', sale.product_name, None),
+        ('quantity', sale.quantity, None),
+        ('total_price', sale.total_price, None),
+        ('created_at', sale.created_at, format_datetime),
+        ('payment_method', payment.payment_method, or_na),
+        ('card_number', CardDetails.card_number, mask_card),
+        ('card_holder_name', CardDetails.card_holder_name, or_na),
+        ('expiration_date', CardDetails.expiration_date, or_na),
+        ('shipping_full_name', shipping.full_name.label('shipping_full_name'), or_na),
+        ('address_line1', shipping.address_line1, or_na),
+        ('address_line2', shipping.address_line2, or_na),
+        ('city', shipping.city, or_na),
+        ('province', shipping.province, or_na),
+        ('postal_code', shipping.postal_code, or_na),
+        ('phone_number', shipping.phone_number, or_na),
+    )
+
+
+SALE_REPORT_FIELDS = _sale_report_fields(Sale, Payment, UserShippingInfo)
+ARCHIVED_SALE_REPORT_FIELDS = _sale_report_fields(SaleArchive, PaymentArchive, UserShippingInfoArchive)
+SALE_REPORT_COLUMNS = [key for key, _, _ in SALE_REPORT_FIELDS]
+serialize_sale_report = row_serializer(SALE_REPORT_FIELDS)
+
+# The plain sales table, as shown on the admin sales page
+SALE_SUMMARY_FIELDS = SALE_REPORT_FIELDS[:7]
+ARCHIVED_SALE_SUMMARY_FIELDS = ARCHIVED_SALE_REPORT_FIELDS[:7]
+serialize_sale_summary = row_serializer(SALE_SUMMARY_FIELDS)
+
+
+def _in_range(query, column, start, end, key=None):
+    if start:
+        query = query.filter(column >= start)
+    if end:
+        query = query.filter(column < end)
+    if key is not None and (start or end):
+        # Ordered by the key behind outer joins, SQLite and MySQL both walk
+        # the primary key from the first row instead of range-scanning
+        # created_at; bounding the key by the range's first and last ids,
+        # read from the created_at index, keeps that walk inside the range
+        first = _in_range(db.session.query(func.min(key)), column, start, end).scalar_subquery()
+        last = _in_range(db.session.query(func.max(key)), column, start, end).scalar_subquery()
+        query = query.filter(key >= first, key <= last)
+    return query
+
+
+def _report_query(fields, sale, payment, shipping):
+    return db.session.query(*select_columns(fields)).join(
+        payment, sale.sale_id == payment.order_id, isouter=True
+    ).join(
+        CardDetails, CardDetails.user_id == sale.username, isouter=True
+    ).join(
+        shipping, payment.payment_id == shipping.payment_id, isouter=True
+    )
+
+
+def sales_report_query(start=None, end=None):
+    """Sales in [start, end) joined to their payment, card and shipping details, as row tuples.
+
+    Returns (query, sale_id column) for paging and ordering. The archive
+    tables are only unioned in when the range reaches back past the newest
+    archived sale; archived sales are joined to archived payments.
+    """
+    query = _in_range(_report_query(SALE_REPORT_FIELDS, Sale, Payment, UserShippingInfo),
+                      Sale.created_at, start, end, Sale.sale_id)
+    if not needs_archive(SaleArchive, start):
+        return query, Sale.sale_id
+    archived = _in_range(_report_query(ARCHIVED_SALE_REPORT_FIELDS, SaleArchive,
+                                       PaymentArchive, UserShippingInfoArchive),
+                         SaleArchive.created_at, start, end, SaleArchive.sale_id)
+    return union_with_archive(query, archived, 'sale_id')
+
+
+def sales_summary_query(start=None, end=None):
+    """Plain sales in [start, end) as row tuples; returns (query, sale_id column)."""
+    query = _in_range(db.session.query(*select_columns(SALE_SUMMARY_FIELDS)),
+                      Sale.created_at, start, end)
+    if not needs_archive(SaleArchive, start):
+        return query, Sale.sale_id
+    archived = _in_range(db.session.query(*select_columns(ARCHIVED_SALE_SUMMARY_FIELDS)),
+                         SaleArchive.created_at, start, end)
+    return union_with_archive(query, archived, 'sale_id')
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.sql import func
+
+from ..models import db, Product, StockReservation
+
+
+class ReservationError(Exception):
+    """Raised when a cart line cannot be held because too little stock is free."""
+
+
+def held_by_others(user_id, now):
+    """Correlated subquery: units of the outer Product held by other carts right now.
+
+    A user_id of None counts every cart's holds.
+    """
+    return select(func.coalesce(func.sum(StockReservation.quantity), 0)).where(
+        StockReservation.product_id == Product.product_id,
+        StockReservation.user_id != user_id,
+        StockReservation.expires_at > now
+    ).scalar_subquery()
+
+
+def available_to_sell(product_ids=None, user_id=None, now=None):
+    """Stock, and stock minus live holds, per product id.
+
+    Holds by user_id itself are not subtracted; with no user_id every
+    cart's holds are. Covers the whole catalog when product_ids is None.
+    Returns {product_id: {'stock': ..., 'available': ...}} from one query.
+    """
+    now = now or datetime.utcnow()
+    query = db.session.query(
+        Product.product_id, Product.stock, Product.stock - held_by_others(user_id, now))
+    if product_ids is not None:
+        query = query.filter(Product.product_id.in_(product_ids))
+    return {product_id: {'stock': stock, 'available': max(available, 0)}
+            for product_id, stock, available in query}
+
+
+def reserve_stock(user_id, product_id, quantity):
+    """Set the user's hold on a product to quantity and restart its TTL.
+
+    The product row is locked first, so concurrent holds on the same
+    product are decided one at a time. A quantity of 0 releases the hold.
+    Runs in the caller's transaction; the caller commits.
+    """
+    if quantity <= 0:
+        release_reservation(user_id, product_id)
+        return None
+
+    now = datetime.utcnow()
+    # A no-op UPDATE takes the row lock on MySQL and the write lock on
+    # SQLite, which ignores SELECT ... FOR UPDATE
+    db.session.execute(
+        update(Product).where(Product.product_id == product_id)
+        .values(stock=Product.stock)
+        .execution_options(synchronize_session=False))
+    product = db.session.query(
+        Product.product_name, Product.stock - held_by_others(user_id, now)
+    ).filter(Product.product_id == product_id).first()
+    if product is None:
+        raise ReservationError('Product not found')
+    name, available = product
+    if quantity > available:
+        raise ReservationError(
+            f'Insufficient stock for {name}: {max(available, 0)} available')
+
+    expires_at = now + timedelta(seconds=current_app.config['RESERVATION_TTL_SECONDS'])
+    reservation = StockReservation.query.filter_by(
+        user_id=user_id, product_id=product_id).first()
+    if reservation is None:
+        db.session.add(StockReservation(
+            user_id=user_id, product_id=product_id,
+            quantity=quantity, expires_at=expires_at))
+    else:
+        reservation.quantity = quantity
+        reservation.expires_at = expires_at
+    return expires_at
+
+
+def release_reservation(user_id, product_id):
+    StockReservation.query.filter_by(
+        user_id=user_id, product_id=product_id).delete(synchronize_session=False)
+
+
+def expire_reservations(batch_size=None):
+    """Delete expired holds in committed batches; return how many were removed."""
+    batch_size = batch_size or current_app.config['RESERVATION_SWEEP_BATCH']
+    removed = 0
+    while True:
+        ids = [reservation_id for (reservation_id,) in db.session.query(
+            StockReservation.reservation_id
+        ).filter(
+            StockReservation.expires_at <= datetime.utcnow()
+        ).order_by(StockReservation.expires_at).limit(batch_size)]
+        if not ids:
+            break
+        StockReservation.query.filter(
+            StockReservation.reservation_id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(ids)
+        if len(ids) < batch_size:
+            break
+    return removed
@@ -0,0 +1,134 @@
+from sqlalchemy import insert, delete
+from sqlalchemy.dialects import mysql, sqlite, postgresql
+from sqlalchemy.sql import func
+
+from ..models import db, Product, SalesDailyProduct, SalesDailyUser, SalesDailyCategory
+from .archive import sales_with_archive, orders_with_archive
+
+# Category for sales whose order and product are both gone
+UNKNOWN_CATEGORY = 'Uncategorized'
+
+# Rollup table -> (key columns, summed columns)
+ROLLUPS = {
+    SalesDailyProduct: (('day', 'product_id'), ('sale_count', 'quantity', 'revenue')),
+    SalesDailyUser: (('day', 'username'), ('sale_count', 'revenue')),
+    SalesDailyCategory: (('day', 'category'), ('sale_count', 'revenue')),
+}
+
+
+def _upsert_increment(model, rows):
+    """Add rows onto existing rollup counters, inserting the missing keys."""
+    keys, measures = ROLLUPS[model]
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(model).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            {col: getattr(model, col) + stmt.inserted[col] for col in measures})
+    else:
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={col: getattr(model, col) + stmt.excluded[col] for col in measures})
+    db.session.execute(stmt)
+
+
+def record_sales_rollups(day, sales):
+    """Fold freshly written sales into the rollups, in the caller's transaction.
+
+    Each sale is a dict with product_id, username, category, quantity and
+    total_price. Keys are sorted so concurrent checkouts lock rollup rows in
+    the same order.
+    """
+    by_product, by_user, by_category = {}, {}, {}
+    for sale in sales:
+        row = by_product.setdefault(sale['product_id'], {
+            'day': day, 'product_id': sale['product_id'],
+            'sale_count': 0, 'quantity': 0, 'revenue': 0.0})
+        row['sale_count'] += 1
+        row['quantity'] += sale['quantity']
+        row['revenue'] += sale['total_price']
+
+        row = by_user.setdefault(sale['username'], {
+            'day': day, 'username': sale['username'], 'sale_count': 0, 'revenue': 0.0})
+        row['sale_count'] += 1
+        row['revenue'] += sale['total_price']
+
+        row = by_category.setdefault(sale['category'], {
+            'day': day, 'category': sale['category'], 'sale_count': 0, 'revenue': 0.0})
+        row['sale_count'] += 1
+        row['revenue'] += sale['total_price']
+
+    for model, grouped in ((SalesDailyProduct, by_product),
+                           (SalesDailyUser, by_user),
+                           (SalesDailyCategory, by_category)):
+        if grouped:
+            _upsert_increment(model, [grouped[key] for key in sorted(grouped)])
+
+
+def _raw_rollup_queries():
+    # Rollups cover all history, archived sales included
+    all_sales = sales_with_archive()
+    all_orders = orders_with_archive()
+    sales, orders = all_sales.c, all_orders.c
+    day = func.date(sales.created_at)
+    # Checkout records the category the product had at sale time, which the
+    # sale's order row keeps; the product's current category is only a fallback
+    category = func.coalesce(orders.category, Product.category, UNKNOWN_CATEGORY)
+    return {
+        SalesDailyProduct: db.session.query(
+            day, sales.product_id, func.count(sales.sale_id),
+            func.sum(sales.quantity), func.sum(sales.total_price)
+        ).group_by(day, sales.product_id),
+        SalesDailyUser: db.session.query(
+            day, sales.username, func.count(sales.sale_id), func.sum(sales.total_price)
+        ).group_by(day, sales.username),
+        SalesDailyCategory: db.session.query(
+            day, category, func.count(sales.sale_id), func.sum(sales.total_price)
+        ).select_from(all_sales).outerjoin(
+            all_orders, orders.sale_id == sales.sale_id
+        ).outerjoin(
+            Product, Product.product_id == sales.product_id
+        ).group_by(day, category),
+    }
+
+
+def backfill_rollups():
+    """Rebuild every rollup table from the raw sales, hot and archived."""
+    for model, query in _raw_rollup_queries().items():
+        keys, measures = ROLLUPS[model]
+        db.session.execute(delete(model))
+        db.session.execute(insert(model).from_select(
+            list(keys + measures), query.subquery().select()))
+    db.session.commit()
+
+
+def verify_rollups(tolerance=0.01):
+    """Compare each rollup with the raw sales; return a list of mismatch descriptions."""
+    mismatches = []
+    for model, query in _raw_rollup_queries().items():
+        keys, measures = ROLLUPS[model]
+        expected = {tuple(str(v) for v in row[:len(keys)]): row[len(keys):]
+                    for row in query}
+        actual = {
+            tuple(str(v) for v in row[:len(keys)]): row[len(keys):]
+            for row in db.session.query(*[getattr(model, col) for col in keys + measures])
+        }
+        for key in expected.keys() | actual.keys():
+            want = expected.get(key)
+            got = actual.get(key)
+            if want is None or got is None or any(
+                    abs((w or 0) - (g or 0)) > tolerance for w, g in zip(want, got)):
+                mismatches.append(
+                    f"{model.__tablename__} {key}: expected {want}, found {got}")
+    return mismatches
+
+
+def top_rollup_totals(model, key, measure, limit=None):
+    """Sum a rollup measure across all days, largest first."""
+    total = func.sum(getattr(model, measure))
+    query = db.session.query(getattr(model, key), total).group_by(
+        getattr(model, key)).order_by(total.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
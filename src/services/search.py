@@ -0,0 +1,142 @@
+import re
+import threading
+
+from markupsafe import Markup, escape
+
+from .catalog import get_catalog
+from .reservations import available_to_sell
+
+NGRAM_SIZE = 3
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+
+def _ngrams(text):
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class ProductSearchIndex:
+    """Trigram inverted index over product name and category."""
+
+    def __init__(self):
+        self.postings = {}  # trigram -> set of product ids
+        self.docs = {}      # product id -> (lowercased name, lowercased category)
+
+    def add(self, product):
+        doc = (product['product_name'].lower(), product['category'].lower())
+        self.docs[product['product_id']] = doc
+        for gram in _ngrams(doc[0]) | _ngrams(doc[1]):
+            self.postings.setdefault(gram, set()).add(product['product_id'])
+
+    def remove(self, product_id):
+        doc = self.docs.pop(product_id, None)
+        if doc is None:
+            return
+        for gram in _ngrams(doc[0]) | _ngrams(doc[1]):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def sync(self, products_by_id):
+        """Re-index only the products whose name or category changed."""
+        for product_id in set(self.docs) - set(products_by_id):
+            self.remove(product_id)
+        for product_id, product in products_by_id.items():
+            doc = self.docs.get(product_id)
+            if doc != (product['product_name'].lower(), product['category'].lower()):
+                self.remove(product_id)
+                self.add(product)
+
+    def search(self, query):
+        """Return matching product ids, best match first."""
+        needle = query.lower()
+        grams = _ngrams(needle)
+        if grams:
+            posting_lists = sorted(
+                (self.postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set(posting_lists[0]).intersection(*posting_lists[1:])
+        else:
+            # Queries shorter than one trigram cannot use the index
+            candidates = self.docs.keys()
+
+        ranked = []
+        for product_id in candidates:
+            name, category = self.docs[product_id]
+            position = name.find(needle)
+            if position == -1:
+                if needle not in category:
+                    continue  # Trigram false positive
+                rank = 4
+                position = 0
+            elif name == needle:
+                rank = 0
+            elif position == 0:
+                rank = 1
+            elif f' {needle}' in name:
+                rank = 2
+            else:
+                rank = 3
+            ranked.append((rank, position, len(name), product_id))
+        ranked.sort()
+        return [entry[-1] for entry in ranked]
+
+
+_index = ProductSearchIndex()
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def highlight(text, query):
+    """Wrap every case-insensitive occurrence of query in <mark>, escaping the rest."""
+    if not query:
+        return text
+    parts = []
+    last = 0
+    for match in re.finditer(re.escape(query), text, re.IGNORECASE):
+        parts.append(escape(text[last:match.start()]))
+        parts.append(Markup('<mark>%s</mark>') % match.group(0))
+        last = match.end()
+    parts.append(escape(text[last:]))
+    return Markup('').join(parts)
+
+
+def search_catalog(query, page=1, per_page=DEFAULT_PER_PAGE):
+    """Search the catalog snapshot and return one page of highlighted results.
+
+    Only the page's products are looked up for their available-to-sell count.
+    """
+    global _index_version
+    catalog = get_catalog()
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+
+    if query:
+        with _index_lock:
+            if _index_version != catalog['version']:
+                _index.sync(catalog['by_id'])
+                _index_version = catalog['version']
+            product_ids = _index.search(query)
+    else:
+        product_ids = [p['product_id'] for p in catalog['products']]
+
+    start = (page - 1) * per_page
+    page_ids = product_ids[start:start + per_page]
+    levels = available_to_sell(page_ids) if page_ids else {}
+    products = []
+    for product_id in page_ids:
+        product = catalog['by_id'][product_id]
+        products.append({
+            'product_id': product_id,
+            'product_name': highlight(product['product_name'], query),
+            'category': product['category'],
+            'price': product['price'],
+            'available': levels.get(product_id, {}).get('available', 0)
+        })
+    return {
+        'products': products,
+        'total': len(product_ids),
+        'page': page,
+        'per_page': per_page
+    }
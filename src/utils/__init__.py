@@ -1,4 +1,16 @@
 from .context_processors import inject_role
 from . error_handlers import register_error_handlers
-from .session_helpers import set_last_visited_page
-from .decorators import admin_required, user_required
+from .session_helpers import set_last_visited_page, regenerate_session, load_current_user
+from .decorators import admin_required, user_required, use_read_replica
+from .response_helpers import conditional_jsonify
+from .pagination import get_page_args, wants_page, keyset_page, stream_json, stream_csv, STREAM_BATCH_SIZE
+from .sql_instrumentation import register_sql_instrumentation, assert_max_queries, TooManyQueries
+from .passwords import PasswordHasherBusy, hash_password, verify_password, needs_rehash
+from .server_session import init_server_session, ServerSideSessionInterface, SQLiteSessionStore, RedisSessionStore
+from .fragment_cache import cached_fragment, render_cached_fragment
+from .static_assets import build_static_assets, init_static_assets
+from .serialization import format_datetime, or_na, mask_card, select_columns, row_serializer
+from .json_provider import OrjsonProvider, init_json_backend
+from .proxy import init_proxy_fix
+from .rate_limit import init_rate_limit, rate_limited, check_rate_limits, parse_rate, SQLiteBucketStore, RedisBucketStore
+from .ids import init_id_generator, next_id, new_transaction_id, id_timestamp, SnowflakeGenerator
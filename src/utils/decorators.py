@@ -1,14 +1,16 @@
 from functools import wraps
-from flask import session, redirect, url_for, flash
+from flask import redirect, url_for, flash, g
+
+from .session_helpers import load_current_user
 
 
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if load_current_user() is None:
             flash('You need to log in first.', 'bg-red-300 text-red-700')
             return redirect(url_for('user.login'))
-        if session.get('role') != 'admin':
+        if g.current_user.role.lower() != 'admin':
             # flash('You do not have permission to access this page.', 'error')
             # Redirect to a default page (e.g., 'menu')
             return redirect(url_for('main.menu'))
@@ -21,12 +23,21 @@ def admin_required(f):
 def user_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if load_current_user() is None:
             flash('You need to log in first.', 'bg-red-300 text-red-700')
             return redirect(url_for('user.login'))
-        if session.get('role') == 'admin':
+        if g.current_user.role.lower() == 'admin':
             # flash('Admins cannot access user-only areas.', 'error')
             # Redirect to the admin dashboard or another relevant page
-            return redirect(url_for('admin_dashboard'))
+            return redirect(url_for('admin.admin_users'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def use_read_replica(f):
+    """Route the view's SELECTs to the read replica, when one is configured."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.use_read_replica = True
         return f(*args, **kwargs)
     return decorated_function
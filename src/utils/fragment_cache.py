@@ -0,0 +1,30 @@
+import threading
+
+from flask import render_template
+from markupsafe import Markup
+
+# Per-worker rendered HTML: fragment name -> (state version, markup)
+_fragments = {}
+_fragments_lock = threading.Lock()
+
+
+def cached_fragment(name, version, render):
+    """Return the HTML for a fragment, calling render() only when version moved.
+
+    Versions come from the database, so a write in any worker invalidates
+    every worker's copy on its next request. render() is where the queries
+    belong; a cache hit runs none of them.
+    """
+    entry = _fragments.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    html = Markup(render())
+    with _fragments_lock:
+        _fragments[name] = (version, html)
+    return html
+
+
+def render_cached_fragment(name, version, template, load_context):
+    """cached_fragment() for a template rendered with the dict from load_context()."""
+    return cached_fragment(
+        name, version, lambda: render_template(template, **load_context()))
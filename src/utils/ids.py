@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+EPOCH_MS = 1704067200000  # 2024-01-01 UTC
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+_settings = {'worker_id': None, 'worker_range': (0, MAX_WORKER_ID),
+             'lease_dir': os.path.join('instance', 'worker-ids')}
+_generator = None
+_pid = None
+_lease = None
+_setup_lock = threading.Lock()
+
+
+class SnowflakeGenerator:
+    """64-bit ids: 41 bits of milliseconds since EPOCH_MS, 10 of worker id, 12 of sequence.
+
+    Ids from one generator strictly increase, and generators with
+    different worker ids can never produce the same id, so no database
+    round trip is needed. More than 4096 ids in a millisecond, or a clock
+    that steps back, borrow the next millisecond instead of waiting.
+    """
+
+    def __init__(self, worker_id):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f'Worker id must be between 0 and {MAX_WORKER_ID}')
+        self.worker_id = worker_id
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self):
+        with self._lock:
+            now = int(time.time() * 1000) - EPOCH_MS
+            if now <= self._last_ms:
+                now = self._last_ms
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    now += 1
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (now << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+
+def parse_worker_range(value):
+    """'0-511' -> (0, 511)."""
+    low, _, high = str(value).partition('-')
+    low, high = int(low), int(high or low)
+    if not 0 <= low <= high <= MAX_WORKER_ID:
+        raise ValueError(f'Invalid worker id range: {value!r}')
+    return low, high
+
+
+def _lease_worker_id(lease_dir, low, high):
+    """Hold an exclusive lock on one id file in [low, high] for the life of the process."""
+    try:
+        import fcntl
+    except ImportError:
+        # No flock on Windows; set ID_WORKER_ID per process there
+        return low + os.getpid() % (high - low + 1), None
+    os.makedirs(lease_dir, exist_ok=True)
+    size = high - low + 1
+    start = os.getpid() % size
+    for offset in range(size):
+        worker_id = low + (start + offset) % size
+        lease = open(os.path.join(lease_dir, f'{worker_id}.lock'), 'w')
+        try:
+            fcntl.flock(lease, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lease.close()
+            continue
+        return worker_id, lease
+    raise RuntimeError(f'Every worker id from {low} to {high} is in use')
+
+
+def _get_generator():
+    global _generator, _pid, _lease
+    # A forked worker must not keep its parent's worker id
+    if _generator is not None and _pid == os.getpid():
+        return _generator
+    with _setup_lock:
+        if _generator is None or _pid != os.getpid():
+            if _lease is not None:
+                _lease.close()  # The parent's copy keeps its lock
+                _lease = None
+            worker_id = _settings['worker_id']
+            if worker_id is None:
+                worker_id, _lease = _lease_worker_id(_settings['lease_dir'], *_settings['worker_range'])
+            _generator = SnowflakeGenerator(worker_id)
+            _pid = os.getpid()
+    return _generator
+
+
+def next_id():
+    """A new unique, time-ordered 64-bit integer id."""
+    return _get_generator().next_id()
+
+
+def new_transaction_id(prefix='TXN'):
+    return f'{prefix}_{next_id()}'
+
+
+def id_timestamp(snowflake):
+    """When an id was generated, as a naive UTC datetime."""
+    return datetime(1970, 1, 1) + timedelta(
+        milliseconds=(snowflake >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS)
+
+
+def init_id_generator(app):
+    """Take the worker id settings from ID_WORKER_ID and ID_WORKER_RANGE.
+
+    With ID_WORKER_ID unset, each process leases a free id from
+    ID_WORKER_RANGE through lock files in instance/worker-ids. Hosts that
+    share a database need ranges that do not overlap.
+    """
+    worker_id = app.config.get('ID_WORKER_ID')
+    _settings['worker_id'] = int(worker_id) if worker_id not in (None, '') else None
+    _settings['worker_range'] = parse_worker_range(app.config.get('ID_WORKER_RANGE', f'0-{MAX_WORKER_ID}'))
+    _settings['lease_dir'] = os.path.join(app.instance_path, 'worker-ids')
@@ -0,0 +1,41 @@
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask's JSON provider with orjson doing the encoding and decoding.
+
+    Output matches the default provider: keys are sorted, non-string keys
+    are stringified, and dates still go through Flask's default() so they
+    keep the HTTP date format. Calls with extra json.dumps options (such as
+    indent for pretty-printed debug responses) use the standard encoder.
+    """
+
+    def __init__(self, app):
+        import orjson
+        super().__init__(app)
+        self._orjson = orjson
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        option = self._orjson.OPT_NON_STR_KEYS | self._orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= self._orjson.OPT_SORT_KEYS
+        return self._orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self._orjson.loads(s)
+
+
+def init_json_backend(app):
+    """Use orjson when JSON_BACKEND allows it and the package is installed."""
+    backend = app.config.get('JSON_BACKEND', 'auto')
+    if backend == 'std':
+        return
+    try:
+        app.json = OrjsonProvider(app)
+    except ImportError:
+        if backend == 'orjson':
+            raise
@@ -0,0 +1,78 @@
+import csv
+import io
+
+from flask import request, json, Response, stream_with_context
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+
+def get_page_args(default_limit=DEFAULT_PAGE_SIZE):
+    """Read the keyset cursor and page size from the query string."""
+    cursor = request.args.get('cursor', type=int)
+    limit = request.args.get('limit', default_limit, type=int)
+    return cursor, min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def wants_page():
+    return 'cursor' in request.args or 'limit' in request.args
+
+
+def keyset_page(query, key, cursor, limit):
+    """Fetch the rows after cursor ordered by key, plus the cursor of the next page."""
+    if cursor is not None:
+        query = query.filter(key > cursor)
+    rows = query.order_by(key).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = getattr(rows[-1], key.key)
+    return rows, next_cursor
+
+
+def stream_json(rows, serialize, ndjson=False):
+    """Stream rows as a JSON array, or as NDJSON, one batch per chunk."""
+    def generate():
+        batch = []
+        first = True
+        if not ndjson:
+            yield '['
+        for row in rows:
+            batch.append(json.dumps(serialize(row)))
+            if len(batch) >= STREAM_BATCH_SIZE:
+                yield _join_batch(batch, first, ndjson)
+                batch = []
+                first = False
+        if batch:
+            yield _join_batch(batch, first, ndjson)
+        if not ndjson:
+            yield ']'
+
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def stream_csv(rows, serialize, columns):
+    """Stream rows as CSV with a header line, one batch per chunk."""
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        writer.writeheader()
+        count = 0
+        for row in rows:
+            writer.writerow(serialize(row))
+            count += 1
+            if count % STREAM_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(stream_with_context(generate()), mimetype='text/csv')
+
+
+def _join_batch(batch, first, ndjson):
+    if ndjson:
+        return '\n'.join(batch) + '\n'
+    return ('' if first else ',') + ','.join(batch)
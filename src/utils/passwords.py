@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_HASH_METHOD = 'scrypt:32768:8:1'
+DEFAULT_HASH_WORKERS = 2
+DEFAULT_HASH_QUEUE = 16
+DEFAULT_HASH_TIMEOUT = 5
+
+_executor = None
+_slots = None
+_setup_lock = threading.Lock()
+_method_prefixes = {}
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool stays saturated for PASSWORD_HASH_TIMEOUT."""
+
+
+def _config(key, default):
+    return current_app.config.get(key, default) if has_app_context() else default
+
+
+def _submit(fn, *args):
+    """Run a hash on the bounded pool, so a login burst cannot take every request thread's CPU."""
+    global _executor, _slots
+    if _executor is None:
+        with _setup_lock:
+            if _executor is None:
+                workers = _config('PASSWORD_HASH_WORKERS', DEFAULT_HASH_WORKERS)
+                _slots = threading.BoundedSemaphore(
+                    workers + _config('PASSWORD_HASH_QUEUE', DEFAULT_HASH_QUEUE))
+                _executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix='password-hash')
+    timeout = _config('PASSWORD_HASH_TIMEOUT', DEFAULT_HASH_TIMEOUT)
+    if not _slots.acquire(timeout=timeout):
+        raise PasswordHasherBusy('Password hashing is saturated')
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    method = _config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    return _submit(generate_password_hash, password, method)
+
+
+def verify_password(pwhash, password):
+    return _submit(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """True when pwhash was made with a different method or work factor than configured."""
+    method = _config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    if method not in _method_prefixes:
+        # Let Werkzeug expand defaults, e.g. 'scrypt' -> 'scrypt:32768:8:1'
+        _method_prefixes[method] = generate_password_hash(
+            '', method).split('$', 1)[0]
+    return pwhash.split('$', 1)[0] != _method_prefixes[method]
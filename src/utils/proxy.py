@@ -0,0 +1,14 @@
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+
+def init_proxy_fix(app):
+    """Take the client address and scheme from the TRUSTED_PROXY_HOPS proxies in front of the app.
+
+    Without it every request behind a reverse proxy comes from the proxy's
+    address, so all clients would share one per-IP rate limit bucket. Only
+    that many X-Forwarded-For entries are trusted; a client cannot spoof
+    its way past them.
+    """
+    hops = app.config.get('TRUSTED_PROXY_HOPS', 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
@@ -0,0 +1,163 @@
+import hashlib
+import math
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, flash, render_template, request
+
+
+def parse_rate(rule):
+    """'5/60' -> (capacity 5, refill 5/60 tokens per second)."""
+    capacity, _, period = str(rule).partition('/')
+    capacity, period = float(capacity), float(period or 60)
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f'Invalid rate limit rule: {rule!r}')
+    return capacity, capacity / period
+
+
+class SQLiteBucketStore:
+    """Token buckets in a local SQLite file shared by every worker on the host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS buckets '
+            '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, '
+            'idle_until REAL NOT NULL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=2, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate, cost=1):
+        """Spend cost tokens; return 0 when allowed, else seconds until they refill."""
+        conn = self._connect()
+        now = time.time()
+        # BEGIN IMMEDIATE takes the write lock up front, so the read and
+        # write below are one step for every process sharing the file
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?',
+                               (key,)).fetchone()
+            tokens = capacity if row is None else min(
+                capacity, row[0] + max(now - row[1], 0) * rate)
+            wait = 0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated_at, idle_until) '
+                'VALUES (?, ?, ?, ?)',
+                (key, tokens, now, now + (capacity - tokens) / rate))
+            # A bucket that has refilled completely is the same as no row
+            if secrets.randbelow(1000) == 0:
+                conn.execute('DELETE FROM buckets WHERE idle_until <= ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class RedisBucketStore:
+    """Token buckets in Redis; needs the optional `redis` package."""
+
+    SCRIPT = """
+    local capacity, rate = tonumber(ARGV[1]), tonumber(ARGV[2])
+    local now, cost = tonumber(ARGV[3]), tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or capacity
+    local updated_at = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * rate)
+    local wait = 0
+    if tokens >= cost then tokens = tokens - cost else wait = (cost - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url, prefix='ratelimit:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, rate, cost=1):
+        return float(self._take(keys=[self.prefix + key],
+                                args=[capacity, rate, time.time(), cost]))
+
+
+def _account_key(value):
+    # Keep raw usernames and emails out of the bucket store
+    return hashlib.sha256(value.strip().lower().encode()).hexdigest()[:32]
+
+
+def check_rate_limits(scope, account=None):
+    """Spend one token from the scope's per-IP and per-account buckets.
+
+    Returns 0 when the request may go ahead, else the seconds the client
+    should wait. If the store is unavailable the request is let through,
+    so a locked file never takes sign-in down with it.
+    """
+    store = current_app.extensions.get('rate_limit')
+    if store is None:
+        return 0
+    prefix = f'RATE_LIMIT_{scope.upper()}'
+    # Behind a proxy, init_proxy_fix has already put the client's own address here
+    buckets = [(f'{scope}:ip:{request.remote_addr}', current_app.config[f'{prefix}_IP'])]
+    if account:
+        buckets.append((f'{scope}:account:{_account_key(account)}',
+                        current_app.config[f'{prefix}_ACCOUNT']))
+    wait = 0
+    try:
+        for key, rule in buckets:
+            wait = max(wait, store.take(key, *parse_rate(rule)))
+    except Exception as e:
+        print(f"Rate limit store unavailable, allowing request: {e}")
+        return 0
+    return wait
+
+
+def rate_limited(scope, field, template):
+    """Throttle the view's POSTs per client IP and per form[field].
+
+    Over the limit, the view is skipped and template is rendered with a
+    429 and a Retry-After header, before any password hashing or mail.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method == 'POST':
+                wait = check_rate_limits(scope, request.form.get(field))
+                if wait:
+                    retry_after = max(math.ceil(wait), 1)
+                    flash(f'Too many attempts. Please try again in {retry_after} seconds.',
+                          'bg-red-300 text-red-700')
+                    return render_template(template), 429, {'Retry-After': str(retry_after)}
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def init_rate_limit(app):
+    """Set up the bucket store named by RATE_LIMIT_BACKEND."""
+    backend = app.config.get('RATE_LIMIT_BACKEND', 'sqlite')
+    if backend == 'sqlite':
+        path = app.config.get('RATE_LIMIT_SQLITE_PATH') or os.path.join(
+            app.instance_path, 'ratelimit.db')
+        app.extensions['rate_limit'] = SQLiteBucketStore(path)
+    elif backend == 'redis':
+        app.extensions['rate_limit'] = RedisBucketStore(app.config['RATE_LIMIT_REDIS_URL'])
+    # 'off' disables limiting
@@ -0,0 +1,18 @@
+from flask import request, jsonify, current_app
+
+
+def conditional_jsonify(data, etag, body=None):
+    """jsonify with an ETag, answering 304 when the client already holds it.
+
+    body may carry data already encoded as JSON, to skip encoding it again.
+    """
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    elif body is not None:
+        response = current_app.response_class(body + '\n', mimetype='application/json')
+    else:
+        response = jsonify(data)
+    response.set_etag(etag)
+    # Let browsers keep the body but revalidate it on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,39 @@
+def format_datetime(value):
+    """'YYYY-MM-DD HH:MM:SS', like strftime('%Y-%m-%d %H:%M:%S') at a fraction of the cost."""
+    return value.isoformat(' ', 'seconds') if value is not None else None
+
+
+def or_na(value):
+    return value if value else 'N/A'
+
+
+def mask_card(value):
+    return value[-4:] if value else 'N/A'
+
+
+def select_columns(fields):
+    """The column expressions of a field spec, in order, for db.session.query(*...)."""
+    return [column for _, column, _ in fields]
+
+
+def row_serializer(fields):
+    """Compile a field spec into a function turning one row tuple into a dict.
+
+    fields is a sequence of (key, column, transform) triples, in the same
+    order the columns are selected; transform may be None. Keys and
+    transforms are resolved once here instead of per row.
+    """
+    keys = tuple(key for key, _, _ in fields)
+    transforms = tuple((index, transform) for index, (_, _, transform) in enumerate(fields)
+                       if transform is not None)
+
+    if not transforms:
+        def serialize(row):
+            return dict(zip(keys, row))
+    else:
+        def serialize(row):
+            values = list(row)
+            for index, transform in transforms:
+                values[index] = transform(values[index])
+            return dict(zip(keys, values))
+    return serialize
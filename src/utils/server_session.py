@@ -0,0 +1,150 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that remembers whether it was changed during the request."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.stale_sid = None
+
+    def regenerate(self):
+        """Move the data to a fresh id, e.g. on login, so a planted id is useless."""
+        if not self.new:
+            self.stale_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.new = True
+        self.modified = True
+
+
+class SQLiteSessionStore:
+    """Sessions in a local SQLite file shared by every worker on the host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS sessions '
+                '(sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid):
+        row = self._connect().execute(
+            'SELECT data FROM sessions WHERE sid = ? AND expires_at > ?',
+            (sid, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid, data, ttl):
+        conn = self._connect()
+        conn.execute('INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)',
+                     (sid, data, time.time() + ttl))
+        # Sweep expired rows now and then instead of on every write
+        if secrets.randbelow(1000) == 0:
+            conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (time.time(),))
+
+    def delete(self, sid):
+        self._connect().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+
+class RedisSessionStore:
+    """Sessions in Redis; needs the optional `redis` package."""
+
+    def __init__(self, url, prefix='session:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, sid):
+        data = self.client.get(self.prefix + sid)
+        return data.decode() if data is not None else None
+
+    def set(self, sid, data, ttl):
+        self.client.setex(self.prefix + sid, int(ttl), data)
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data server-side; the cookie only carries a random id.
+
+    The store is written only when the session changed, and the cookie is
+    only sent when a new id is issued or the session is cleared, so most
+    responses carry no Set-Cookie at all.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.get(sid)
+            if data is not None:
+                return ServerSideSession(self.serializer.loads(data), sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.stale_sid:
+            self.store.delete(session.stale_sid)
+        if not session:
+            if session.modified and (not session.new or session.stale_sid):
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified:
+            return
+
+        ttl = app.permanent_session_lifetime.total_seconds()
+        self.store.set(session.sid, self.serializer.dumps(dict(session)), ttl)
+        if session.new:
+            response.vary.add('Cookie')
+            response.set_cookie(
+                name, session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain, path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app))
+
+
+def init_server_session(app):
+    """Install the server-side session backend named by SESSION_BACKEND."""
+    backend = app.config.get('SESSION_BACKEND', 'sqlite')
+    if backend == 'sqlite':
+        path = app.config.get('SESSION_SQLITE_PATH') or os.path.join(
+            app.instance_path, 'sessions.db')
+        app.session_interface = ServerSideSessionInterface(SQLiteSessionStore(path))
+    elif backend == 'redis':
+        app.session_interface = ServerSideSessionInterface(
+            RedisSessionStore(app.config['SESSION_REDIS_URL']))
+    # 'cookie' keeps Flask's default signed-cookie sessions
@@ -1,6 +1,24 @@
+from flask import session, g
 
-from flask import session
+from ..models import db, User
 
 
 def set_last_visited_page(url):
-    session['last_visited_page'] = url
+    # Only touch the session when the page changed, so repeat views stay read-only
+    if session.get('last_visited_page') != url:
+        session['last_visited_page'] = url
+
+
+def regenerate_session():
+    """Issue a new session id when the backend supports it (server-side stores)."""
+    regenerate = getattr(session, 'regenerate', None)
+    if regenerate is not None:
+        regenerate()
+
+
+def load_current_user():
+    """Return the logged-in User, loading it at most once per request."""
+    if 'current_user' not in g:
+        user_id = session.get('user_id')
+        g.current_user = db.session.get(User, user_id) if user_id is not None else None
+    return g.current_user
@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+from ..models import db
+
+slow_query_logger = logging.getLogger('slow_queries')
+_local = threading.local()
+
+
+def register_sql_instrumentation(app):
+    """Count and time every SQL statement per request.
+
+    Adds a Server-Timing header to each response and logs statements slower
+    than SLOW_QUERY_MS together with the endpoint that ran them.
+    """
+    if not slow_query_logger.handlers:
+        log_path = app.config.get('SLOW_QUERY_LOG')
+        handler = logging.FileHandler(log_path) if log_path else logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.WARNING)
+    threshold = app.config.get('SLOW_QUERY_MS', 200) / 1000
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        for counter in getattr(_local, 'counters', ()):
+            counter.append(statement)
+        if has_request_context():
+            g.sql_query_count = g.get('sql_query_count', 0) + 1
+            g.sql_query_time = g.get('sql_query_time', 0.0) + elapsed
+        if elapsed >= threshold:
+            endpoint = request.endpoint if has_request_context() else '-'
+            slow_query_logger.warning(
+                '%.1fms %s %s', elapsed * 1000, endpoint, ' '.join(statement.split()))
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, 'before_cursor_execute', before_cursor_execute):
+                event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.after_request
+    def add_server_timing(response):
+        count = g.get('sql_query_count', 0)
+        duration = g.get('sql_query_time', 0.0) * 1000
+        response.headers.add(
+            'Server-Timing', f'db;dur={duration:.1f};desc="{count} queries"')
+        return response
+
+
+class TooManyQueries(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail when the block runs more than limit SQL statements.
+
+        with assert_max_queries(3):
+            client.get('/cart')
+    """
+    statements = []
+    counters = getattr(_local, 'counters', [])
+    _local.counters = counters + [statements]
+    try:
+        yield statements
+    finally:
+        _local.counters = counters
+    if len(statements) > limit:
+        raise TooManyQueries(
+            f'{len(statements)} queries ran, expected at most {limit}:\n' + '\n'.join(statements))
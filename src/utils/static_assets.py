@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import current_app, request, send_from_directory
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Formats that are already compressed gain nothing from gzip or brotli
+PRECOMPRESSED_SUFFIXES = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif',
+                          '.woff', '.woff2', '.zip', '.gz', '.br', '.mp4'}
+
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def _write_compressed(path, data, encoding, brotli=None):
+    """Write data compressed next to path; keep it only if it is actually smaller."""
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=11)
+        target = path + '.br'
+    else:
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        target = path + '.gz'
+    if len(compressed) >= len(data):
+        return False
+    with open(target, 'wb') as f:
+        f.write(compressed)
+    return True
+
+
+def build_static_assets(static_folder):
+    """Fingerprint and precompress everything under static/ into static/dist.
+
+    Each file is copied to a name carrying a hash of its content, with .gz
+    and (when the optional brotli package is installed) .br siblings. The
+    manifest maps original paths to the fingerprinted file and its encodings.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    brotli = _brotli()
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            stem, suffix = os.path.splitext(logical)
+            hashed = f'{DIST_DIR}/{stem}.{digest}{suffix}'
+            target = os.path.join(static_folder, *hashed.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+
+            encodings = []
+            if suffix.lower() not in PRECOMPRESSED_SUFFIXES:
+                if brotli is not None and _write_compressed(target, data, 'br', brotli):
+                    encodings.append('br')
+                if _write_compressed(target, data, 'gzip'):
+                    encodings.append('gzip')
+            manifest[logical] = {'file': hashed, 'encodings': encodings}
+
+    os.makedirs(dist, exist_ok=True)
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def _fingerprint_static_url(endpoint, values):
+    # url_for('static', filename=...) picks the fingerprinted copy when one exists
+    if endpoint != 'static' or 'filename' not in values:
+        return
+    entry = current_app.extensions['static_manifest']['files'].get(values['filename'])
+    if entry is not None:
+        values['filename'] = entry['file']
+
+
+def _serve_static(filename):
+    encodings = current_app.extensions['static_manifest']['encodings'].get(filename)
+    if encodings is None:
+        return current_app.send_static_file(filename)
+
+    response = None
+    accepted = request.accept_encodings
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in encodings and accepted[encoding]:
+            response = send_from_directory(current_app.static_folder, filename + suffix)
+            response.headers['Content-Encoding'] = encoding
+            response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            break
+    if response is None:
+        response = send_from_directory(current_app.static_folder, filename)
+    # The name changes with the content, so browsers never need to revalidate
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_static_assets(app):
+    """Serve fingerprinted assets from the manifest written by `flask assets build`."""
+    files = {}
+    path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path) as f:
+            files = json.load(f)
+    app.extensions['static_manifest'] = {
+        'files': files,
+        'encodings': {entry['file']: entry['encodings'] for entry in files.values()},
+    }
+    app.url_defaults(_fingerprint_static_url)
+    app.view_functions['static'] = _serve_static
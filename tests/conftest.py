@@ -0,0 +1,83 @@
+import pytest
+
+import src.services.catalog as catalog
+import src.services.search as search
+import src.utils.fragment_cache as fragment_cache
+from src import create_app
+from src.models import db, User, Product
+from src.services import ensure_catalog_versions
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Per-worker caches are keyed by version numbers, which restart with every test database
+    monkeypatch.setattr(catalog, '_snapshot', {'version': None, 'products': [], 'by_id': {}})
+    monkeypatch.setattr(search, '_index', search.ProductSearchIndex())
+    monkeypatch.setattr(search, '_index_version', None)
+    monkeypatch.setattr(fragment_cache, '_fragments', {})
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        # Threads in the concurrency tests wait on SQLite's write lock
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+        'SESSION_BACKEND': 'cookie',
+        'RATE_LIMIT_BACKEND': 'off',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'SLOW_QUERY_MS': 60000,
+    })
+    with app.app_context():
+        db.create_all()
+        ensure_catalog_versions()
+        db.session.commit()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def make_user(username, role='user'):
+    user = User(first_name=username.title(), last_name='Tester', email=f'{username}@example.com',
+                username=username, role=role, gender='Female')
+    user.set_password('secret123')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_products(count, stock=100):
+    products = [Product(product_name=f'Ramen {i}', price=10.0 + i, stock=stock,
+                        category='Noodles' if i % 2 else 'Drinks')
+                for i in range(count)]
+    db.session.add_all(products)
+    db.session.commit()
+    return products
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['user_id'] = user.user_id
+        sess['role'] = user.role
+
+
+@pytest.fixture
+def user(app):
+    return make_user('alice')
+
+
+@pytest.fixture
+def admin(app):
+    return make_user('admin', role='admin')
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    login(client, user)
+    return client
+
+
+@pytest.fixture
+def admin_client(app, admin):
+    client = app.test_client()
+    login(client, admin)
+    return client
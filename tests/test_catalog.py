@@ -0,0 +1,48 @@
+import pytest
+
+from src.models import db, CartItem, CatalogVersion
+from src.services import bump_catalog_version, finalize_order, get_catalog_version
+from src.utils import assert_max_queries
+
+from .conftest import make_products
+
+
+def test_checkout_leaves_catalog_version_alone_but_stock_is_live(client, user):
+    make_products(3, stock=5)
+    assert client.get('/getproducts').status_code == 200
+    version = get_catalog_version()
+
+    db.session.add(CartItem(user_id=user.user_id, product_id=1, quantity=2))
+    db.session.commit()
+    finalize_order(user)
+    db.session.commit()
+
+    assert get_catalog_version() == version
+    # The snapshot is reused: one version lookup and one stock read
+    with assert_max_queries(2):
+        response = client.get('/getproducts')
+    assert [p['stock'] for p in response.get_json()] == [3, 5, 5]
+    assert client.get('/getproduct/1').get_json()['stock'] == 3
+
+
+def test_product_etags_change_with_stock(client, user):
+    make_products(2, stock=5)
+    first = client.get('/getproducts')
+    assert client.get('/getproducts', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    db.session.add(CartItem(user_id=user.user_id, product_id=2, quantity=1))
+    db.session.commit()
+    finalize_order(user)
+    db.session.commit()
+
+    second = client.get('/getproducts', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+def test_bump_needs_a_seeded_row(app):
+    bump_catalog_version()
+    assert get_catalog_version() == 1
+    CatalogVersion.query.delete()
+    with pytest.raises(RuntimeError):
+        bump_catalog_version()
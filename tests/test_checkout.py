@@ -0,0 +1,97 @@
+import threading
+import time
+
+from src.models import db, CartItem, Order, Product, Sale, User
+from src.services import CheckoutError, finalize_order
+
+from .conftest import make_products, make_user
+
+
+def test_concurrent_checkouts_never_oversell(app):
+    stock = 10
+    scarce, plenty = make_products(2)
+    scarce.stock = stock
+    shoppers = [make_user(f'shopper{i}') for i in range(30)]
+    for shopper in shoppers:
+        db.session.add_all([
+            CartItem(user_id=shopper.user_id, product_id=scarce.product_id, quantity=1),
+            CartItem(user_id=shopper.user_id, product_id=plenty.product_id, quantity=2)])
+    db.session.commit()
+    user_ids = [shopper.user_id for shopper in shoppers]
+
+    started = []
+    start = threading.Barrier(len(user_ids), action=lambda: started.append(time.perf_counter()))
+    outcomes = []
+
+    def checkout(user_id):
+        with app.app_context():
+            user = db.session.get(User, user_id)
+            # Hand the connection back so every thread reaches the barrier
+            db.session.close()
+            start.wait(timeout=30)
+            try:
+                finalize_order(user)
+                db.session.commit()
+                outcomes.append('ok')
+            except CheckoutError:
+                db.session.rollback()
+                outcomes.append('short')
+
+    threads = [threading.Thread(target=checkout, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started[0]
+    # Run with -s to see it; the shoppers who came up short count too, they took the locks
+    print(f'\n{len(user_ids)} checkouts in {elapsed * 1000:.0f}ms: '
+          f'{len(user_ids) / elapsed:.0f} checkouts/s')
+
+    db.session.expire_all()
+    assert outcomes.count('ok') == stock
+    assert outcomes.count('short') == len(user_ids) - stock
+    assert db.session.get(Product, scarce.product_id).stock == 0
+    assert db.session.get(Product, plenty.product_id).stock == 100 - 2 * stock
+    assert Sale.query.filter_by(product_id=scarce.product_id).count() == stock
+    # Every order points at the sale written for the same cart line
+    orders = Order.query.join(Sale).all()
+    assert len(orders) == 2 * stock
+    assert all(order.sale.product_name == order.product_name for order in orders)
+    assert all(order.sale.total_price == order.price for order in orders)
+
+
+def test_checkout_writes_one_sale_and_order_per_line(app):
+    user = make_user('bob')
+    products = make_products(3)
+    for product in reversed(products):
+        db.session.add(CartItem(user_id=user.user_id, product_id=product.product_id, quantity=2))
+    db.session.commit()
+
+    finalize_order(user)
+    db.session.commit()
+
+    orders = Order.query.order_by(Order.order_id).all()
+    assert [order.product_name for order in orders] == ['Ramen 2', 'Ramen 1', 'Ramen 0']
+    assert [order.sale.product_id for order in orders] == [p.product_id for p in reversed(products)]
+    assert CartItem.query.count() == 0
+
+
+def test_checkout_without_insert_returning_reads_ids_back(app, monkeypatch):
+    # MySQL has no INSERT ... RETURNING; the sale ids must still line up with the orders
+    monkeypatch.setattr(db.session.get_bind().dialect, 'insert_returning', False)
+    other = make_user('alice')
+    user = make_user('bob')
+    products = make_products(3)
+    db.session.add(Sale(product_id=products[0].product_id, username=other.username,
+                        product_name='Ramen 0', quantity=1, total_price=10))
+    for quantity, product in enumerate(reversed(products), start=1):
+        db.session.add(CartItem(user_id=user.user_id, product_id=product.product_id, quantity=quantity))
+    db.session.commit()
+
+    finalize_order(user)
+    db.session.commit()
+
+    orders = Order.query.order_by(Order.order_id).all()
+    assert [order.sale.username for order in orders] == ['bob'] * 3
+    assert [order.sale.product_id for order in orders] == [p.product_id for p in reversed(products)]
+    assert [order.sale.quantity for order in orders] == [1, 2, 3]
@@ -0,0 +1,60 @@
+import multiprocessing
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.utils.ids as ids
+from src.utils import next_id, id_timestamp
+
+THREADS = 8
+PROCESSES = 4
+IDS_PER_WORKER = 125_000  # 1.5 million ids in all, from 8 threads and 4 processes
+
+
+@pytest.fixture
+def leases(tmp_path, monkeypatch):
+    # Lease worker ids from a fresh directory, as a new host would
+    monkeypatch.setattr(ids, '_settings', {
+        'worker_id': None, 'worker_range': (0, ids.MAX_WORKER_ID), 'lease_dir': str(tmp_path)})
+    monkeypatch.setattr(ids, '_generator', None)
+    monkeypatch.setattr(ids, '_pid', None)
+    monkeypatch.setattr(ids, '_lease', None)
+    return str(tmp_path)
+
+
+def generate(lease_dir, count):
+    # Runs in a child process, which leases a worker id of its own
+    ids._settings.update(worker_id=None, lease_dir=lease_dir)
+    return [next_id() for _ in range(count)]
+
+
+def test_next_id_is_unique_across_threads_and_processes(leases):
+    results = [None] * THREADS
+
+    def run(index):
+        results[index] = [next_id() for _ in range(IDS_PER_WORKER)]
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with multiprocessing.get_context('spawn').Pool(PROCESSES) as pool:
+        results += pool.starmap(generate, [(leases, IDS_PER_WORKER)] * PROCESSES)
+
+    generated = [value for batch in results for value in batch]
+    assert len(generated) == (THREADS + PROCESSES) * IDS_PER_WORKER
+    assert len(set(generated)) == len(generated)
+    # The threads share this process's generator, so each sees its ids increase
+    for batch in results:
+        assert batch == sorted(batch)
+    # Child processes leased worker ids other than this process's
+    workers = {value >> ids.SEQUENCE_BITS & ids.MAX_WORKER_ID for value in generated}
+    assert len(workers) > 1
+
+
+def test_id_timestamp_reads_back_when_an_id_was_made(leases):
+    before = datetime.utcnow()
+    made = id_timestamp(next_id())
+    assert before - timedelta(milliseconds=1) <= made <= datetime.utcnow() + timedelta(milliseconds=1)
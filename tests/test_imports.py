@@ -0,0 +1,35 @@
+import pytest
+
+from src.models import Product
+from src.services import import_products
+
+
+def import_one(**fields):
+    row = {'product_name': 'Ramen', 'price': '10.50', 'stock': '5', 'category': 'Noodles', **fields}
+    return import_products([row])['rows'][0]
+
+
+@pytest.mark.parametrize('price', ['nan', 'NaN', 'inf', '-inf', float('nan'), float('inf')])
+def test_non_finite_prices_are_rejected(app, price):
+    result = import_one(price=price)
+    assert result['status'] == 'invalid'
+    assert result['errors'] == ['price must be a finite number']
+    assert Product.query.count() == 0
+
+
+@pytest.mark.parametrize('stock', ['3.0', 3.0, '3'])
+def test_integral_stock_is_accepted(app, stock):
+    assert import_one(stock=stock)['status'] == 'created'
+    assert Product.query.one().stock == 3
+
+
+@pytest.mark.parametrize('stock', ['3.5', 3.5])
+def test_fractional_stock_is_rejected(app, stock):
+    result = import_one(stock=stock)
+    assert result['status'] == 'invalid'
+    assert result['errors'] == ['stock must be a whole number']
+
+
+@pytest.mark.parametrize('stock', ['abc', None, 'inf'])
+def test_non_numeric_stock_is_rejected(app, stock):
+    assert import_one(stock=stock)['status'] == 'invalid'
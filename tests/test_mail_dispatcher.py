@@ -0,0 +1,150 @@
+import smtplib
+import socketserver
+import threading
+
+import pytest
+from flask_mail import Message
+
+from src.services.mail_dispatcher import MailDispatcher, is_transient_mail_error
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 fake ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line.split(' ', 1)[0].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 fake')
+            elif command == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip('<> ')
+                with server.lock:
+                    server.rcpt_attempts[address] = server.rcpt_attempts.get(address, 0) + 1
+                if address in server.refuse:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with server.lock:
+                    code = server.data_replies.pop(0) if server.data_replies else 250
+                    if code == 250:
+                        server.delivered.extend(recipients)
+                self.reply(f'{code} {"OK" if code == 250 else "Not now"}')
+            elif command == 'RSET':
+                recipients = []
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Not implemented')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.rcpt_attempts = {}
+        self.delivered = []
+        self.refuse = set()
+        self.data_replies = []  # SMTP codes answered to the next DATA commands
+
+
+@pytest.fixture
+def smtp_server():
+    server = FakeSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def dispatcher(app, smtp_server):
+    app.config.update(
+        MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp_server.server_address[1],
+        MAIL_USE_TLS=False, MAIL_USE_SSL=False, MAIL_USERNAME='shop@example.com',
+        MAIL_PASSWORD=None, MAIL_SUPPRESS_SEND=False, MAIL_RETRY_BACKOFF=0)
+    return MailDispatcher(app)
+
+
+def send(dispatcher, *recipients):
+    for recipient in recipients:
+        dispatcher.enqueue(Message('Hello', sender='shop@example.com',
+                                   recipients=[recipient], body='Hi'))
+    assert dispatcher.flush()
+
+
+def test_batch_is_sent_over_one_connection(dispatcher, smtp_server):
+    recipients = [f'customer{i}@example.com' for i in range(10)]
+    send(dispatcher, *recipients)
+    assert smtp_server.delivered == recipients
+    assert smtp_server.connections == 1
+
+
+def test_refused_recipient_is_not_retried(dispatcher, smtp_server):
+    smtp_server.refuse.add('gone@example.com')
+    send(dispatcher, 'first@example.com', 'gone@example.com', 'last@example.com')
+    assert smtp_server.rcpt_attempts['gone@example.com'] == 1
+    assert smtp_server.delivered == ['first@example.com', 'last@example.com']
+    assert smtp_server.connections == 1
+
+
+def test_temporary_failure_is_retried_on_a_new_connection(dispatcher, smtp_server):
+    smtp_server.data_replies = [451]
+    send(dispatcher, 'first@example.com', 'second@example.com')
+    assert smtp_server.delivered == ['first@example.com', 'second@example.com']
+    assert smtp_server.connections == 2
+
+
+def test_permanent_failure_is_not_retried(dispatcher, smtp_server):
+    smtp_server.data_replies = [554]
+    send(dispatcher, 'first@example.com', 'second@example.com')
+    assert smtp_server.rcpt_attempts['first@example.com'] == 1
+    assert smtp_server.delivered == ['second@example.com']
+    assert smtp_server.connections == 1
+
+
+@pytest.mark.parametrize('error, transient', [
+    (smtplib.SMTPServerDisconnected('Connection unexpectedly closed'), True),
+    (smtplib.SMTPConnectError(421, 'Too busy'), True),
+    (TimeoutError('timed out'), True),
+    (smtplib.SMTPDataError(451, 'Try again later'), True),
+    (smtplib.SMTPRecipientsRefused({'a@example.com': (450, b'Greylisted')}), True),
+    (smtplib.SMTPRecipientsRefused({'a@example.com': (550, b'No such user')}), False),
+    (smtplib.SMTPDataError(554, 'Rejected'), False),
+    (smtplib.SMTPAuthenticationError(535, 'Bad credentials'), False),
+    (smtplib.SMTPNotSupportedError('STARTTLS not supported'), False),
+])
+def test_is_transient_mail_error(error, transient):
+    assert is_transient_mail_error(error) is transient
+
+
+def test_exit_hook_is_registered_once(app, monkeypatch):
+    hooks = []
+    monkeypatch.setattr('atexit.register', hooks.append)
+    dispatcher = MailDispatcher()
+    for _ in range(3):
+        dispatcher.init_app(app)
+    assert hooks == [dispatcher.flush]
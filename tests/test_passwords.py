@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.models.user as user_model
+from src.models import db, User
+from src.utils import PasswordHasherBusy
+
+
+@pytest.fixture
+def busy_hasher(monkeypatch):
+    def busy(*args):
+        raise PasswordHasherBusy('Password hashing is saturated')
+    monkeypatch.setattr(user_model, 'hash_password', busy)
+    monkeypatch.setattr(user_model, 'verify_password', busy)
+
+
+def assert_retry_later(response, shows_flash=True):
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    if shows_flash:
+        assert b'Please try again in a moment' in response.data
+
+
+def test_login_asks_to_retry_when_hasher_is_busy(app, user, busy_hasher):
+    response = app.test_client().post('/login', data={'username': 'alice', 'password': 'secret123'})
+    assert_retry_later(response)
+
+
+def test_register_asks_to_retry_when_hasher_is_busy(app, busy_hasher):
+    response = app.test_client().post('/register', data={
+        'first_name': 'Bob', 'last_name': 'Tester', 'gender': 'Male', 'email': 'bob@example.com',
+        'numPrefix': '63', 'number': '9171234567', 'username': 'bob', 'password': 'secret123'})
+    assert_retry_later(response)
+    assert User.query.filter_by(username='bob').count() == 0
+
+
+def test_profile_asks_to_retry_when_hasher_is_busy(client, user, busy_hasher):
+    response = client.post('/profile', data={
+        'first_name': 'Renamed', 'last_name': 'Tester', 'gender': 'Female',
+        'email': 'alice@example.com', 'number': '9171234567', 'username': 'alice',
+        'current_password': 'secret123', 'password': 'newsecret'})
+    # profile.html has no flash area
+    assert_retry_later(response, shows_flash=False)
+    db.session.expire_all()
+    assert db.session.get(User, user.user_id).first_name == 'Alice'
+
+
+def test_reset_password_keeps_the_token_when_hasher_is_busy(app, user, busy_hasher):
+    user.reset_token = 'token123'
+    user.reset_token_expires = datetime.utcnow() + timedelta(minutes=30)
+    db.session.commit()
+    response = app.test_client().post('/reset-password/token123', data={'password': 'newsecret'})
+    assert_retry_later(response)
+    db.session.expire_all()
+    assert db.session.get(User, user.user_id).reset_token == 'token123'
@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.serving import make_server
+
+from src.commands.payment_stub import StubGateway
+from src.models import db, Payment
+from src.services import (payment_gateway, poll_pending_payments, sign_webhook,
+                          WEBHOOK_SIGNATURE_HEADER)
+
+from .conftest import make_user
+
+SECRET = 'webhook-secret'
+
+
+@pytest.fixture
+def gateway(app):
+    """A StubGateway on a free port, served from the payment gateway's own event loop."""
+    stubs = []
+
+    def start(**options):
+        stub = payment_gateway.run(StubGateway(latency=0, webhook_secret=SECRET, **options).start(), 5)
+        app.config['PAYMENT_GATEWAY_URL'] = f'http://127.0.0.1:{stub.port}'
+        stubs.append(stub)
+        return stub
+
+    app.config.update(PAYMENT_WEBHOOK_SECRET=SECRET, PAYMENT_PROVIDER_URLS={})
+    yield start
+
+    # The gateway is module-wide; stop its loop so the next test starts clean
+    async def close():
+        for stub in stubs:
+            await stub.close()
+        for session in payment_gateway._sessions.values():
+            await session.close()
+    if payment_gateway._thread is not None:
+        payment_gateway.run(close(), 5)
+        payment_gateway._loop.call_soon_threadsafe(payment_gateway._loop.stop)
+        payment_gateway._thread.join(5)
+        payment_gateway._thread = None
+
+
+@pytest.fixture
+def webhook_url(app):
+    # The stub posts its webhooks over real HTTP, so serve the app on a free port
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/payments/webhook'
+    server.shutdown()
+    thread.join(5)
+
+
+def make_payment(transaction_id, age=0, provider='GCASH'):
+    user = make_user(f'payer-{transaction_id}')
+    payment = Payment(user_id=user.user_id, amount=250.0, payment_method='E-Wallet',
+                      e_wallet_provider=provider, transaction_id=transaction_id, status='pending',
+                      created_at=datetime.utcnow() - timedelta(seconds=age))
+    db.session.add(payment)
+    db.session.commit()
+    return payment
+
+
+def payment_status(transaction_id):
+    db.session.expire_all()
+    return Payment.query.filter_by(transaction_id=transaction_id).one().status
+
+
+def wait_for_status(transaction_id, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while payment_status(transaction_id) != status and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return payment_status(transaction_id)
+
+
+def post_webhook(client, transaction_id, status, secret=SECRET):
+    body = json.dumps({'transaction_id': transaction_id, 'status': status}).encode()
+    return client.post('/payments/webhook', data=body, content_type='application/json',
+                       headers={WEBHOOK_SIGNATURE_HEADER: sign_webhook(secret, body)})
+
+
+def test_submitted_charge_settles_through_the_webhook(app, gateway, webhook_url):
+    # The charge is answered while still pending, so only the webhook can settle it
+    stub = gateway(settle_after=0.1, webhook_url=webhook_url)
+    make_payment('tx-webhook')
+
+    assert payment_gateway.submit('GCASH', 'tx-webhook', 250.0, 'E-Wallet')
+
+    assert wait_for_status('tx-webhook', 'completed') == 'completed'
+    assert stub.charges['tx-webhook']['amount'] == 250.0
+    assert stub.charges['tx-webhook']['status'] == 'completed'
+
+
+def test_webhook_with_a_bad_signature_is_rejected(app):
+    app.config['PAYMENT_WEBHOOK_SECRET'] = SECRET
+    make_payment('tx-forged')
+    client = app.test_client()
+
+    assert post_webhook(client, 'tx-forged', 'completed', secret='not-the-secret').status_code == 403
+    unsigned = client.post('/payments/webhook', json={'transaction_id': 'tx-forged', 'status': 'completed'})
+    assert unsigned.status_code == 403
+    assert payment_status('tx-forged') == 'pending'
+
+
+def test_duplicate_and_late_webhooks_leave_a_settled_payment_alone(app):
+    app.config['PAYMENT_WEBHOOK_SECRET'] = SECRET
+    make_payment('tx-settled')
+    client = app.test_client()
+
+    assert post_webhook(client, 'tx-settled', 'completed').get_json()['message'] == 'Payment updated'
+    duplicate = post_webhook(client, 'tx-settled', 'completed')
+    late = post_webhook(client, 'tx-settled', 'declined')
+
+    assert (duplicate.status_code, duplicate.get_json()['message']) == (200, 'No change')
+    assert (late.status_code, late.get_json()['message']) == (200, 'No change')
+    assert payment_status('tx-settled') == 'completed'
+
+
+def test_poll_settles_payments_whose_webhook_never_came(app, gateway):
+    # No webhook_url: the stub settles its charges but tells no one
+    stub = gateway(settle_after=0.05, fail_rate=1.0)
+    make_payment('tx-lost', age=120)
+    make_payment('tx-unknown', age=120, provider='MAYA')  # Never reached the gateway
+    make_payment('tx-recent')
+
+    assert payment_gateway.submit('GCASH', 'tx-lost', 250.0, 'E-Wallet')
+    deadline = time.monotonic() + 5
+    while stub.charges.get('tx-lost', {}).get('status') != 'failed' and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert payment_status('tx-lost') == 'pending'
+
+    assert poll_pending_payments(older_than=60) == {'failed': 1, 'pending': 1}
+    assert payment_status('tx-lost') == 'failed'
+    assert payment_status('tx-unknown') == 'pending'
+    assert payment_status('tx-recent') == 'pending'
@@ -0,0 +1,33 @@
+import pytest
+
+from src.models import db, CartItem
+from src.utils import assert_max_queries
+
+from .conftest import make_products
+
+
+def fill_cart(user, lines):
+    for product in make_products(lines):
+        db.session.add(CartItem(user_id=user.user_id, product_id=product.product_id, quantity=2))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('lines', [1, 20])
+def test_cart_page_query_count_does_not_grow_with_lines(client, user, lines):
+    fill_cart(user, lines)
+    # The session's user, then every line priced in one joined query
+    with assert_max_queries(2):
+        response = client.get('/cart')
+    assert response.status_code == 200
+    assert b'Ramen 0' in response.data
+
+
+@pytest.mark.parametrize('lines', [1, 20])
+def test_checkout_query_count_does_not_grow_with_lines(client, user, lines):
+    fill_cart(user, lines)
+    with assert_max_queries(2):
+        response = client.post('/checkout')
+    assert response.status_code == 200
+    summary = response.get_json()['order_summary']
+    assert len(summary['cart_items']) == lines
+    assert summary['subtotal'] == sum(2 * (10.0 + i) for i in range(lines))
@@ -0,0 +1,30 @@
+import pytest
+
+from src.utils import init_rate_limit
+
+
+@pytest.fixture
+def limited_app(app, tmp_path):
+    app.config.update(RATE_LIMIT_BACKEND='sqlite', RATE_LIMIT_SQLITE_PATH=str(tmp_path / 'ratelimit.db'),
+                      RATE_LIMIT_LOGIN_IP='3/60', RATE_LIMIT_LOGIN_ACCOUNT='100/60')
+    init_rate_limit(app)
+    return app
+
+
+def attempt(client, forwarded_for, number):
+    return client.post('/login', data={'username': f'guess{number}', 'password': 'wrong-password'},
+                       headers={'X-Forwarded-For': forwarded_for}).status_code
+
+
+def test_clients_behind_the_proxy_get_their_own_ip_bucket(limited_app):
+    client = limited_app.test_client()
+    assert [attempt(client, '203.0.113.7', n) for n in range(4)] == [200, 200, 200, 429]
+    # Another shopper behind the same proxy is not locked out
+    assert attempt(client, '198.51.100.20', 4) == 200
+
+
+def test_only_the_trusted_hop_of_x_forwarded_for_is_used(limited_app):
+    client = limited_app.test_client()
+    # The proxy appends the address it saw; whatever the client put before it is ignored
+    statuses = [attempt(client, f'10.9.9.{n}, 203.0.113.7', n) for n in range(4)]
+    assert statuses == [200, 200, 200, 429]
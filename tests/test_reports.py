@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models import db, Payment, Sale, UserShippingInfo
+from src.services import (archive_closed_rows, get_period_range, load_user_info,
+                          sales_report_query, sales_summary_query)
+from src.utils import assert_max_queries
+
+from .conftest import make_products, make_user
+
+
+def make_customers(count, created_at=None):
+    product = make_products(1)[0]
+    customers = [make_user(f'customer{i}') for i in range(count)]
+    for customer in customers:
+        for _ in range(2):
+            payment = Payment(user_id=customer.user_id, amount=20.0, payment_method='Card',
+                              card_provider='BDO', status='completed', created_at=created_at)
+            db.session.add(payment)
+            db.session.flush()
+            db.session.add_all([
+                UserShippingInfo(user_id=customer.user_id, payment_id=payment.payment_id,
+                                 full_name=customer.username, address_line1='1 Main St',
+                                 city='Manila', postal_code='1000', created_at=created_at),
+                Sale(product_id=product.product_id, username=customer.username,
+                     product_name=product.product_name, quantity=2, total_price=20.0,
+                     created_at=created_at)])
+    db.session.commit()
+    return customers
+
+
+@pytest.mark.parametrize('customers', [1, 20])
+def test_user_info_query_count_does_not_grow_with_users(admin_client, customers):
+    make_customers(customers)
+    # The session's user, then the page, payments, shipping and spend,
+    # plus one archive check for payments and one for sales
+    with assert_max_queries(7):
+        response = admin_client.get('/user_info')
+    assert response.status_code == 200
+    assert f'customer{customers - 1}'.encode() in response.data
+
+
+@pytest.mark.parametrize('customers', [1, 20])
+def test_user_info_reads_archived_rows_in_fixed_queries(app, customers):
+    make_customers(customers, created_at=datetime.utcnow() - timedelta(days=400))
+    archive_closed_rows(older_than_days=30)
+    with assert_max_queries(9):
+        users_info, _ = load_user_info(None, 50)
+    by_name = {info['user'].username: info for info in users_info}
+    assert len(by_name) == customers
+    assert by_name['customer0']['total_spent'] == 40.0
+    assert len(by_name['customer0']['payments']) == 2
+    assert len(by_name['customer0']['shipping_info']) == 2
+
+
+def query_plan(query):
+    compiled = query.statement.compile(db.engine)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {compiled}', params)]
+
+
+@pytest.mark.parametrize('build_query', [sales_report_query, sales_summary_query])
+@pytest.mark.parametrize('period', ['daily', 'monthly', 'yearly'])
+def test_period_filters_range_scan_created_at(app, build_query, period):
+    query, sale_id = build_query(*get_period_range(period))
+    # As paged by the admin pages and ordered by the exports
+    for ordered in (query.order_by(sale_id).limit(51), query.order_by(sale_id)):
+        plan = query_plan(ordered)
+        assert not [step for step in plan if step.startswith('SCAN sales')], plan
+        assert [step for step in plan if 'ix_sales_created_at (created_at>? AND created_at<?)' in step], plan
+
+
+def test_archived_period_filters_range_scan_created_at(app):
+    make_customers(1, created_at=datetime.utcnow() - timedelta(days=400))
+    archive_closed_rows(older_than_days=30)
+    last_year = datetime.utcnow() - timedelta(days=400)
+    query, sale_id = sales_report_query(*get_period_range('yearly', last_year))
+    plan = query_plan(query.order_by(sale_id).limit(51))
+    assert not [step for step in plan if step.startswith(('SCAN sales', 'SCAN sales_archive'))], plan
+    assert [step for step in plan if 'ix_sales_archive_created_at (created_at>? AND created_at<?)' in step], plan
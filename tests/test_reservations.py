@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from src.models import db, StockReservation
+
+from .conftest import make_products, make_user
+
+
+def test_listing_detail_and_search_subtract_live_holds(app, client):
+    make_products(2, stock=5)
+    assert client.post('/addtocart', json={'product_id': 1, 'quantity': 3}).status_code == 200
+    # An expired hold no longer counts against stock
+    other = make_user('bob')
+    db.session.add(StockReservation(user_id=other.user_id, product_id=2, quantity=4,
+                                    expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    db.session.commit()
+
+    shopper = app.test_client()
+    products = shopper.get('/getproducts').get_json()
+    assert [(p['stock'], p['available']) for p in products] == [(5, 2), (5, 5)]
+    assert shopper.get('/getproduct/1').get_json()['available'] == 2
+    page = shopper.get('/getproducts?limit=1').get_json()
+    assert page['items'][0]['available'] == 2
+
+    results = shopper.get('/search?q=Ramen 0').get_data(as_text=True)
+    assert 'Available: 2' in results
+
+
+def test_available_never_goes_negative(app, client):
+    make_products(1, stock=2)
+    other = make_user('bob')
+    db.session.add(StockReservation(user_id=other.user_id, product_id=1, quantity=2,
+                                    expires_at=datetime.utcnow() + timedelta(minutes=5)))
+    db.session.commit()
+    # Stock lowered by an admin below what carts already hold
+    db.session.execute(db.text('UPDATE products SET stock = 1'))
+    db.session.commit()
+
+    assert client.get('/getproduct/1').get_json()['available'] == 0
+    assert 'Out of stock' in client.get('/search?q=Ramen').get_data(as_text=True)
@@ -0,0 +1,41 @@
+from src.models import db, CartItem, Product, SalesDailyCategory
+from src.services import backfill_rollups, finalize_order, verify_rollups
+
+from .conftest import make_products
+
+
+def checkout(user, products):
+    for product in products:
+        db.session.add(CartItem(user_id=user.user_id, product_id=product.product_id, quantity=1))
+    db.session.commit()
+    finalize_order(user)
+    db.session.commit()
+
+
+def category_totals():
+    return {row.category: (row.sale_count, row.revenue) for row in SalesDailyCategory.query}
+
+
+def test_category_rollups_keep_the_category_at_sale_time(app, user):
+    drinks, noodles = make_products(2)
+    checkout(user, [drinks, noodles])
+    recorded = category_totals()
+    assert recorded == {'Drinks': (1, 10.0), 'Noodles': (1, 11.0)}
+
+    drinks.category = 'Noodles'
+    db.session.commit()
+    assert verify_rollups() == []
+    backfill_rollups()
+    assert category_totals() == recorded
+
+
+def test_category_rollups_count_sales_of_deleted_products(app, user):
+    drinks, noodles = make_products(2)
+    checkout(user, [drinks, noodles])
+    recorded = category_totals()
+
+    db.session.delete(db.session.get(Product, noodles.product_id))
+    db.session.commit()
+    assert verify_rollups() == []
+    backfill_rollups()
+    assert category_totals() == recorded
@@ -0,0 +1,29 @@
+import re
+
+import pytest
+
+from src.models import db, Product
+from src.utils import assert_max_queries, TooManyQueries
+
+
+def test_assert_max_queries_fails_past_the_limit(app):
+    with pytest.raises(TooManyQueries, match='2 queries ran, expected at most 1'):
+        with assert_max_queries(1):
+            db.session.query(Product).all()
+            db.session.query(Product).count()
+
+
+def test_nested_blocks_count_their_own_statements(app):
+    with assert_max_queries(2) as outer:
+        db.session.query(Product).all()
+        with assert_max_queries(1) as inner:
+            db.session.query(Product).count()
+    assert len(inner) == 1
+    assert len(outer) == 2
+
+
+def test_responses_carry_server_timing(client):
+    response = client.get('/cart')
+    timing = re.fullmatch(r'db;dur=([\d.]+);desc="(\d+) queries"', response.headers['Server-Timing'])
+    assert timing
+    assert int(timing.group(2)) >= 1
@@ -0,0 +1,9 @@
+from src.commands.bench import UNREACHABLE_DB_HOST, measure_startup
+
+
+def test_create_app_never_connects_to_the_database():
+    # Any connect attempt to this host stalls until the driver's timeout
+    startup = measure_startup({'DB_HOST': UNREACHABLE_DB_HOST, 'DB_DIALECT': 'mysql+pymysql',
+                               'DB_REPLICA_HOST': ''})
+    assert startup['connections'] == 0
+    assert startup['create_app_ms'] < 2000